@@ -11,21 +11,69 @@ Erweiterte Groq-Integration mit:
 """
 
 import os
-import json
-from groq import Groq
+import time
+from groq_client import shared_groq_client
 from rag_hiking_system import AppenzellHikingRAG
-from typing import List, Dict, Any
+from groq_response_cache import GroqResponseCache
+from route_store import RouteStore, is_route_catalogue
+from document_registry import DocumentRegistry, read_json, read_text
+from page_cache import PageTextCache, file_sha256
+from pdf_context import BackgroundPdfExtractor
+from passage_index import PassageIndex, page_passages
+from prompt_builder import PromptBuilder, PromptUsage, estimate_tokens
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 import glob
-import pdfplumber
 from datetime import datetime
 
 
 class AdvancedGroqRAG(AppenzellHikingRAG):
     """Erweiterte Groq-Integration mit Multi-Document Support inkl. PDF-Verarbeitung"""
 
-    def __init__(self, groq_api_key: str = None):
+    # Sampling-Parameter für Wanderempfehlungen (gestreamt und nicht gestreamt)
+    RESPONSE_PARAMS = {
+        "model": "llama3-8b-8192",
+        "temperature": 0.7,
+        "max_tokens": 500,
+        "top_p": 0.9,
+    }
+
+    # Sampling-Parameter für Antworten ohne passende Routen
+    NO_RESULTS_PARAMS = {
+        "model": "llama3-8b-8192",
+        "temperature": 0.8,
+        "max_tokens": 300,
+    }
+
+    # Hinweis, wenn der Stream nach den ersten Chunks abbricht
+    INCOMPLETE_RESPONSE_NOTICE = (
+        "⚠️ Antwort unvollständig: Die Verbindung zu Groq wurde unterbrochen. "
+        "Hier die wichtigsten Angaben zur Top-Empfehlung:"
+    )
+
+    # Token-Budget des Kontexts (Routen, PDF-Passagen, Hintergrund)
+    CONTEXT_TOKEN_BUDGET = 900
+    TOP_ROUTE_TOKENS = 250
+    ALTERNATIVE_ROUTE_TOKENS = 140
+    PDF_CONTEXT_TOKENS = 400
+    PDF_EXCERPT_TOKENS = 50
+
+    # Reihenfolge, in der das Budget gefüllt wird
+    PRIORITY_TOP_ROUTE = 0
+    PRIORITY_ALTERNATIVES = 1
+    PRIORITY_PDF = 2
+    PRIORITY_BACKGROUND = 3
+
+    def __init__(
+        self,
+        groq_api_key: str = None,
+        response_cache: GroqResponseCache = None,
+        page_cache: PageTextCache = None,
+    ):
         super().__init__()
 
+        # Response-Cache für wiederholte Anfragen (z.B. nach Streamlit-Reruns)
+        self.response_cache = response_cache or GroqResponseCache()
+
         # Groq Client optional initialisieren
         self.groq_client = None
         api_key = (
@@ -36,7 +84,7 @@ class AdvancedGroqRAG(AppenzellHikingRAG):
 
         if api_key:
             try:
-                self.groq_client = Groq(api_key=api_key)
+                self.groq_client = shared_groq_client(api_key)
                 print("🤖 Groq Client erfolgreich initialisiert")
             except Exception as e:
                 print(f"⚠️ Groq Client Fehler: {e}")
@@ -44,17 +92,34 @@ class AdvancedGroqRAG(AppenzellHikingRAG):
         else:
             print("ℹ️ Groq API Key nicht gesetzt - Fallback-Modus aktiv")
 
-        # Zusätzliche Kontextinformationen laden (inkl. PDFs)
+        # PDF-Auszüge im Hintergrund extrahieren (persistenter Seiten-Cache)
+        self.page_cache = page_cache or PageTextCache()
+        self.pdf_extractor = BackgroundPdfExtractor(self.extract_pdf_content)
+
+        # Zusätzliche Kontextinformationen registrieren (inkl. PDFs, lazy)
         self.additional_context = self.load_additional_documents()
 
         print("🤖 Advanced Groq RAG System initialisiert")
         if self.additional_context:
-            print(f"📄 {len(self.additional_context)} zusätzliche Dokumente geladen")
+            print(
+                f"📄 {len(self.additional_context)} zusätzliche Dokumente registriert"
+            )
+
+    def close(self):
+        """Beendet die PDF-Extraktion im Hintergrund (wartende Aufträge entfallen)"""
+        self.pdf_extractor.shutdown(wait=False)
+
+    def __enter__(self) -> "AdvancedGroqRAG":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
 
     def set_groq_api_key(self, api_key: str):
         """Setzt den Groq API Key nachträglich"""
         try:
-            self.groq_client = Groq(api_key=api_key)
+            self.groq_client = shared_groq_client(api_key)
             print("✅ Groq API Key erfolgreich gesetzt!")
             return True
         except Exception as e:
@@ -62,24 +127,42 @@ class AdvancedGroqRAG(AppenzellHikingRAG):
             self.groq_client = None
             return False
 
+    def create_chat_completion(self, messages: List[Dict[str, str]], **params) -> str:
+        """Groq-Aufruf über den Response-Cache (identische Anfragen nur einmal)"""
+
+        def create() -> str:
+            with self.tracer.span("llm"):
+                completion = self.groq_client.chat.completions.create(
+                    messages=messages, **params
+                )
+            return completion.choices[0].message.content
+
+        cache_key = self.response_cache.make_key(messages, params)
+        return self.response_cache.get_or_create(cache_key, create)
+
     def extract_pdf_content(self, pdf_path: str, max_pages: int = 5) -> str:
-        """Extrahiert Text aus PDF-Datei (begrenzt auf erste Seiten für Kontext)"""
+        """Extrahiert Text aus PDF-Datei (begrenzt auf erste Seiten für Kontext)
+
+        Seitentexte kommen aus dem persistenten Seiten-Cache (Datei-Hash +
+        Seite), nur fehlende Seiten werden mit pdfplumber gelesen.
+        """
 
         try:
-            content = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                # Begrenzte Anzahl Seiten für Performance
-                pages_to_read = min(len(pdf.pages), max_pages)
+            file_hash = file_sha256(pdf_path)
+            page_texts = self.page_cache.extract_pages(
+                pdf_path, list(range(1, max_pages + 1)), "plain", file_hash
+            )
+            page_count = self.page_cache.page_count(file_hash)
 
-                for i in range(pages_to_read):
-                    page = pdf.pages[i]
-                    page_text = page.extract_text()
-                    if page_text:
-                        content += page_text + "\n"
+            # Begrenzte Anzahl Seiten für Performance
+            content = ""
+            for page_num in range(1, min(page_count, max_pages) + 1):
+                if page_texts[page_num]:
+                    content += page_texts[page_num] + "\n"
 
-                # Falls PDF viele Seiten hat, Hinweis hinzufügen
-                if len(pdf.pages) > max_pages:
-                    content += f"\n[... PDF hat {len(pdf.pages)} Seiten, nur erste {max_pages} gelesen für Kontext ...]"
+            # Falls PDF viele Seiten hat, Hinweis hinzufügen
+            if page_count > max_pages:
+                content += f"\n[... PDF hat {page_count} Seiten, nur erste {max_pages} gelesen für Kontext ...]"
 
             return content[:3000]  # Begrenzte Textlänge für Kontext
 
@@ -87,74 +170,123 @@ class AdvancedGroqRAG(AppenzellHikingRAG):
             print(f"⚠️ Fehler beim Lesen von {pdf_path}: {e}")
             return f"PDF verfügbar aber nicht lesbar: {os.path.basename(pdf_path)}"
 
-    def load_additional_documents(self) -> Dict[str, Any]:
-        """Lädt zusätzliche Dokumente für erweiterten Kontext (inkl. PDFs)"""
+    def load_additional_documents(self) -> DocumentRegistry:
+        """Registriert zusätzliche Dokumente für erweiterten Kontext (inkl. PDFs)
 
-        context = {}
+        Erfasst nur Pfade, Grössen und mtimes; gelesen wird beim ersten Zugriff.
+        """
 
-        try:
-            # README.md für Projektkontext
-            if os.path.exists("README.md"):
-                with open("README.md", "r", encoding="utf-8") as f:
-                    context["project_info"] = f.read()
-
-            # RAG Dokumentation für technische Details
-            if os.path.exists("RAG_DOCUMENTATION.md"):
-                with open("RAG_DOCUMENTATION.md", "r", encoding="utf-8") as f:
-                    context["technical_docs"] = f.read()
-
-            # Evaluation Results für Performance-Daten
-            if os.path.exists("rag_evaluation_results.json"):
-                with open("rag_evaluation_results.json", "r", encoding="utf-8") as f:
-                    context["evaluation_data"] = json.load(f)
-
-            # PDFs aus dem PDFs Ordner verarbeiten
-            pdf_folder = "PDFs"
-            if os.path.exists(pdf_folder):
-                pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
-                print(f"📄 Gefundene PDFs: {len(pdf_files)}")
-
-                for pdf_path in pdf_files:
-                    pdf_name = os.path.basename(pdf_path)
-                    print(f"   📖 Verarbeite: {pdf_name}")
-
-                    # PDF-Inhalt extrahieren
-                    pdf_content = self.extract_pdf_content(pdf_path)
-                    context[f"pdf_{pdf_name}"] = {
-                        "content": pdf_content,
-                        "file_path": pdf_path,
-                        "processed_at": datetime.now().isoformat(),
-                    }
-
-            # Weitere JSON/Markdown Dateien im Verzeichnis
-            for file_path in glob.glob("*.md") + glob.glob("*.json"):
-                if file_path not in [
-                    "README.md",
-                    "RAG_DOCUMENTATION.md",
-                    "rag_evaluation_results.json",
-                ]:
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            if file_path.endswith(".json"):
-                                context[f"data_{file_path}"] = json.load(f)
-                            else:
-                                context[f"doc_{file_path}"] = f.read()
-                    except Exception as e:
-                        print(f"⚠️ Konnte {file_path} nicht laden: {e}")
+        context = DocumentRegistry()
 
-        except Exception as e:
-            print(f"⚠️ Fehler beim Laden zusätzlicher Dokumente: {e}")
+        # README.md für Projektkontext
+        if os.path.exists("README.md"):
+            context.register("project_info", "README.md", read_text)
+
+        # RAG Dokumentation für technische Details
+        if os.path.exists("RAG_DOCUMENTATION.md"):
+            context.register("technical_docs", "RAG_DOCUMENTATION.md", read_text)
+
+        # Evaluation Results für Performance-Daten
+        if os.path.exists("rag_evaluation_results.json"):
+            context.register(
+                "evaluation_data", "rag_evaluation_results.json", read_json
+            )
+
+        # PDFs aus dem PDFs Ordner (Extraktion erst beim ersten Zugriff)
+        pdf_folder = "PDFs"
+        if os.path.exists(pdf_folder):
+            pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
+            print(f"📄 Gefundene PDFs: {len(pdf_files)}")
+
+            for pdf_path in pdf_files:
+                pdf_name = os.path.basename(pdf_path)
+                if context.register(
+                    f"pdf_{pdf_name}", pdf_path, self.load_pdf_document
+                ):
+                    self.pdf_extractor.submit(pdf_path)
+
+            # Passagen-Index über alle Seiten ebenfalls im Hintergrund aufbauen
+            self.ready_passage_index(context)
+
+        # Weitere JSON/Markdown Dateien im Verzeichnis
+        for file_path in glob.glob("*.md") + glob.glob("*.json"):
+            if file_path in [
+                "README.md",
+                "RAG_DOCUMENTATION.md",
+                "rag_evaluation_results.json",
+            ]:
+                continue
+
+            # Routen-Kataloge nur als JSONL-Store (Offsets) öffnen
+            if is_route_catalogue(file_path):
+                context.register(f"data_{file_path}", file_path, RouteStore.open)
+            elif file_path.endswith(".json"):
+                context.register(f"data_{file_path}", file_path, read_json)
+            else:
+                context.register(f"doc_{file_path}", file_path, read_text)
 
         return context
 
-    def create_enhanced_context(self, query: str, results: List) -> str:
-        """Erstellt erweiterten Kontext für Groq (inkl. PDF-Inhalte)"""
+    def extract_pdf_pages(self, pdf_path: str) -> Dict[int, str]:
+        """Texte aller Seiten einer PDF (über den Seiten-Cache)"""
+        file_hash = file_sha256(pdf_path)
+        page_count = self.page_cache.page_count(file_hash)
+        if page_count is None:
+            self.page_cache.extract_pages(pdf_path, [1], "plain", file_hash)
+            page_count = self.page_cache.page_count(file_hash)
 
-        # Basis-Routen Kontext
-        routes_context = ""
+        return self.page_cache.extract_pages(
+            pdf_path, list(range(1, page_count + 1)), "plain", file_hash
+        )
+
+    def build_passage_index(self, pdf_paths: List[str]) -> PassageIndex:
+        """Passagen-Index über alle Seiten aller PDFs"""
+        passages = []
+        for pdf_path in pdf_paths:
+            try:
+                pages = self.extract_pdf_pages(pdf_path)
+            except Exception as e:
+                print(f"⚠️ Fehler beim Lesen von {pdf_path}: {e}")
+                continue
+            passages.extend(page_passages(os.path.basename(pdf_path), pages))
+
+        print(f"📚 Passagen-Index: {len(passages)} Passagen aus {len(pdf_paths)} PDFs")
+        return PassageIndex(passages)
+
+    def ready_passage_index(
+        self, context: DocumentRegistry = None
+    ) -> Optional[PassageIndex]:
+        """Passagen-Index falls fertig (plant ihn sonst ein, ohne zu warten)"""
+        context = self.additional_context if context is None else context
+        pdf_paths = [
+            context.document(key).path for key in context if key.startswith("pdf_")
+        ]
+        if not pdf_paths:
+            return None
+        return self.pdf_extractor.ready_all(
+            "passages", pdf_paths, self.build_passage_index
+        )
+
+    def load_pdf_document(self, pdf_path: str) -> Dict[str, Any]:
+        """Kontext-Eintrag einer PDF (wartet auf die Hintergrund-Extraktion)"""
+        return {
+            "content": self.pdf_extractor.result(pdf_path),
+            "file_path": pdf_path,
+            "processed_at": datetime.now().isoformat(),
+        }
+
+    def build_enhanced_context(
+        self, query: str, results: List
+    ) -> Tuple[str, PromptUsage]:
+        """Erweiterter Kontext für Groq innerhalb des Token-Budgets"""
+        builder = PromptBuilder(self.CONTEXT_TOKEN_BUDGET)
+
+        # Routen: Top-Empfehlung vor Alternativen, Beschreibung wird gekürzt
         for i, result in enumerate(results[:3], 1):
             route = result.route
-            routes_context += f"""
+            builder.add(
+                f"route_{i}",
+                f"""
 🏔️ Route {i}: {route['title']}
 • Dauer: {route.get('duration', 'Nicht angegeben')}
 • Distanz: {route.get('distance', 'Nicht angegeben')}
@@ -162,69 +294,97 @@ class AdvancedGroqRAG(AppenzellHikingRAG):
 • Schwierigkeit: {route.get('sac_scale', 'Nicht angegeben')}
 • Restaurants: {', '.join(route.get('restaurants', [])[:2]) if route.get('restaurants') else 'Keine Angabe'}
 • Highlights: {', '.join(route.get('highlights', [])[:3]) if route.get('highlights') else 'Siehe Beschreibung'}
-• Beschreibung: {route.get('description', '')[:300]}...
 • Warum empfohlen: {result.explanation}
 • RAG-Score: {result.final_score:.2f}
-"""
+• Beschreibung: {route.get('description', '')}""",
+                self.PRIORITY_TOP_ROUTE if i == 1 else self.PRIORITY_ALTERNATIVES,
+                truncatable=True,
+                max_tokens=(
+                    self.TOP_ROUTE_TOKENS if i == 1 else self.ALTERNATIVE_ROUTE_TOKENS
+                ),
+            )
 
         # System-Performance Context
-        performance_context = ""
         if "evaluation_data" in self.additional_context:
             eval_data = self.additional_context["evaluation_data"]
-            if "system_stats" in eval_data:
+            if eval_data and "system_stats" in eval_data:
                 stats = eval_data["system_stats"]
-                performance_context = f"""
+                builder.add(
+                    "performance",
+                    f"""
 📊 System-Performance:
 • Precision@3: {stats.get('avg_precision_at_3', 0)*100:.0f}%
 • Durchschnittliche Antwortzeit: {stats.get('avg_response_time', 0):.1f}s
-• Präferenz-Match Rate: {stats.get('avg_preference_match', 0)*100:.0f}%
-"""
+• Präferenz-Match Rate: {stats.get('avg_preference_match', 0)*100:.0f}%""",
+                    self.PRIORITY_BACKGROUND,
+                )
 
-        # PDF-Kontext hinzufügen
-        pdf_context = ""
+        # PDF-Kontext: zur Anfrage passende Passagen
         pdf_docs = [
             key for key in self.additional_context.keys() if key.startswith("pdf_")
         ]
-        if pdf_docs:
-            pdf_context += "\n📚 Verfügbare PDF-Dokumente:\n"
-            for pdf_key in pdf_docs[:3]:  # Nur erste 3 PDFs für Kontext
-                pdf_data = self.additional_context[pdf_key]
+        passage_index = self.ready_passage_index()
+        if passage_index is not None:
+            expanded_query = self.query_expander.expand_query(query).expanded_query
+            for passage in passage_index.select(
+                expanded_query, self.PDF_CONTEXT_TOKENS
+            ):
+                builder.add(
+                    f"pdf_{passage.source}_s{passage.page}",
+                    f"• {passage.source} (S. {passage.page}): {passage.text}",
+                    self.PRIORITY_PDF,
+                    heading="\n📚 Relevante Auszüge aus PDF-Dokumenten:",
+                )
+        else:
+            # Index noch im Aufbau: fertige Auszüge der ersten Seiten verwenden
+            excerpts = 0
+            for pdf_key in pdf_docs:
+                if excerpts == 3:  # Nur 3 PDFs für Kontext
+                    break
                 pdf_name = pdf_key.replace("pdf_", "")
-                pdf_context += f"• {pdf_name}: {pdf_data['content'][:200]}...\n"
+                pdf_path = self.additional_context.document(pdf_key).path
+
+                # Nie auf die PDF-Extraktion warten: unfertige PDFs überspringen
+                content = self.pdf_extractor.ready(pdf_path)
+                if not content:
+                    continue
+                excerpts += 1
+                builder.add(
+                    pdf_key,
+                    f"• {pdf_name}: {content}",
+                    self.PRIORITY_PDF,
+                    heading="\n📚 Verfügbare PDF-Dokumente:",
+                    truncatable=True,
+                    max_tokens=self.PDF_EXCERPT_TOKENS,
+                )
 
         # Regionale Besonderheiten
-        regional_context = """
+        builder.add(
+            "regional",
+            """
 🌍 Appenzeller Wanderkontext:
 • SAC-Skala: T1 (einfach) bis T6 (sehr schwierig)
 • Typische Dauer: 1-6 Stunden
 • Höhenlagen: 400m-2500m (Säntis)
 • Beste Zeit: Mai-Oktober
-• Besondere Highlights: Seealpsee, Äscher-Wildkirchli, Kronberg
-"""
-
-        return f"""
-{routes_context}
-
-{performance_context}
+• Besondere Highlights: Seealpsee, Äscher-Wildkirchli, Kronberg""",
+            self.PRIORITY_BACKGROUND,
+        )
 
-{pdf_context}
+        return builder.build()
 
-{regional_context}
-"""
+    def create_enhanced_context(self, query: str, results: List) -> str:
+        """Erstellt erweiterten Kontext für Groq (inkl. PDF-Inhalte)"""
+        context, _ = self.build_enhanced_context(query, results)
+        return context
 
-    def generate_intelligent_response(self, query: str, results: List) -> str:
-        """Generiert intelligente Antwort mit erweitertem Kontext"""
+    def build_response_messages(
+        self, query: str, results: List
+    ) -> Tuple[List[Dict[str, str]], PromptUsage]:
+        """System- und User-Prompt für die Wanderempfehlung samt Token-Verbrauch"""
 
-        if not results:
-            return self.generate_no_results_response(query)
-
-        # Prüfen ob Groq Client verfügbar ist
-        if not self.groq_client:
-            print("ℹ️ Groq Client nicht verfügbar - verwende Fallback")
-            return self.generate_fallback_response(query, results)
-
-        # Erweiterten Kontext erstellen
-        enhanced_context = self.create_enhanced_context(query, results)
+        # Erweiterten Kontext innerhalb des Token-Budgets erstellen
+        enhanced_context, usage = self.build_enhanced_context(query, results)
 
         # Intelligenter System-Prompt
         system_prompt = """Du bist ein erfahrener Wanderführer und KI-Experte für die Region Appenzell. 
@@ -267,22 +427,40 @@ Bitte erstelle eine maßgeschneiderte, hilfreiche Wanderempfehlung die:
 Halte die Antwort informativ aber nicht zu lang (max. 350 Wörter).
 """
 
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        # Token-Verbrauch dieser Anfrage (pro Aufruf, nicht am geteilten System)
+        usage.prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        print(
+            f"🧮 Prompt: ~{usage.prompt_tokens} Tokens "
+            f"(Kontext {usage.context_tokens}/{usage.budget}, "
+            f"{len(usage.dropped)} Abschnitte weggelassen)"
+        )
+        return messages, usage
+
+    def generate_intelligent_response(self, query: str, results: List) -> str:
+        """Generiert intelligente Antwort mit erweitertem Kontext"""
+
+        if not results:
+            return self.generate_no_results_response(query)
+
+        # Prüfen ob Groq Client verfügbar ist
+        if not self.groq_client:
+            print("ℹ️ Groq Client nicht verfügbar - verwende Fallback")
+            return self.generate_fallback_response(query, results)
+
         try:
             # Groq API Aufruf mit erweiterten Parametern
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                model="llama3-8b-8192",
-                temperature=0.7,
-                max_tokens=500,
-                top_p=0.9,
+            messages, _ = self.build_response_messages(query, results)
+            response = self.create_chat_completion(
+                messages=messages,
                 stream=False,
+                **self.RESPONSE_PARAMS,
             )
 
-            response = chat_completion.choices[0].message.content
-
             # Response-Qualität bewerten und ggf. verbessern
             return self.enhance_response_quality(response, query, results)
 
@@ -290,23 +468,85 @@ Halte die Antwort informativ aber nicht zu lang (max. 350 Wörter).
             print(f"❌ Groq API Fehler: {e}")
             return self.generate_fallback_response(query, results)
 
-    def generate_no_results_response(self, query: str) -> str:
-        """Generiert hilfreiche Antwort auch ohne Ergebnisse"""
+    def stream_intelligent_response(
+        self,
+        query: str,
+        results: List,
+        on_prompt_usage: Optional[Callable[[PromptUsage], None]] = None,
+    ) -> Iterator[str]:
+        """Streamt die Antwort chunkweise, Post-Processing folgt nach dem Stream
 
-        if not self.groq_client:
-            return f"""
-Entschuldigung, ich konnte keine passenden Wanderrouten für "{query}" finden.
+        on_prompt_usage erhält den Token-Verbrauch des Prompts dieser Anfrage.
+        """
 
-Versuchen Sie es mit:
-• Spezifischeren Begriffen (z.B. "T2 Wanderung" statt "mittelschwer")
-• Anderen Suchbegriffen (z.B. "Gasthaus" statt "Restaurant")
-• Klareren Präferenzen (z.B. "2 Stunden" statt "kurz")
+        if not results or not self.groq_client:
+            yield self.generate_intelligent_response(query, results)
+            return
 
-Die Appenzeller Region bietet wunderbare Wandermöglichkeiten für jeden Geschmack!
-"""
+        messages, usage = self.build_response_messages(query, results)
+        if on_prompt_usage is not None:
+            on_prompt_usage(usage)
+        cache_key = self.response_cache.make_key(messages, self.RESPONSE_PARAMS)
+        response, in_flight = self.response_cache.claim(cache_key)
 
-        try:
-            fallback_prompt = f"""
+        if in_flight is not None:
+            # Identische Anfrage läuft bereits - deren Antwort abwarten
+            try:
+                response = in_flight.result()
+            except Exception as e:
+                print(f"❌ Groq API Fehler: {e}")
+                yield self.generate_fallback_response(query, results)
+                return
+
+        if response is not None:
+            # Bereits bekannte Antwort sofort vollständig ausgeben
+            yield response
+        else:
+            chunks = []
+            stream_start = time.perf_counter()
+            try:
+                stream = self.groq_client.chat.completions.create(
+                    messages=messages, stream=True, **self.RESPONSE_PARAMS
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not chunks:
+                            self.tracer.record(
+                                "llm_first_token", time.perf_counter() - stream_start
+                            )
+                        chunks.append(delta)
+                        yield delta
+            except Exception as e:
+                print(f"❌ Groq API Fehler: {e}")
+                self.response_cache.fail(cache_key, e)
+                if not chunks:
+                    yield self.generate_fallback_response(query, results)
+                    return
+
+                # Abgebrochene Antwort kennzeichnen und nicht cachen
+                notice = f"\n\n{self.INCOMPLETE_RESPONSE_NOTICE}\n"
+                notice += self.generate_fallback_response(query, results)
+                yield notice
+                response = "".join(chunks) + notice
+            except BaseException:
+                # Stream vom Aufrufer geschlossen - Wartende nicht hängen lassen
+                self.response_cache.fail(cache_key, RuntimeError("Stream abgebrochen"))
+                raise
+            else:
+                self.tracer.record("llm_stream", time.perf_counter() - stream_start)
+                response = "".join(chunks)
+                self.response_cache.complete(cache_key, response)
+
+        # Response-Qualität nach dem Stream verbessern (nur Ergänzungen anhängen)
+        enhanced_response = self.enhance_response_quality(response, query, results)
+        if enhanced_response.startswith(response) and enhanced_response != response:
+            yield enhanced_response[len(response) :]
+
+    def build_no_results_messages(self, query: str) -> List[Dict[str, str]]:
+        """Erstellt den Prompt für Anfragen ohne passende Routen"""
+
+        fallback_prompt = f"""
 Der Benutzer fragt: "{query}"
 
 Es wurden keine passenden Wanderrouten gefunden. Erstelle eine hilfreiche Antwort die:
@@ -317,18 +557,11 @@ Es wurden keine passenden Wanderrouten gefunden. Erstelle eine hilfreiche Antwor
 
 Ton: Freundlich und hilfreich, max. 200 Wörter.
 """
+        return [{"role": "user", "content": fallback_prompt}]
 
-            completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": fallback_prompt}],
-                model="llama3-8b-8192",
-                temperature=0.8,
-                max_tokens=300,
-            )
-
-            return completion.choices[0].message.content
-
-        except Exception as e:
-            return f"""
+    def no_results_fallback_text(self, query: str) -> str:
+        """Statische Antwort ohne Ergebnisse (ohne Groq)"""
+        return f"""
 Entschuldigung, ich konnte keine passenden Wanderrouten für "{query}" finden.
 
 Versuchen Sie es mit:
@@ -339,6 +572,21 @@ Versuchen Sie es mit:
 Die Appenzeller Region bietet wunderbare Wandermöglichkeiten für jeden Geschmack!
 """
 
+    def generate_no_results_response(self, query: str) -> str:
+        """Generiert hilfreiche Antwort auch ohne Ergebnisse"""
+
+        if not self.groq_client:
+            return self.no_results_fallback_text(query)
+
+        try:
+            return self.create_chat_completion(
+                messages=self.build_no_results_messages(query),
+                **self.NO_RESULTS_PARAMS,
+            )
+
+        except Exception as e:
+            return self.no_results_fallback_text(query)
+
     def enhance_response_quality(self, response: str, query: str, results: List) -> str:
         """Verbessert Response-Qualität durch Post-Processing"""
 
@@ -427,24 +675,23 @@ def demo_advanced_groq():
 
     try:
         # System initialisieren (API Key ist jetzt eingebaut)
-        groq_rag = AdvancedGroqRAG()
+        with AdvancedGroqRAG() as groq_rag:
+            # Demo-Queries
+            demo_queries = [
+                "Ich möchte eine einfache Wanderung mit Restaurant für die Familie",
+                "Suche eine anspruchsvolle Bergtour mit spektakulärer Aussicht",
+                "Welche Wanderung ist gut für Anfänger und dauert etwa 2 Stunden?",
+            ]
 
-        # Demo-Queries
-        demo_queries = [
-            "Ich möchte eine einfache Wanderung mit Restaurant für die Familie",
-            "Suche eine anspruchsvolle Bergtour mit spektakulärer Aussicht",
-            "Welche Wanderung ist gut für Anfänger und dauert etwa 2 Stunden?",
-        ]
-
-        for query in demo_queries:
-            print(f"\n📝 Demo-Anfrage: {query}")
-            print("-" * 50)
+            for query in demo_queries:
+                print(f"\n📝 Demo-Anfrage: {query}")
+                print("-" * 50)
 
-            results = groq_rag.retrieve(query, k=2)
-            response = groq_rag.generate_intelligent_response(query, results)
+                results = groq_rag.retrieve(query, k=2)
+                response = groq_rag.generate_intelligent_response(query, results)
 
-            print(response)
-            print("\n" + "=" * 50)
+                print(response)
+                print("\n" + "=" * 50)
 
         print("\n🎯 Demo abgeschlossen! Das System ist einsatzbereit.")
 
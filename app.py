@@ -8,6 +8,7 @@ import plotly.graph_objects as go
 import pandas as pd
 import time
 from advanced_groq_system import AdvancedGroqRAG
+from groq_client import throttle_notices
 import json
 
 
@@ -259,6 +260,92 @@ def display_ai_response(response_text, processing_time=None):
     st.markdown("</div></div>", unsafe_allow_html=True)
 
 
+def display_ai_response_stream(response_chunks, start_time):
+    """Zeigt die AI-Antwort während des Streamings Token für Token"""
+
+    st.markdown(
+        """
+    <div class="ai-response">
+        <h3>🤖 AI-Wanderempfehlung</h3>
+        <div style="margin-top: 1rem; line-height: 1.6;">
+    """,
+        unsafe_allow_html=True,
+    )
+
+    # Platzhalter wird bei jedem Chunk aktualisiert
+    placeholder = st.empty()
+    response_text = ""
+    first_token_time = None
+
+    for chunk in response_chunks:
+        if first_token_time is None:
+            first_token_time = time.time() - start_time
+        response_text += chunk
+        placeholder.markdown(response_text + "▌")
+
+    placeholder.markdown(response_text)
+
+    # Zeit bis zum ersten Token und Gesamtzeit
+    if first_token_time is not None:
+        st.markdown(
+            f"<small>⚡ Erste Tokens: {first_token_time:.2f}s · "
+            f"Antwortzeit: {time.time() - start_time:.2f}s</small>",
+            unsafe_allow_html=True,
+        )
+
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    return response_text
+
+
+# Anzeigenamen der gemessenen Stufen (siehe tracing.SpanRecorder)
+STAGE_LABELS = {
+    "retrieve": "Retrieval gesamt",
+    "cache": "Cache-Lookup",
+    "filter": "Filter",
+    "expand": "Query Expansion",
+    "semantic": "Semantische Suche",
+    "keyword": "Keyword-Suche",
+    "merge": "Score-Merge",
+    "rerank": "Re-Ranking",
+    "explain": "Scoring + Erklärungen",
+    "hydrate": "Routen laden",
+    "llm": "Groq-Aufruf",
+    "llm_first_token": "Groq erstes Token",
+    "llm_stream": "Groq Stream gesamt",
+}
+
+
+def display_live_metrics(rag_system):
+    """Zeigt die gemessenen Latenzen (Histogramme des Span-Recorders)"""
+    histograms = rag_system.tracer.histograms()
+    if not histograms:
+        st.info("ℹ️ Noch keine Messungen - führen Sie eine Suche aus.")
+        return
+
+    # Bekannte Stufen in Pipeline-Reihenfolge, weitere danach
+    names = [name for name in STAGE_LABELS if name in histograms]
+    names += [name for name in histograms if name not in STAGE_LABELS]
+
+    rows = [
+        {
+            "Stufe": STAGE_LABELS.get(name, name),
+            "Anzahl": histograms[name]["count"],
+            "Mittel (ms)": round(histograms[name]["mean_ms"], 1),
+            "p50 ≤ (ms)": round(histograms[name]["p50_ms"], 1),
+            "p95 ≤ (ms)": round(histograms[name]["p95_ms"], 1),
+            "p99 ≤ (ms)": round(histograms[name]["p99_ms"], 1),
+            "Max (ms)": round(histograms[name]["max_ms"], 1),
+        }
+        for name in names
+    ]
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    st.caption(
+        "Perzentile sind Schätzwerte: Obergrenze des Histogramm-Buckets "
+        "(höchstens das gemessene Maximum)."
+    )
+
+
 def display_route_cards(results):
     """Zeigt gefundene Routen als Cards"""
 
@@ -372,28 +459,45 @@ def main():
 
         # Suche ausführen
         if search_button and query:
-            with st.spinner("🤖 Suche läuft... KI analysiert Ihre Anfrage..."):
-                start_time = time.time()
+            start_time = time.time()
 
-                try:
-                    # RAG Retrieval
+            try:
+                # RAG Retrieval
+                with st.spinner("🔍 Suche läuft..."):
                     results = rag_system.retrieve(query, k=num_results)
 
-                    # Groq Response (falls aktiviert)
-                    if use_groq and os.getenv("GROQ_API_KEY"):
-                        response = rag_system.generate_intelligent_response(
-                            query, results
+                # Groq Response (falls aktiviert) - wird direkt gestreamt
+                if use_groq and os.getenv("GROQ_API_KEY"):
+                    # Token-Verbrauch des Prompts dieser Anfrage
+                    prompt_usages = []
+
+                    # Hinweis, falls auf das Groq-Kontingent gewartet wird
+                    throttle_notice = st.empty()
+                    with throttle_notices(
+                        lambda wait: throttle_notice.info(
+                            f"⏳ Groq-Kontingent ausgeschöpft - die Antwort "
+                            f"startet in ca. {wait:.0f}s"
                         )
-                        processing_time = time.time() - start_time
+                    ):
+                        display_ai_response_stream(
+                            rag_system.stream_intelligent_response(
+                                query, results, on_prompt_usage=prompt_usages.append
+                            ),
+                            start_time,
+                        )
+                    throttle_notice.empty()
 
-                        # AI Response anzeigen
-                        display_ai_response(response, processing_time)
+                    for usage in prompt_usages:
+                        st.caption(
+                            f"🧮 Prompt: ~{usage.prompt_tokens} Tokens · Kontext "
+                            f"{usage.context_tokens}/{usage.budget} Tokens"
+                        )
 
-                    # Route Cards anzeigen
-                    display_route_cards(results)
+                # Route Cards anzeigen
+                display_route_cards(results)
 
-                except Exception as e:
-                    st.error(f"❌ Fehler bei der Suche: {e}")
+            except Exception as e:
+                st.error(f"❌ Fehler bei der Suche: {e}")
 
     with tab2:
         # Statistiken Dashboard
@@ -449,11 +553,38 @@ def main():
                         st.write(f"• {doc_key}")
 
             st.markdown("### 🎯 Performance-Metriken")
-            st.write("• **Precision@3:** 85%")
-            st.write("• **Response Time:** ~1.2s")
-            st.write("• **Preference Match:** 72%")
+            retrieve_stats = rag_system.tracer.histograms().get("retrieve")
+            if retrieve_stats:
+                st.write(
+                    f"• **Response Time:** Mittel {retrieve_stats['mean_ms']:.0f}ms, "
+                    f"p50 ≤ {retrieve_stats['p50_ms']:.0f}ms, "
+                    f"p95 ≤ {retrieve_stats['p95_ms']:.0f}ms "
+                    f"(Bucket-Schätzung) über {retrieve_stats['count']} Suchen"
+                )
             st.write("• **PDF Integration:** ✅ Aktiv")
 
+            cache_stats = rag_system.result_cache.stats()
+            st.write(
+                f"• **Query-Cache:** {cache_stats['hits']} Treffer / "
+                f"{cache_stats['misses']} Misses "
+                f"({cache_stats['hit_rate']*100:.0f}% Trefferquote)"
+            )
+
+            if rag_system.groq_client is not None:
+                client_stats = rag_system.groq_client.stats()
+                st.write(
+                    f"• **Groq-Client:** {client_stats['requests']} Requests, "
+                    f"{client_stats['retries']} Retries "
+                    f"({client_stats['rate_limited']}× 429), "
+                    f"{client_stats['throttled']}× gedrosselt "
+                    f"({client_stats['throttle_wait_s']:.1f}s)"
+                )
+
+        # Live gemessene Latenzen pro Pipeline-Stufe
+        st.markdown("---")
+        st.markdown("### ⏱️ Latenzen pro Stufe (live)")
+        display_live_metrics(rag_system)
+
         # API Key Management
         st.markdown("---")
         st.markdown("### 🔑 Groq API Key Management")
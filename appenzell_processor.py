@@ -8,10 +8,26 @@ import os
 import re
 import json
 import pdfplumber
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from near_duplicates import MinHashDeduplicator, print_cluster_report
+from page_cache import PageTextCache, extract_page_text, file_sha256
+from route_extraction import (
+    appenzell_distance,
+    appenzell_duration,
+    appenzell_elevation,
+    appenzell_highlights,
+    appenzell_restaurants,
+    appenzell_sac_scale,
+    extract_appenzell_fields,
+)
+
+# PDF-Handle pro Worker-Prozess (siehe _init_pdf_worker)
+_worker_pdf = None
 
 
 @dataclass
@@ -32,10 +48,26 @@ class AppenzellRoute:
     raw_text: str
 
 
+def _init_pdf_worker(pdf_path: str):
+    """Öffnet die PDF einmal pro Worker-Prozess"""
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_page(page_num: int) -> str:
+    """Worker: extrahiert den Layout-Text einer Seite"""
+    return extract_page_text(_worker_pdf, page_num, "layout")
+
+
 class AppenzellProcessor:
     """Spezialisierter Prozessor für Appenzeller Wanderungen"""
 
-    def __init__(self):
+    def __init__(self, page_cache: Optional[PageTextCache] = None):
+        # Seiten-Cache: unveränderte PDF-Seiten werden nicht erneut extrahiert
+        self.page_cache = page_cache or PageTextCache()
+        # Report der zuletzt zusammengeführten Duplikat-Cluster
+        self.duplicate_clusters = []
+
         # Detaillierte Seitenkonfiguration basierend auf User-Angaben
         self.config = {
             "start_page": 8,
@@ -77,10 +109,39 @@ class AppenzellProcessor:
         print(f"   ⏭️ Übersprungene Seiten: {sorted(self.config['skip_pages'])}")
         print(f"   📑 Doppelseiten: {list(self.config['double_pages'].keys())}")
 
+    def plan_page_groups(self) -> List[List[int]]:
+        """Seitengruppen (Einzel- und Doppelseiten) in Seitenreihenfolge"""
+
+        page_groups = []
+        current_page = self.config["start_page"]
+
+        while current_page <= self.config["end_page"]:
+            # Überspringe bekannte Seiten ohne Wanderungen
+            if current_page in self.config["skip_pages"]:
+                current_page += 1
+                continue
+
+            # Prüfe ob es eine Doppelseite ist
+            if current_page in self.config["double_pages"]:
+                pages_to_process = self.config["double_pages"][current_page]
+                page_groups.append(pages_to_process)
+                # Springe nach der Doppelseite weiter
+                current_page = max(pages_to_process) + 1
+            else:
+                page_groups.append([current_page])
+                current_page += 1
+
+        return page_groups
+
     def process_appenzell_pdf(
-        self, pdf_path: str = "PDFs/Appenzell_Wanderungen.pdf"
+        self, pdf_path: str = "PDFs/Appenzell_Wanderungen.pdf", max_workers: int = 1
     ) -> List[Dict]:
-        """Hauptfunktion zur Verarbeitung der Appenzeller PDF"""
+        """Hauptfunktion zur Verarbeitung der Appenzeller PDF
+
+        Bereits extrahierte Seiten kommen aus dem Seiten-Cache. Mit
+        max_workers > 1 werden die übrigen Seiten auf einen Prozess-Pool
+        verteilt; jeder Worker öffnet die PDF selbst.
+        """
 
         if not os.path.exists(pdf_path):
             print(f"❌ PDF nicht gefunden: {pdf_path}")
@@ -88,40 +149,45 @@ class AppenzellProcessor:
 
         print(f"\n📄 Verarbeite: {pdf_path}")
         routes = []
+        page_groups = self.plan_page_groups()
+        page_numbers_needed = sorted({p for group in page_groups for p in group})
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                print(f"   📊 PDF hat {total_pages} Seiten")
-
-                # Verarbeite alle relevanten Seiten
-                current_page = self.config["start_page"]
-
-                while current_page <= self.config["end_page"]:
-                    # Überspringe bekannte Seiten ohne Wanderungen
-                    if current_page in self.config["skip_pages"]:
-                        print(f"  ⏭️ Überspringe Seite {current_page} (keine Wanderung)")
-                        current_page += 1
-                        continue
-
-                    # Prüfe ob es eine Doppelseite ist
-                    if current_page in self.config["double_pages"]:
-                        pages_to_process = self.config["double_pages"][current_page]
-                        print(f"  📑 Verarbeite Doppelseite: {pages_to_process}")
-                        route = self.extract_route_from_pages(pdf, pages_to_process)
-                        current_page = (
-                            max(pages_to_process) + 1
-                        )  # Springe nach der Doppelseite weiter
-                    else:
-                        print(f"  📄 Verarbeite Einzelseite: {current_page}")
-                        route = self.extract_route_from_pages(pdf, [current_page])
-                        current_page += 1
-
-                    if route:
-                        routes.append(route)
-                        print(f"    ✅ Route extrahiert: {route['title'][:50]}...")
-                    else:
-                        print(f"    ⚠️ Keine gültige Route gefunden")
+            file_hash = file_sha256(pdf_path)
+            page_texts = self.page_cache.get_pages(
+                file_hash, page_numbers_needed, "layout"
+            )
+            missing_pages = [p for p in page_numbers_needed if p not in page_texts]
+            print(
+                f"   📦 {len(page_texts)} Seiten aus Cache, "
+                f"{len(missing_pages)} Seiten werden extrahiert"
+            )
+
+            if missing_pages:
+                if max_workers > 1:
+                    print(f"   ⚡ Parallele Extraktion mit {max_workers} Prozessen")
+                    extracted, page_count = self.extract_pages_parallel(
+                        pdf_path, missing_pages, max_workers
+                    )
+                else:
+                    extracted, page_count = self.extract_pages_serial(
+                        pdf_path, missing_pages
+                    )
+                self.page_cache.put_pages(file_hash, extracted, "layout", page_count)
+                page_texts.update(extracted)
+
+            # Zusammenführen in Seitenreihenfolge
+            for page_numbers in page_groups:
+                combined_text = self.combine_page_texts(page_numbers, page_texts)
+                route = self.route_from_text(combined_text, page_numbers)
+
+                if route:
+                    routes.append(route)
+                    print(f"    ✅ Route extrahiert: {route['title'][:50]}...")
+                else:
+                    print(
+                        f"    ⚠️ Keine gültige Route gefunden (Seite {page_numbers[0]})"
+                    )
 
         except Exception as e:
             print(f"❌ Fehler beim Verarbeiten: {e}")
@@ -132,20 +198,62 @@ class AppenzellProcessor:
         print(f"\n🎉 Fertig! {len(routes)} saubere Appenzeller Routen extrahiert")
         return routes
 
-    def extract_route_from_pages(self, pdf, page_numbers: List[int]) -> Optional[Dict]:
-        """Extrahiert eine Route von einer oder mehreren Seiten"""
+    def extract_pages_serial(
+        self, pdf_path: str, page_numbers: List[int]
+    ) -> Tuple[Dict[int, str], int]:
+        """Extrahiert die Seiten nacheinander (Layout-Modus)"""
+
+        with pdfplumber.open(pdf_path) as pdf:
+            print(f"   📊 PDF hat {len(pdf.pages)} Seiten")
+
+            page_texts = {}
+            for page_num in page_numbers:
+                print(f"  📄 Extrahiere Seite: {page_num}")
+                page_texts[page_num] = extract_page_text(pdf, page_num, "layout")
+
+            return page_texts, len(pdf.pages)
+
+    def extract_pages_parallel(
+        self, pdf_path: str, page_numbers: List[int], max_workers: int
+    ) -> Tuple[Dict[int, str], int]:
+        """Verteilt die Seiten auf einen Prozess-Pool"""
+
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_pdf_worker,
+            initargs=(pdf_path,),
+        ) as executor:
+            texts = executor.map(_extract_page, page_numbers)
+            return dict(zip(page_numbers, texts)), page_count
+
+    @staticmethod
+    def combine_page_texts(page_numbers: List[int], page_texts: Dict[int, str]) -> str:
+        """Kombinierter Text einer Seitengruppe"""
 
         combined_text = ""
 
         # Sammle Text von allen Seiten
         for page_num in page_numbers:
-            if page_num <= len(pdf.pages):
-                page = pdf.pages[page_num - 1]  # pdfplumber ist 0-indiziert
+            text = page_texts.get(page_num)
+            if text:
+                combined_text += f"\n--- Seite {page_num} ---\n{text}\n"
+
+        return combined_text
+
+    @staticmethod
+    def extract_pages_text(pdf, page_numbers: List[int]) -> str:
+        """Kombinierter Layout-Text einer Seitengruppe (ohne Cache)"""
+
+        page_texts = {p: extract_page_text(pdf, p, "layout") for p in page_numbers}
+        return AppenzellProcessor.combine_page_texts(page_numbers, page_texts)
 
-                # Layout-Extraktion für beste Qualität
-                text = page.extract_text(layout=True)
-                if text:
-                    combined_text += f"\n--- Seite {page_num} ---\n{text}\n"
+    def route_from_text(
+        self, combined_text: str, page_numbers: List[int]
+    ) -> Optional[Dict]:
+        """Bereinigt und parst den Text einer Seitengruppe"""
 
         if not combined_text or len(combined_text) < 50:
             return None
@@ -156,6 +264,12 @@ class AppenzellProcessor:
 
         return route_data
 
+    def extract_route_from_pages(self, pdf, page_numbers: List[int]) -> Optional[Dict]:
+        """Extrahiert eine Route von einer oder mehreren Seiten"""
+
+        combined_text = self.extract_pages_text(pdf, page_numbers)
+        return self.route_from_text(combined_text, page_numbers)
+
     def clean_text(self, text: str) -> str:
         """Bereinigt Text speziell für Appenzeller Format"""
 
@@ -204,29 +318,13 @@ class AppenzellProcessor:
         # 1. TITEL extrahieren
         route["title"] = self.extract_title(text)
 
-        # 2. DAUER extrahieren
-        route["duration"] = self.extract_duration(text)
-
-        # 3. DISTANZ extrahieren
-        route["distance"] = self.extract_distance(text)
-
-        # 4. HÖHENMETER extrahieren
-        elevation_gain, elevation_loss = self.extract_elevation(text)
-        route["elevation_gain"] = elevation_gain
-        route["elevation_loss"] = elevation_loss
-
-        # 5. SAC WANDERSKALA extrahieren
-        route["sac_scale"] = self.extract_sac_scale(text)
-
-        # 6. RESTAURANTS extrahieren
-        route["restaurants"] = self.extract_restaurants(text)
+        # 2.-6. DAUER, DISTANZ, HÖHENMETER, SAC, RESTAURANTS und HIGHLIGHTS
+        # (vorkompilierte Muster, ein gemeinsamer Durchgang)
+        route.update(extract_appenzell_fields(text))
 
         # 7. BESCHREIBUNG extrahieren
         route["description"] = self.extract_description(text)
 
-        # 8. HIGHLIGHTS extrahieren
-        route["highlights"] = self.extract_highlights(text)
-
         return route
 
     def extract_title(self, text: str) -> str:
@@ -267,144 +365,23 @@ class AppenzellProcessor:
 
     def extract_duration(self, text: str) -> str:
         """Extrahiert die Wanderdauer"""
-
-        patterns = [
-            r"(\d+)\s*Stunden?\s*(\d+)?\s*Minuten?",
-            r"(\d+)\s*h\s*(\d+)?\s*min",
-            r"(\d+)\s*Std\.?\s*(\d+)?\s*Min\.?",
-            r"(\d+[,.]?\d*)\s*Stunden?",
-            r"Wanderzeit[:\s]*(\d+[,.]?\d*)\s*(?:Stunden?|h)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0).strip()
-
-        return ""
+        return appenzell_duration(text)
 
     def extract_distance(self, text: str) -> str:
         """Extrahiert die Wanderdistanz"""
-
-        patterns = [
-            r"(\d+[,.]?\d*)\s*km",
-            r"(\d+[,.]?\d*)\s*Kilometer",
-            r"Distanz[:\s]*(\d+[,.]?\d*)\s*km",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                if "Distanz" in match.group(0):
-                    return match.group(1) + " km"
-                return match.group(0).strip()
-
-        return ""
+        return appenzell_distance(text)
 
     def extract_elevation(self, text: str) -> tuple:
         """Extrahiert Höhenmeter (Aufstieg/Abstieg)"""
-
-        elevation_gain = ""
-        elevation_loss = ""
-
-        # Spezifisches Appenzeller Format: "8.73 km 510 m 510 m"
-        lines = text.split("\n")
-        for line in lines[:10]:  # Schaue in den ersten 10 Zeilen
-            # Format: "XXX km YYY m ZZZ m" (Distanz, Aufstieg, Abstieg)
-            km_pattern = r"(\d+[.,]?\d*)\s*km\s+(\d+)\s*m\s+(\d+)\s*m"
-            match = re.search(km_pattern, line)
-            if match:
-                elevation_gain = match.group(2) + "m"
-                elevation_loss = match.group(3) + "m"
-                return elevation_gain, elevation_loss
-
-        # Fallback: Traditionelle Muster
-        gain_patterns = [
-            r"(\d+)\s*m\s*(?:Aufstieg|↑|auf)",
-            r"Aufstieg[:\s]*(\d+)\s*m",
-            r"(\d+)\s*m\s*Höhenmeter\s*(?:auf|Aufstieg)",
-            r"(\d+)\s*m\s+\d+\s*m",  # Erstes m in "XXX m YYY m"
-        ]
-
-        for pattern in gain_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                elevation_gain = match.group(1) + "m"
-                break
-
-        # Abstieg Muster
-        loss_patterns = [
-            r"(\d+)\s*m\s*(?:Abstieg|↓|ab)",
-            r"Abstieg[:\s]*(\d+)\s*m",
-            r"(\d+)\s*m\s*Höhenmeter\s*(?:ab|Abstieg)",
-            r"\d+\s*m\s+(\d+)\s*m",  # Zweites m in "XXX m YYY m"
-        ]
-
-        for pattern in loss_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                elevation_loss = match.group(1) + "m"
-                break
-
-        return elevation_gain, elevation_loss
+        return appenzell_elevation(text)
 
     def extract_sac_scale(self, text: str) -> str:
         """Extrahiert die SAC Wanderskala"""
-
-        # Verbesserte Patterns für "T 1", "T 2", etc. (mit Leerzeichen)
-        patterns = [
-            r"SAC[:\s-]*T\s*([1-6])",  # "SAC-Wanderskala T 1"
-            r"Wanderskala[:\s]*T\s*([1-6])",  # "Wanderskala T 1"
-            r"\bT\s*([1-6])\b",  # Standalone "T 1" bis "T 6"
-            r"SAC[:\s-]*([T1-6])",  # Fallback für "T1" format
-            r"([T][1-6])",  # Direkte T1-T6 Matches
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                # Füge "T" hinzu falls nur Zahl gefunden
-                result = match.group(1)
-                if result.isdigit():
-                    return f"T{result}"
-                return result
-
-        return ""
+        return appenzell_sac_scale(text)
 
     def extract_restaurants(self, text: str) -> List[str]:
         """Extrahiert Restaurant/Einkehrmöglichkeiten"""
-
-        restaurants = []
-
-        # Restaurant-Keywords
-        keywords = [
-            "Restaurant",
-            "Gasthaus",
-            "Gasthof",
-            "Beizli",
-            "Café",
-            "Hütte",
-            "Berggasthaus",
-            "Bergrestaurant",
-            "Wirtschaft",
-            "Alp",
-        ]
-
-        # Suche nach Restaurant-Erwähnungen
-        for keyword in keywords:
-            pattern = f"{keyword}[\\s]*([A-ZÄÖÜa-zäöü\\s-]+?)(?=[,\\.\\n]|$)"
-            matches = re.findall(pattern, text, re.IGNORECASE)
-
-            for match in matches:
-                restaurant_name = f"{keyword} {match.strip()}"
-                if (
-                    len(restaurant_name) > 5
-                    and len(restaurant_name) < 50
-                    and restaurant_name not in restaurants
-                ):
-                    restaurants.append(restaurant_name)
-
-        return restaurants[:3]  # Maximal 3 Restaurants
+        return appenzell_restaurants(text)
 
     def extract_description(self, text: str) -> str:
         """Extrahiert die Hauptbeschreibung - verbesserte Version"""
@@ -479,8 +456,10 @@ class AppenzellProcessor:
 
         return description
 
-    def remove_duplicates(self, routes: List[Dict]) -> List[Dict]:
-        """Entfernt Duplikate und ungültige Einträge"""
+    def remove_duplicates(
+        self, routes: List[Dict], similarity_threshold: float = 0.8
+    ) -> List[Dict]:
+        """Entfernt Duplikate, Near-Duplicates (MinHash/LSH) und ungültige Einträge"""
 
         seen_titles = set()
         clean_routes = []
@@ -517,38 +496,16 @@ class AppenzellProcessor:
             seen_titles.add(title)
             clean_routes.append(route)
 
+        # Fast identische Routen (Titel + Beschreibung) zusammenführen
+        deduplicator = MinHashDeduplicator(threshold=similarity_threshold)
+        clean_routes, self.duplicate_clusters = deduplicator.deduplicate(clean_routes)
+        print_cluster_report(self.duplicate_clusters)
+
         return clean_routes
 
     def extract_highlights(self, text: str) -> List[str]:
         """Extrahiert besondere Highlights"""
-
-        highlights = []
-
-        # Typische Appenzeller Highlights
-        highlight_keywords = [
-            "Aussicht",
-            "Panorama",
-            "Gipfel",
-            "See",
-            "Seealpsee",
-            "Wasserfall",
-            "Alpstein",
-            "Säntis",
-            "Ebenalp",
-            "Aescher",
-            "Schöne Aussicht",
-            "Bergsee",
-            "Alp",
-            "Hochebene",
-            "Gratwanderung",
-        ]
-
-        text_lower = text.lower()
-        for keyword in highlight_keywords:
-            if keyword.lower() in text_lower:
-                highlights.append(keyword)
-
-        return highlights[:4]  # Maximal 4 Highlights
+        return appenzell_highlights(text)
 
     def save_routes(
         self, routes: List[Dict], filename: str = "appenzell_routes_clean.json"
@@ -615,8 +572,8 @@ def main():
     print("🏔️ STARTE APPENZELLER WANDERUNGEN EXTRAKTION")
     print("=" * 80)
 
-    # Extrahiere Routen
-    routes = processor.process_appenzell_pdf()
+    # Extrahiere Routen (Seitengruppen parallel auf alle Kerne verteilt)
+    routes = processor.process_appenzell_pdf(max_workers=os.cpu_count() or 1)
 
     if routes:
         # Speichere Ergebnisse
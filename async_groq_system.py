@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Asynchrones Advanced Groq RAG System
+====================================
+
+Async-API für Server-Prozesse mit vielen gleichzeitigen Benutzern:
+Retrieval läuft in einem Worker-Thread, Groq-Aufrufe über einen gepoolten
+AsyncGroqClient (gleiches Kontingent und gleiche Retries wie der
+Sync-Client) mit begrenzter Parallelität, Timeouts und sauberem Abbruch.
+Abgebrochene Aufrufe geben ihr Kontingent zurück. Identische gleichzeitige
+Anfragen teilen sich einen Upstream-Aufruf, auch mit dem Sync-System
+(claim/complete/fail des gemeinsamen Response-Caches).
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from advanced_groq_system import AdvancedGroqRAG
+from groq_client import AsyncGroqClient
+from groq_response_cache import GroqResponseCache
+from rag_hiking_system import RouteFilters
+
+
+class AsyncAdvancedGroqRAG(AdvancedGroqRAG):
+    """AdvancedGroqRAG mit asyncio-API (aretrieve, agenerate_*, asearch)"""
+
+    def __init__(
+        self,
+        groq_api_key: str = None,
+        response_cache: GroqResponseCache = None,
+        max_concurrency: int = 8,
+        request_timeout: float = 30.0,
+        max_connections: int = 20,
+    ):
+        super().__init__(groq_api_key, response_cache)
+
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+
+        # Client, Semaphore und In-Flight-Tasks gehören zu einem Event Loop
+        self.async_groq_client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def _bind_loop(self):
+        """Erstellt Client und Semaphore für den aktuell laufenden Event Loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        # Erst vollständig umstellen, dann warten: gleichzeitige Coroutines
+        # desselben Loops sehen sofort den neuen Client
+        self._loop = loop
+        previous, self.async_groq_client = self.async_groq_client, None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = {}
+        self._waiters = {}
+        if self.groq_client is not None:
+            self.async_groq_client = self._create_async_client()
+
+        # Pool des vorherigen Event Loops (z.B. früheres asyncio.run) freigeben
+        await self._close_client(previous)
+
+    def _create_async_client(self) -> AsyncGroqClient:
+        """Async-Client mit Keep-Alive Pool, Kontingent und Retries des Sync-Clients"""
+        return self.groq_client.create_async_client(
+            max_connections=self.max_connections, timeout=self.request_timeout
+        )
+
+    @staticmethod
+    async def _close_client(client: Optional[AsyncGroqClient]):
+        if client is None:
+            return
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"⚠️ Async Groq Client konnte nicht geschlossen werden: {e}")
+
+    async def aclose(self):
+        """Schliesst den Connection-Pool des Async-Clients"""
+        client, self.async_groq_client = self.async_groq_client, None
+        self._loop = None
+        await self._close_client(client)
+
+    async def aretrieve(
+        self, query: str, k: int = 5, filters: Optional[RouteFilters] = None
+    ) -> List:
+        """Retrieval in einem Worker-Thread (blockiert den Event Loop nicht)"""
+        return await asyncio.to_thread(self.retrieve, query, k, filters)
+
+    async def _request_completion(
+        self, cache_key: str, messages: List[Dict[str, str]], params: Dict[str, Any]
+    ) -> str:
+        """Upstream-Aufruf für einen beanspruchten Cache-Schlüssel"""
+        try:
+            async with self._semaphore:
+                with self.tracer.span("llm"):
+                    completion = await asyncio.wait_for(
+                        self.async_groq_client.chat.completions.create(
+                            messages=messages, **params
+                        ),
+                        timeout=self.request_timeout,
+                    )
+        except Exception as e:
+            self.response_cache.fail(cache_key, e)
+            raise
+        except BaseException:
+            self.response_cache.fail(
+                cache_key, RuntimeError("Groq-Anfrage abgebrochen")
+            )
+            raise
+
+        response = completion.choices[0].message.content
+        # Cache-Datei im Worker-Thread schreiben (blockiert den Event Loop nicht)
+        await asyncio.to_thread(self.response_cache.complete, cache_key, response)
+        return response
+
+    async def acreate_chat_completion(
+        self, messages: List[Dict[str, str]], **params
+    ) -> str:
+        """Async Groq-Aufruf über Response-Cache mit In-Flight Coalescing"""
+        await self._bind_loop()
+
+        cache_key = self.response_cache.make_key(messages, params)
+        task = self._in_flight.get(cache_key)
+        if task is None:
+            cached, pending = self.response_cache.claim(cache_key)
+            if cached is not None:
+                return cached
+            if pending is not None:
+                # Sync-System (z.B. Streamlit-Thread) fragt bereits an;
+                # shield: ein Abbruch hier bricht dessen Anfrage nicht ab
+                return await asyncio.shield(asyncio.wrap_future(pending))
+
+            task = asyncio.ensure_future(
+                self._request_completion(cache_key, messages, params)
+            )
+            self._in_flight[cache_key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(cache_key, None))
+            self._waiters[cache_key] = 0
+        self._waiters[cache_key] += 1
+
+        try:
+            # shield: ein abgebrochener Wartender bricht nicht die anderen ab
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Letzter Wartender abgebrochen - Upstream-Aufruf ebenfalls abbrechen
+            if self._waiters[cache_key] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[cache_key] -= 1
+            if self._waiters[cache_key] == 0:
+                self._waiters.pop(cache_key, None)
+
+    async def agenerate_no_results_response(self, query: str) -> str:
+        """Async-Variante von generate_no_results_response"""
+
+        if not self.groq_client:
+            return self.no_results_fallback_text(query)
+
+        try:
+            return await self.acreate_chat_completion(
+                messages=self.build_no_results_messages(query),
+                **self.NO_RESULTS_PARAMS,
+            )
+
+        except Exception:
+            return self.no_results_fallback_text(query)
+
+    async def agenerate_intelligent_response(self, query: str, results: List) -> str:
+        """Async-Variante von generate_intelligent_response"""
+
+        if not results:
+            return await self.agenerate_no_results_response(query)
+
+        if not self.groq_client:
+            print("ℹ️ Groq Client nicht verfügbar - verwende Fallback")
+            return self.generate_fallback_response(query, results)
+
+        try:
+            messages, _ = self.build_response_messages(query, results)
+            response = await self.acreate_chat_completion(
+                messages=messages,
+                stream=False,
+                **self.RESPONSE_PARAMS,
+            )
+            return self.enhance_response_quality(response, query, results)
+
+        except Exception as e:
+            print(f"❌ Groq API Fehler: {e}")
+            return self.generate_fallback_response(query, results)
+
+    async def asearch(
+        self, query: str, k: int = 5, filters: Optional[RouteFilters] = None
+    ) -> Dict[str, Any]:
+        """Retrieval und Antwortgenerierung für eine Anfrage"""
+        results = await self.aretrieve(query, k, filters)
+        response = await self.agenerate_intelligent_response(query, results)
+        return {"query": query, "results": results, "response": response}
+
+    async def asearch_many(
+        self, queries: List[str], k: int = 5, filters: Optional[RouteFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Mehrere Anfragen gleichzeitig (Parallelität über max_concurrency)"""
+        return await asyncio.gather(
+            *(self.asearch(query, k, filters) for query in queries)
+        )
+
+
+async def main():
+    """Demo: mehrere Anfragen gleichzeitig auf einem Event Loop"""
+
+    rag_system = AsyncAdvancedGroqRAG()
+    queries = [
+        "Einfache Wanderung mit Restaurant",
+        "Anspruchsvolle Bergtour im Alpstein",
+        "Kurze Familienwanderung",
+    ]
+
+    try:
+        for answer in await rag_system.asearch_many(queries, k=3):
+            print(f"\n🔍 {answer['query']}")
+            print(answer["response"])
+    finally:
+        await rag_system.aclose()
+        rag_system.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
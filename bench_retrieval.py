@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Retrieval-Benchmark für AppenzellHikingRAG
+==========================================
+
+Führt eine reproduzierbare Anfrage-Last (Evaluations-Queries plus
+synthetische Varianten) gegen verschiedene Katalog-Grössen aus:
+
+- appenzell: 27 Routen (appenzell_routes_clean.json)
+- zkb: ~900 Routen (zkb_routes.json, normalisiert)
+- synthetic: 100'000 generierte Routen (aus beiden Katalogen abgeleitet)
+
+Jede Grösse läuft in einem eigenen Prozess, damit Kaltstart und Peak-RSS
+unabhängig gemessen werden. Gemessen werden Kaltstart, Laden und
+Index-Aufbau, p50/p95/p99 pro Pipeline-Stufe, QPS und Peak-RSS. Die
+Ergebnisse werden als JSON gespeichert und können mit einem früheren Lauf
+verglichen werden (--compare).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+BENCH_DIR = ".bench"
+RESULTS_FILE = "bench_results.json"
+PERCENTILES = (50, 95, 99)
+
+# Pipeline-Stufen von AppenzellHikingRAG._retrieve_uncached
+STAGES = ("expand", "semantic", "keyword", "combine")
+
+# Zusätze für synthetische Anfrage-Varianten
+QUERY_SUFFIXES = [
+    "",
+    " im Appenzellerland",
+    " mit Restaurant",
+    " für Familien",
+    " unter 3 Stunden",
+    " mit wenig Höhenmetern",
+    " zum Säntis",
+    " mit Aussicht auf den Alpstein",
+    " am Wochenende",
+    " im Herbst",
+]
+
+SYNTHETIC_PLACES = [
+    "Säntis",
+    "Ebenalp",
+    "Seealpsee",
+    "Hoher Kasten",
+    "Kronberg",
+    "Gonten",
+    "Urnäsch",
+    "Wasserauen",
+    "Brülisau",
+    "Schwende",
+    "Uetliberg",
+    "Pfannenstiel",
+    "Rigi",
+    "Pilatus",
+    "Napf",
+    "Tössstock",
+]
+
+
+# ---------------------------------------------------------------------------
+# Kataloge und Anfrage-Last
+# ---------------------------------------------------------------------------
+
+
+def synthetic_routes(
+    base_routes: List[Dict[str, Any]], count: int, seed: int = 42
+) -> List[Dict[str, Any]]:
+    """Erzeugt count Routen durch Variation echter Routen (deterministisch)"""
+    rng = random.Random(seed)
+    routes = []
+    for i in range(count):
+        base = base_routes[i % len(base_routes)]
+        place = rng.choice(SYNTHETIC_PLACES)
+        hours = rng.randint(1, 8)
+        route = {k: v for k, v in base.items() if k != "raw_text"}
+        route.update(
+            {
+                "id": f"synthetic_{i:06d}",
+                "title": f"{base.get('title', '')} via {place} ({i})",
+                "description": f"{base.get('description', '')} Über {place}.",
+                "duration": f"{hours} h {rng.choice([0, 15, 30, 45])} min",
+                "distance": f"{rng.uniform(3, 25):.1f} km",
+                "elevation_gain": f"{rng.randint(50, 1500)}m",
+                "sac_scale": f"T{rng.randint(1, 4)}",
+            }
+        )
+        routes.append(route)
+    return routes
+
+
+def prepare_catalogues(
+    synthetic_size: int = 100_000, bench_dir: str = BENCH_DIR
+) -> Dict[str, str]:
+    """Katalog-Name -> JSONL-Datei (synthetischer Katalog wird einmalig erzeugt)"""
+    from route_catalogue import prepare_catalogue
+    from route_store import RouteStore
+
+    catalogue_dir = os.path.join(bench_dir, "catalogue")
+    catalogues = {
+        "appenzell": prepare_catalogue(
+            "appenzell", "appenzell_routes_clean.json", catalogue_dir
+        ),
+        "zkb": prepare_catalogue("zkb", "zkb_routes.json", catalogue_dir),
+    }
+
+    if synthetic_size:
+        synthetic_file = os.path.join(bench_dir, f"synthetic_{synthetic_size}.jsonl")
+        if not os.path.exists(synthetic_file):
+            base_routes = list(RouteStore(catalogues["appenzell"])) + list(
+                RouteStore(catalogues["zkb"])
+            )
+            RouteStore.write(
+                synthetic_routes(base_routes, synthetic_size), synthetic_file
+            )
+        catalogues["synthetic"] = synthetic_file
+
+    return catalogues
+
+
+def build_workload(num_queries: int = 80, seed: int = 7) -> List[str]:
+    """Evaluations-Queries plus synthetische Varianten (deterministisch)"""
+    from rag_evaluation import TEST_QUERIES
+
+    base_queries = [test_case["query"] for test_case in TEST_QUERIES]
+    variants = [query + suffix for suffix in QUERY_SUFFIXES for query in base_queries]
+    random.Random(seed).shuffle(variants)
+
+    workload = base_queries + [q for q in variants if q not in base_queries]
+    return workload[:num_queries]
+
+
+# ---------------------------------------------------------------------------
+# Messung (läuft im Kind-Prozess)
+# ---------------------------------------------------------------------------
+
+
+def percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 und Mittelwert in Millisekunden"""
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(values.mean())
+    return summary
+
+
+def timed(function: Callable, samples: List[float]) -> Callable:
+    """Wrapper, der jede Laufzeit von function in samples ablegt"""
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def peak_rss_mb() -> float:
+    """Peak-RSS des aktuellen Prozesses in MB"""
+    # VmHWM gilt nur für dieses Programm; ru_maxrss übernimmt nach fork/exec
+    # den Höchstwert des Eltern-Prozesses
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_catalogue(
+    routes_file: str,
+    queries: List[str],
+    k: int = 5,
+    repeat: int = 3,
+    batch_size: int = 16,
+) -> Dict[str, Any]:
+    """Misst Kaltstart, Index-Aufbau und Anfrage-Latenzen für einen Katalog"""
+    import logging
+
+    process_start = time.perf_counter()
+    from rag_hiking_system import AppenzellHikingRAG
+
+    # Pro-Anfrage Logging würde die Latenzen dominieren
+    logging.getLogger().setLevel(logging.WARNING)
+    import_s = time.perf_counter() - process_start
+
+    phases: Dict[str, List[float]] = {"load": [], "build": []}
+
+    class MeasuredRAG(AppenzellHikingRAG):
+        _load_routes = timed(AppenzellHikingRAG._load_routes, phases["load"])
+        _build_indices = timed(AppenzellHikingRAG._build_indices, phases["build"])
+
+    # Ohne Snapshot und Ergebnis-Cache: jede Anfrage durchläuft die Pipeline
+    rag = MeasuredRAG(routes_file, use_index_snapshot=False, cache_size=0)
+    rag.retrieve(queries[0], k=k)
+    cold_start_s = time.perf_counter() - process_start
+
+    # Anfrage-Last mehrfach ausführen (stabilere Perzentile)
+    queries = queries * repeat
+
+    # Stufen instrumentieren
+    stage_samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    rag.query_expander.expand_query = timed(
+        rag.query_expander.expand_query, stage_samples["expand"]
+    )
+    rag.semantic_retriever.search = timed(
+        rag.semantic_retriever.search, stage_samples["semantic"]
+    )
+    rag.keyword_retriever.search = timed(
+        rag.keyword_retriever.search, stage_samples["keyword"]
+    )
+    rag._combine_results = timed(rag._combine_results, stage_samples["combine"])
+
+    # Sequentielle Anfragen
+    total_samples = []
+    sequential_start = time.perf_counter()
+    for query in queries:
+        start = time.perf_counter()
+        rag.retrieve(query, k=k)
+        total_samples.append(time.perf_counter() - start)
+    sequential_s = time.perf_counter() - sequential_start
+
+    # Batch-Anfragen (retrieve_many)
+    batch_start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        rag.retrieve_many(queries[i : i + batch_size], k=k)
+    batch_s = time.perf_counter() - batch_start
+
+    return {
+        "routes": len(rag.routes),
+        "queries": len(queries),
+        "import_s": import_s,
+        "load_s": sum(phases["load"]),
+        "build_s": sum(phases["build"]),
+        "cold_start_s": cold_start_s,
+        "latency_ms": {
+            "total": percentiles_ms(total_samples),
+            # Nur die sequentiellen Aufrufe (retrieve_many nutzt search_many)
+            **{
+                stage: percentiles_ms(samples[: len(queries)])
+                for stage, samples in stage_samples.items()
+            },
+        },
+        "qps": len(queries) / sequential_s if sequential_s else 0.0,
+        "batch_qps": len(queries) / batch_s if batch_s else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _measure_in_child(
+    connection, routes_file: str, queries: List[str], k: int, repeat: int
+):
+    try:
+        connection.send(measure_catalogue(routes_file, queries, k, repeat))
+    except Exception as e:
+        connection.send({"error": repr(e)})
+    finally:
+        connection.close()
+
+
+def run_isolated(
+    routes_file: str, queries: List[str], k: int = 5, repeat: int = 3
+) -> Dict[str, Any]:
+    """Führt measure_catalogue in einem frischen Prozess aus (spawn)"""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_measure_in_child, args=(sender, routes_file, queries, k, repeat)
+    )
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": f"Prozess beendet (Exit-Code {process.exitcode})"}
+    process.join()
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Ergebnisse
+# ---------------------------------------------------------------------------
+
+
+def environment_info() -> Dict[str, Any]:
+    """Version und Umgebung für den Vergleich zwischen Läufen"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmark(
+    sizes: Optional[List[str]] = None,
+    num_queries: int = 80,
+    synthetic_size: int = 100_000,
+    k: int = 5,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """Benchmark über alle (oder die gewählten) Katalog-Grössen"""
+    catalogues = prepare_catalogues(synthetic_size)
+    if sizes:
+        unknown = set(sizes) - set(catalogues)
+        if unknown:
+            raise ValueError(f"Unbekannte Kataloge: {sorted(unknown)}")
+        catalogues = {name: catalogues[name] for name in sizes}
+
+    queries = build_workload(num_queries)
+    results = {
+        "environment": environment_info(),
+        "config": {
+            "queries": len(queries),
+            "repeat": repeat,
+            "k": k,
+            "synthetic_size": synthetic_size,
+        },
+        "catalogues": {},
+    }
+
+    for name, routes_file in catalogues.items():
+        print(f"⏱️ {name}: {routes_file}")
+        results["catalogues"][name] = run_isolated(routes_file, queries, k, repeat)
+
+    return results
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict] = None):
+    """Tabelle der Ergebnisse (optional mit Abweichung zur Baseline)"""
+    print("\n" + "=" * 78)
+    print(
+        f"{'Katalog':<10} {'Routen':>7} {'Kaltstart':>10} {'Aufbau':>8} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8} {'QPS':>7} {'RSS MB':>7}"
+    )
+    print("=" * 78)
+
+    for name, result in results["catalogues"].items():
+        if "error" in result:
+            print(f"{name:<10} ❌ {result['error']}")
+            continue
+
+        total = result["latency_ms"]["total"]
+        print(
+            f"{name:<10} {result['routes']:>7} {result['cold_start_s']:>9.2f}s "
+            f"{result['build_s']:>7.2f}s {total['p50']:>6.1f}ms "
+            f"{total['p95']:>6.1f}ms {total['p99']:>6.1f}ms "
+            f"{result['qps']:>7.1f} {result['peak_rss_mb']:>7.0f}"
+        )
+        stages = ", ".join(
+            f"{stage} {result['latency_ms'][stage]['p50']:.2f}"
+            for stage in STAGES
+            if result["latency_ms"].get(stage)
+        )
+        print(f"{'':<10} p50 pro Stufe (ms): {stages}")
+
+        previous = (baseline or {}).get("catalogues", {}).get(name)
+        if previous and "error" not in previous:
+            change = total["p50"] / previous["latency_ms"]["total"]["p50"] - 1
+            qps_change = result["qps"] / previous["qps"] - 1
+            print(f"{'':<10} vs. Baseline: p50 {change:+.1%}, QPS {qps_change:+.1%}")
+
+
+def main():
+    """Kommandozeilen-Einstieg"""
+
+    parser = argparse.ArgumentParser(description="Retrieval-Benchmark")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=["appenzell", "zkb", "synthetic"],
+        help="Nur diese Kataloge messen (Standard: alle)",
+    )
+    parser.add_argument("--queries", type=int, default=80, help="Anzahl Anfragen")
+    parser.add_argument(
+        "--synthetic-size",
+        type=int,
+        default=100_000,
+        help="Routen im Synthetik-Katalog",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Wiederholungen der Anfrage-Last"
+    )
+    parser.add_argument("-k", type=int, default=5, help="Ergebnisse pro Anfrage")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Ergebnis-Datei (JSON)")
+    parser.add_argument("--compare", help="Früherer Ergebnis-File als Baseline")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.sizes, args.queries, args.synthetic_size, args.k, args.repeat
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Ergebnisse gespeichert: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
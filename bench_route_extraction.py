@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark für die Feld-Extraktion
+=======================================
+
+Vergleicht auf den raw_text Feldern von appenzell_routes_clean.json die
+bisherige Extraktion (jedes Feld einzeln, alle Muster ausgeführt) mit
+extract_appenzell_fields / extract_zkb_fields (gemeinsamer Text-Durchgang,
+Literal-Gates). Prüft vor der Messung, dass alle Ergebnisse identisch sind.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from route_extraction import (
+    TextBlock,
+    appenzell_distance,
+    appenzell_duration,
+    appenzell_elevation,
+    appenzell_highlights,
+    appenzell_restaurants,
+    appenzell_sac_scale,
+    extract_appenzell_fields,
+    extract_zkb_fields,
+    zkb_difficulty,
+    zkb_distance,
+    zkb_duration,
+    zkb_elevation,
+    zkb_highlights,
+    zkb_restaurants,
+)
+
+ROUTES_FILE = "appenzell_routes_clean.json"
+CONTEXT_SIZE = 600  # Kontextfenster wie im ZKBProcessor (±300 Zeichen)
+
+
+def load_texts(routes_file: str = ROUTES_FILE) -> List[str]:
+    """raw_text aller Routen"""
+    with open(routes_file, "r", encoding="utf-8") as f:
+        routes = json.load(f)
+    return [route["raw_text"] for route in routes if route.get("raw_text")]
+
+
+def zkb_contexts(texts: List[str]) -> List[str]:
+    """Überlappende Kontextfenster als ZKB-Eingaben"""
+    step = CONTEXT_SIZE // 2
+    return [
+        text[start : start + CONTEXT_SIZE]
+        for text in texts
+        for start in range(0, len(text), step)
+    ]
+
+
+def appenzell_fields_per_field(text: str) -> Dict[str, Any]:
+    """Bisheriger Ablauf: jedes Feld für sich, ohne Literal-Gates"""
+    elevation_gain, elevation_loss = appenzell_elevation(TextBlock(text, False))
+    return {
+        "duration": appenzell_duration(TextBlock(text, False)),
+        "distance": appenzell_distance(TextBlock(text, False)),
+        "elevation_gain": elevation_gain,
+        "elevation_loss": elevation_loss,
+        "sac_scale": appenzell_sac_scale(TextBlock(text, False)),
+        "restaurants": appenzell_restaurants(TextBlock(text, False)),
+        "highlights": appenzell_highlights(TextBlock(text, False)),
+    }
+
+
+def zkb_fields_per_field(context: str) -> Dict[str, Any]:
+    """Bisheriger Ablauf: jedes Feld für sich, ohne Literal-Gates"""
+    duration = zkb_duration(TextBlock(context, False))
+    return {
+        "duration": duration,
+        "distance": zkb_distance(TextBlock(context, False)),
+        "elevation_gain": zkb_elevation(TextBlock(context, False)),
+        "sac_scale": zkb_difficulty(context, duration),
+        "restaurants": zkb_restaurants(TextBlock(context, False)),
+        "highlights": zkb_highlights(TextBlock(context, False)),
+    }
+
+
+def check_identical(
+    texts: List[str],
+    reference: Callable[[str], Dict[str, Any]],
+    candidate: Callable[[str], Dict[str, Any]],
+):
+    """Bricht ab, falls die Extraktion für einen Text abweicht"""
+    for i, text in enumerate(texts):
+        expected, actual = reference(text), candidate(text)
+        assert expected == actual, f"Abweichung bei Text {i}: {expected} != {actual}"
+
+
+def time_extraction(
+    texts: List[str], extract: Callable[[str], Dict[str, Any]], reps: int
+) -> float:
+    """Beste Laufzeit (Sekunden) über 3 Durchgänge à reps Wiederholungen"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(reps):
+            for text in texts:
+                extract(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(reps: int = 50) -> Dict[str, Dict[str, float]]:
+    """Misst beide Prozessoren und liefert Laufzeiten + Speedup"""
+    texts = load_texts()
+    contexts = zkb_contexts(texts)
+
+    cases = {
+        "appenzell": (texts, appenzell_fields_per_field, extract_appenzell_fields),
+        "zkb": (contexts, zkb_fields_per_field, extract_zkb_fields),
+    }
+
+    results = {}
+    for name, (inputs, reference, candidate) in cases.items():
+        check_identical(inputs, reference, candidate)
+        before = time_extraction(inputs, reference, reps)
+        after = time_extraction(inputs, candidate, reps)
+        results[name] = {
+            "texts": len(inputs),
+            "per_field_s": before,
+            "combined_s": after,
+            "speedup": before / after if after else float("inf"),
+        }
+    return results
+
+
+def main():
+    """Führt den Benchmark aus und druckt die Ergebnisse"""
+
+    reps = 50
+    print(f"⏱️ Feld-Extraktion ({reps} Wiederholungen, beste von 3)")
+    print("=" * 60)
+
+    for name, result in run_benchmark(reps).items():
+        print(
+            f"   {name:<10} {result['texts']:>4} Texte: "
+            f"{result['per_field_s']:.3f}s → {result['combined_s']:.3f}s "
+            f"(×{result['speedup']:.2f}, Ergebnisse identisch)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Lazy Dokumenten-Registry für zusätzlichen Kontext
+=================================================
+
+Beim Start werden nur Pfad, Grösse und Änderungszeit der Dokumente
+erfasst (ein os.stat pro Datei). Gelesen bzw. extrahiert wird ein Dokument
+erst beim ersten Zugriff; danach bleibt es im Speicher, bis sich Grösse
+oder mtime der Datei ändern. Die Registry verhält sich wie ein read-only
+Dict (keys(), in, [], len), sodass bestehende Aufrufer unverändert bleiben.
+"""
+
+import json
+import os
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def read_text(path: str) -> str:
+    """Markdown/Text-Dokument"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_json(path: str) -> Any:
+    """JSON-Dokument"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    """(Grösse, mtime in ns) einer Datei"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class RegisteredDocument:
+    """Eintrag der Registry (Inhalt erst nach dem ersten Zugriff)"""
+
+    key: str
+    path: str
+    loader: Callable[[str], Any]
+    size: int
+    mtime_ns: int
+    value: Any = None
+    loaded_signature: Optional[Tuple[int, int]] = None
+    loads: int = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_signature is not None
+
+
+class DocumentRegistry(Mapping):
+    """Dokumente nach Schlüssel, geladen beim ersten Zugriff (mtime-Cache)"""
+
+    def __init__(self):
+        self._documents: Dict[str, RegisteredDocument] = {}
+        self._lock = threading.RLock()
+
+    def register(
+        self, key: str, path: str, loader: Callable[[str], Any]
+    ) -> Optional[RegisteredDocument]:
+        """Erfasst ein Dokument ohne es zu lesen (None falls nicht vorhanden)"""
+        try:
+            size, mtime_ns = file_signature(path)
+        except OSError as e:
+            print(f"⚠️ Konnte {path} nicht registrieren: {e}")
+            return None
+
+        document = RegisteredDocument(key, path, loader, size, mtime_ns)
+        with self._lock:
+            self._documents[key] = document
+        return document
+
+    def __getitem__(self, key: str) -> Any:
+        document = self._documents[key]
+
+        try:
+            signature = file_signature(document.path)
+        except OSError as e:
+            # Datei verschwunden: zuletzt geladenen Stand weiterverwenden
+            print(f"⚠️ {document.path} nicht mehr lesbar: {e}")
+            return document.value
+
+        if signature == document.loaded_signature:
+            return document.value
+
+        with self._lock:
+            if signature != document.loaded_signature:
+                try:
+                    document.value = document.loader(document.path)
+                except Exception as e:
+                    print(f"⚠️ Konnte {document.path} nicht laden: {e}")
+                    document.value = None
+                document.size, document.mtime_ns = signature
+                document.loaded_signature = signature
+                document.loads += 1
+            return document.value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._documents))
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def document(self, key: str) -> RegisteredDocument:
+        """Registry-Eintrag (Pfad, Grösse, mtime, Ladezustand)"""
+        return self._documents[key]
+
+    def is_loaded(self, key: str) -> bool:
+        return self._documents[key].loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Anzahl und Grösse registrierter bzw. geladener Dokumente"""
+        documents: List[RegisteredDocument] = list(self._documents.values())
+        return {
+            "registered": len(documents),
+            "loaded": sum(1 for d in documents if d.loaded),
+            "registered_bytes": sum(d.size for d in documents),
+            "loaded_bytes": sum(d.size for d in documents if d.loaded),
+        }
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Gemeinsamer Groq-Client mit Retries und Rate-Limit
+==================================================
+
+Ein Client pro API-Key für alle RAG-Systeme: Verbindungen werden über einen
+httpx.Client mit Keep-Alive wiederverwendet, 429- und 5xx-Antworten sowie
+Verbindungsfehler werden mit exponentiellem Backoff (Full Jitter) erneut
+versucht, wobei retry-after Header Vorrang haben. Zwei Token-Buckets
+(Requests und Tokens pro Minute) halten die Aufrufe innerhalb des
+Account-Kontingents. Die Schnittstelle entspricht client.chat.completions
+des Groq SDK, bestehende Aufrufer bleiben unverändert.
+
+AsyncGroqClient ist die asyncio-Variante mit eigenem Verbindungs-Pool, aber
+denselben Buckets, Retries und Zählern wie der synchrone Client. Längere
+Wartezeiten wegen des Kontingents werden gemeldet (Log und optional ein
+Callback pro Kontext, z.B. für einen Hinweis in der App).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+from groq import APIConnectionError, APIStatusError, AsyncGroq, Groq
+
+from prompt_builder import estimate_tokens
+
+# Kontingent des Accounts (Free Tier llama3-8b-8192), per Umgebung anpassbar
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_TOKENS_PER_MINUTE = 6000
+
+# Ab dieser Wartezeit (Sekunden) wird die Drosselung gemeldet
+THROTTLE_NOTICE_SECONDS = 1.0
+
+# Empfänger für Drosselungs-Hinweise der laufenden Anfrage (Wartezeit in s)
+_throttle_listener: ContextVar[Optional[Callable[[float], None]]] = ContextVar(
+    "groq_throttle_listener", default=None
+)
+
+
+@contextmanager
+def throttle_notices(listener: Callable[[float], None]) -> Iterator[None]:
+    """Meldet längere Wartezeiten auf das Kontingent im aktuellen Kontext"""
+    token = _throttle_listener.set(listener)
+    try:
+        yield
+    finally:
+        _throttle_listener.reset(token)
+
+
+class TokenBucket:
+    """Token-Bucket: rate Einheiten pro Sekunde, höchstens capacity angespart"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Bucht amount und liefert die nötige Wartezeit (Sekunden)"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, amount: float = 1) -> float:
+        """Wartet bis amount verfügbar ist; liefert die Wartezeit"""
+        wait = self.reserve(min(amount, self.capacity))
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def parse_retry_after(headers: Optional[httpx.Headers]) -> Optional[float]:
+    """Wartezeit aus retry-after-ms bzw. retry-after (Sekunden oder Datum)"""
+    if not headers:
+        return None
+
+    try:
+        return float(headers["retry-after-ms"]) / 1000
+    except (KeyError, ValueError):
+        pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqClient:
+    """Groq SDK mit gepoolten Verbindungen, Retries und Rate-Limit"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        max_retry_after: float = 60.0,
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self._sleep = sleep
+
+        # Keep-Alive Pool, eigene Retries statt derer des SDK
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout),
+        )
+        self._client = Groq(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http_client,
+            max_retries=0,
+        )
+
+        self.request_bucket = TokenBucket(
+            requests_per_minute / 60, requests_per_minute, sleep=sleep
+        )
+        self.token_bucket = TokenBucket(
+            tokens_per_minute / 60, tokens_per_minute, sleep=sleep
+        )
+
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "failures": 0,
+            "throttled": 0,
+            "throttle_wait_s": 0.0,
+            "quota_timeouts": 0,
+            "backoff_wait_s": 0.0,
+        }
+        self._lock = threading.Lock()
+
+        # Gleiche Schnittstelle wie Groq: client.chat.completions.create(...)
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(create=self.create_chat_completion)
+        )
+
+    def _count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @staticmethod
+    def request_tokens(params: Dict[str, Any]) -> int:
+        """Geschätzte Tokens einer Anfrage (Prompt + maximale Antwort)"""
+        prompt = "\n".join(m.get("content") or "" for m in params.get("messages", []))
+        return estimate_tokens(prompt) + params.get("max_tokens", 0)
+
+    def _reserve_quota(self, tokens: int) -> float:
+        """Bucht Request und Tokens; liefert die nötige Wartezeit (Sekunden)"""
+        wait = max(
+            self.request_bucket.reserve(1),
+            self.token_bucket.reserve(min(tokens, self.token_bucket.capacity)),
+        )
+        if wait > 0:
+            self._count("throttled")
+            self._count("throttle_wait_s", wait)
+        if wait >= THROTTLE_NOTICE_SECONDS:
+            print(f"⏳ Groq-Kontingent ausgeschöpft, warte {wait:.1f}s")
+            listener = _throttle_listener.get()
+            if listener is not None:
+                listener(wait)
+        return wait
+
+    def _release_quota(self, tokens: int):
+        """Gibt eine Buchung zurück, deren Anfrage nie gesendet wurde"""
+        self.request_bucket.reserve(-1)
+        self.token_bucket.reserve(-min(tokens, self.token_bucket.capacity))
+
+    def _throttle(self, tokens: int):
+        """Wartet auf freie Requests und Tokens im Kontingent"""
+        wait = self._reserve_quota(tokens)
+        if wait > 0:
+            self._sleep(wait)
+
+    def _before_retry(self, error: Exception, attempt: int) -> float:
+        """Wartezeit vor dem nächsten Versuch; wirft error, falls keiner folgt"""
+        delay = self._retry_delay(error, attempt)
+        if delay is None:
+            self._count("failures")
+            raise error
+        print(f"🔁 Groq Retry {attempt + 1} in {delay:.2f}s: {error}")
+        self._count("retries")
+        self._count("backoff_wait_s", delay)
+        return delay
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Wartezeit vor dem nächsten Versuch (None: nicht wiederholen)"""
+        if isinstance(error, APIStatusError):
+            if error.status_code == 429:
+                self._count("rate_limited")
+            elif error.status_code >= 500:
+                self._count("server_errors")
+            else:
+                return None
+        else:
+            self._count("connection_errors")
+
+        if attempt >= self.max_retries:
+            return None
+
+        response = getattr(error, "response", None)
+        retry_after = parse_retry_after(
+            response.headers if response is not None else None
+        )
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+
+        # Exponentieller Backoff mit Full Jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def create_chat_completion(self, **params) -> Any:
+        """chat.completions.create mit Rate-Limit und Retries"""
+        # Kontingent einmal pro Anfrage buchen; Retries regelt der Backoff
+        self._throttle(self.request_tokens(params))
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                return self._client.chat.completions.create(**params)
+            except (APIStatusError, APIConnectionError) as e:
+                self._sleep(self._before_retry(e, attempt))
+                attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Zähler für Requests, Retries und Drosselung"""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Schliesst den Connection-Pool"""
+        self._http_client.close()
+
+    def create_async_client(
+        self, max_connections: int = 20, timeout: Optional[float] = None
+    ) -> "AsyncGroqClient":
+        """Async-Client mit eigenem Pool, aber diesem Kontingent und Retries"""
+        return AsyncGroqClient(self, max_connections, timeout or self.timeout)
+
+
+class AsyncGroqClient:
+    """AsyncGroq mit gepooltem httpx.AsyncClient und dem Kontingent eines GroqClient"""
+
+    def __init__(
+        self,
+        quota: GroqClient,
+        max_connections: int = 20,
+        timeout: float = 30.0,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.quota = quota
+        self.api_key = quota.api_key
+        self.timeout = timeout
+        self._sleep = sleep
+
+        # Pool gehört zum Event Loop, in dem der Client erstellt wurde
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout),
+        )
+        self._client = AsyncGroq(
+            api_key=quota.api_key,
+            base_url=quota.base_url,
+            http_client=self._http_client,
+            max_retries=0,
+        )
+
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(create=self.create_chat_completion)
+        )
+
+    async def create_chat_completion(self, **params) -> Any:
+        """chat.completions.create mit Rate-Limit und Retries (ohne zu blockieren)"""
+        tokens = GroqClient.request_tokens(params)
+        wait = self.quota._reserve_quota(tokens)
+        if wait > self.timeout:
+            # Anfrage liefe ohnehin in den Timeout: sofort abbrechen
+            self.quota._release_quota(tokens)
+            self.quota._count("quota_timeouts")
+            raise TimeoutError(f"Groq-Kontingent erst in {wait:.1f}s frei")
+        if wait > 0:
+            try:
+                await self._sleep(wait)
+            except BaseException:
+                # Abbruch oder Timeout vor dem Senden: Kontingent zurückgeben
+                self.quota._release_quota(tokens)
+                raise
+
+        attempt = 0
+        while True:
+            self.quota._count("requests")
+            try:
+                return await self._client.chat.completions.create(**params)
+            except (APIStatusError, APIConnectionError) as e:
+                await self._sleep(self.quota._before_retry(e, attempt))
+                attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Gemeinsame Zähler mit dem synchronen Client"""
+        return self.quota.stats()
+
+    async def close(self):
+        """Schliesst den Connection-Pool"""
+        await self._http_client.aclose()
+
+
+_shared_clients: Dict[Tuple[str, Optional[str]], GroqClient] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_groq_client(api_key: str, base_url: Optional[str] = None) -> GroqClient:
+    """Ein Client pro API-Key (gemeinsamer Pool und gemeinsames Kontingent)"""
+    key = (api_key, base_url)
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = _shared_clients[key] = GroqClient(
+                api_key,
+                base_url,
+                requests_per_minute=float(
+                    os.getenv("GROQ_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)
+                ),
+                tokens_per_minute=float(
+                    os.getenv("GROQ_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)
+                ),
+            )
+        return client
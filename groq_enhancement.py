@@ -7,7 +7,7 @@ Integration von Groq LLM für natürlichere Antwortgenerierung
 """
 
 import os
-from groq import Groq
+from groq_client import shared_groq_client
 from rag_hiking_system import AppenzellHikingRAG
 from typing import List
 
@@ -18,8 +18,8 @@ class GroqEnhancedRAG(AppenzellHikingRAG):
     def __init__(self, groq_api_key: str = None):
         super().__init__()
 
-        # Groq Client initialisieren
-        self.groq_client = Groq(api_key=groq_api_key or os.getenv("GROQ_API_KEY"))
+        # Gemeinsamer Groq Client (Connection-Pool, Retries, Rate-Limit)
+        self.groq_client = shared_groq_client(groq_api_key or os.getenv("GROQ_API_KEY"))
 
     def generate_groq_response(self, query: str, results: List) -> str:
         """Generiert natürlichsprachige Antwort mit Groq"""
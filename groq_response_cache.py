@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Response-Cache für Groq-Aufrufe
+===============================
+
+Persistenter Cache für LLM-Antworten mit TTL- und Größenlimit sowie
+Request-Coalescing: gleichzeitige identische Anfragen warten auf einen
+einzigen Upstream-Aufruf statt Groq mehrfach aufzurufen.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class GroqResponseCache:
+    """Persistenter LRU-Cache für Groq-Antworten mit In-Flight Coalescing"""
+
+    def __init__(
+        self,
+        cache_file: Optional[str] = ".groq_response_cache.json",
+        max_entries: int = 500,
+        ttl_seconds: float = 24 * 3600,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._load()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def make_key(cls, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """Schlüssel aus Modell, System-/User-Prompt-Hash und Sampling-Parametern"""
+        system_prompt = "\n".join(
+            m["content"] for m in messages if m.get("role") == "system"
+        )
+        user_prompt = "\n".join(
+            m["content"] for m in messages if m.get("role") != "system"
+        )
+        key_data = {
+            "model": params.get("model"),
+            "system": cls._hash(system_prompt),
+            "user": cls._hash(user_prompt),
+            # "stream" ändert nur die Auslieferung, nicht den Inhalt der Antwort
+            "params": {
+                k: v for k, v in sorted(params.items()) if k not in ("model", "stream")
+            },
+        }
+        return cls._hash(json.dumps(key_data, sort_keys=True))
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["created_at"] <= self.ttl_seconds
+
+    def _load(self):
+        """Lädt noch gültige Einträge aus der Cache-Datei"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Groq Response-Cache nicht lesbar, starte leer: {e}")
+            return
+
+        for key, entry in sorted(stored.items(), key=lambda x: x[1]["created_at"]):
+            if self._is_fresh(entry):
+                self._entries[key] = entry
+        self._trim()
+
+    def _save(self):
+        """Schreibt den Cache atomar (temporäre Datei + Umbenennen)"""
+        if not self.cache_file:
+            return
+
+        tmp_file = f"{self.cache_file}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"⚠️ Groq Response-Cache konnte nicht gespeichert werden: {e}")
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Liefert eine gecachte Antwort oder None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["response"]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        """Speichert eine Antwort und persistiert den Cache"""
+        with self._lock:
+            self._entries[key] = {"response": response, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            self._trim()
+            self._save()
+
+    def claim(self, key: str) -> Tuple[Optional[str], Optional[Future]]:
+        """Gecachte Antwort, laufende identische Anfrage oder (None, None)
+
+        Bei (None, None) führt der Aufrufer die Anfrage selbst aus und schliesst
+        sie mit complete() oder fail() ab (z.B. beim Streaming).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["response"], None
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future
+
+            self.misses += 1
+            self._in_flight[key] = Future()
+            return None, None
+
+    def complete(self, key: str, response: str):
+        """Speichert die Antwort einer beanspruchten Anfrage für alle Wartenden"""
+        self.put(key, response)
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None:
+            future.set_result(response)
+
+    def fail(self, key: str, error: BaseException):
+        """Gibt den Fehler einer beanspruchten Anfrage an alle Wartenden weiter"""
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def get_or_create(self, key: str, create: Callable[[], str]) -> str:
+        """Liefert die gecachte Antwort oder ruft create() genau einmal auf"""
+        response, future = self.claim(key)
+        if response is not None:
+            return response
+
+        # Identische Anfrage läuft bereits - auf deren Ergebnis warten
+        if future is not None:
+            return future.result()
+
+        try:
+            response = create()
+        except Exception as e:
+            self.fail(key, e)
+            raise
+        except BaseException:
+            self.fail(key, RuntimeError("Groq-Anfrage abgebrochen"))
+            raise
+        self.complete(key, response)
+        return response
+
+    def clear(self):
+        """Leert den Cache inklusive Cache-Datei"""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache-Statistiken"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Persistenter Index-Snapshot für das Appenzeller Wanderungen RAG System
+=====================================================================
+
+Speichert die Retrieval-Indizes (Vokabular, IDF, Dokument-Term-Matrix,
+Keyword-Postings) als versionierten Snapshot neben der Routen-Datei.
+Beim Start werden die Arrays per Memory-Mapping geladen, solange der
+Inhalts-Hash der Routen-Datei übereinstimmt.
+
+Jeder Snapshot liegt in einem eigenen Generations-Verzeichnis; die Datei
+CURRENT verweist auf die gültige Generation und wird atomar ersetzt. Ein
+laufender Leser sieht so immer einen vollständigen Snapshot.
+"""
+
+import json
+import os
+import shutil
+import logging
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterator, List, Any, Optional
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Bei Änderungen am Snapshot-Format oder an der Bedeutung der gespeicherten
+# Daten (Tokenisierung, IDF, Routen-Felder) erhöhen.
+# 2: kompakte Routen aus dem JSONL-Store, Generationen mit CURRENT-Zeiger,
+#    Vokabular und Keyword-Terme als Term -> Index Objekte
+SNAPSHOT_VERSION = 2
+
+CURRENT_FILE = "CURRENT"
+
+ARRAY_FILES = [
+    "idf",
+    "doc_data",
+    "doc_indices",
+    "doc_indptr",
+    "token_set_sizes",
+    "keyword_indptr",
+    "keyword_postings",
+]
+
+
+def snapshot_dir_for(routes_file: str) -> str:
+    """Snapshot-Verzeichnis neben der Routen-Datei"""
+    base, _ = os.path.splitext(routes_file)
+    return f"{base}.index"
+
+
+class PostingsView(Mapping):
+    """Keyword-Postings als Slices der memory-gemappten Arrays (ohne Kopie)"""
+
+    def __init__(self, terms: Dict[str, int], indptr: np.ndarray, postings: np.ndarray):
+        self._terms = terms
+        self._indptr = indptr
+        self._postings = postings
+
+    def __getitem__(self, term: str) -> np.ndarray:
+        i = self._terms[term]
+        return self._postings[self._indptr[i] : self._indptr[i + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+class IndexSnapshot:
+    """Versionierter On-Disk Snapshot der Retrieval-Indizes"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def current_generation(self) -> Optional[str]:
+        """Verzeichnis der gültigen Generation (None falls keine)"""
+        try:
+            with open(
+                os.path.join(self.directory, CURRENT_FILE), "r", encoding="utf-8"
+            ) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return os.path.join(self.directory, name) if name else None
+
+    @staticmethod
+    def _meta_path(directory: str) -> str:
+        return os.path.join(directory, "meta.json")
+
+    @staticmethod
+    def _array_path(name: str, directory: str) -> str:
+        return os.path.join(directory, f"{name}.npy")
+
+    def read_meta(self, generation: Optional[str] = None) -> Dict[str, Any]:
+        """Liest die Snapshot-Metadaten (leer falls nicht vorhanden)"""
+        generation = generation or self.current_generation()
+        if generation is None:
+            return {}
+        try:
+            with open(self._meta_path(generation), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _matches(meta: Dict[str, Any], routes_hash: str, num_routes: int) -> bool:
+        """Prüft ob die Metadaten zur aktuellen Routen-Datei passen"""
+        return (
+            meta.get("version") == SNAPSHOT_VERSION
+            and meta.get("routes_hash") == routes_hash
+            and meta.get("num_routes") == num_routes
+        )
+
+    def save(self, routes_hash: str, semantic_retriever, keyword_retriever):
+        """Schreibt eine neue Generation und schaltet CURRENT atomar um"""
+        embedding_model = semantic_retriever.embedding_model
+        doc_matrix = embedding_model.doc_matrix
+
+        keyword_terms = list(keyword_retriever.inverted_index.keys())
+        postings = [keyword_retriever.inverted_index[t] for t in keyword_terms]
+        keyword_indptr = np.cumsum([0] + [len(p) for p in postings])
+
+        arrays = {
+            "idf": np.asarray(embedding_model.idf, dtype=np.float64),
+            "doc_data": doc_matrix.data,
+            "doc_indices": doc_matrix.indices,
+            "doc_indptr": doc_matrix.indptr,
+            "token_set_sizes": np.asarray(
+                keyword_retriever.token_set_sizes, dtype=np.int32
+            ),
+            "keyword_indptr": keyword_indptr.astype(np.int64),
+            "keyword_postings": (
+                np.concatenate(postings).astype(np.int32)
+                if postings
+                else np.zeros(0, dtype=np.int32)
+            ),
+        }
+
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "routes_hash": routes_hash,
+            "num_routes": len(semantic_retriever.routes),
+            "total_docs": embedding_model.total_docs,
+            # Als Objekte gespeichert: json.load liefert direkt die Dicts
+            "vocabulary": embedding_model.vocabulary,
+            "keyword_terms": {term: i for i, term in enumerate(keyword_terms)},
+            "created_at": datetime.now().isoformat(),
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"gen-{uuid.uuid4().hex[:12]}"
+        generation = os.path.join(self.directory, name)
+        os.makedirs(generation)
+
+        for array_name, array in arrays.items():
+            np.save(self._array_path(array_name, generation), array)
+        with open(self._meta_path(generation), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        # Zeiger atomar umschalten - die alte Generation bleibt bis dahin gültig
+        previous = self.current_generation()
+        pointer_tmp = os.path.join(self.directory, f"{CURRENT_FILE}.tmp-{name}")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(pointer_tmp, os.path.join(self.directory, CURRENT_FILE))
+
+        # Nur die ersetzte Generation löschen: Verzeichnisse anderer Prozesse
+        # (noch im Schreiben oder gerade aktiviert) bleiben unberührt
+        if previous is not None and os.path.basename(previous) != name:
+            shutil.rmtree(previous, ignore_errors=True)
+
+        # Reste des Formats vor den Generationen (Dateien direkt im Verzeichnis)
+        for entry in os.listdir(self.directory):
+            if entry == "meta.json" or entry.endswith(".npy"):
+                os.remove(os.path.join(self.directory, entry))
+
+        logger.info(f"💾 Index-Snapshot gespeichert: {generation}")
+
+    def load(
+        self,
+        routes_hash: str,
+        routes: List[Dict[str, Any]],
+        semantic_retriever,
+        keyword_retriever,
+    ) -> bool:
+        """Lädt den Snapshot per Memory-Mapping, falls er gültig ist"""
+        generation = self.current_generation()
+        meta = self.read_meta(generation)
+        if not self._matches(meta, routes_hash, len(routes)):
+            return False
+
+        arrays = {
+            name: np.load(self._array_path(name, generation), mmap_mode="r")
+            for name in ARRAY_FILES
+        }
+
+        vocabulary = meta["vocabulary"]
+
+        # Semantischer Index
+        embedding_model = semantic_retriever.embedding_model
+        embedding_model.vocabulary = vocabulary
+        embedding_model.idf = arrays["idf"]
+        embedding_model.total_docs = meta["total_docs"]
+        embedding_model.doc_matrix = sparse.csr_matrix(
+            (arrays["doc_data"], arrays["doc_indices"], arrays["doc_indptr"]),
+            shape=(len(routes), len(vocabulary)),
+            copy=False,
+        )
+        semantic_retriever.routes = routes
+
+        # Keyword-Index (Posting-Listen erst beim Zugriff geschnitten)
+        keyword_retriever.routes = routes
+        keyword_retriever.token_set_sizes = arrays["token_set_sizes"]
+        keyword_retriever.inverted_index = PostingsView(
+            meta["keyword_terms"], arrays["keyword_indptr"], arrays["keyword_postings"]
+        )
+
+        return True
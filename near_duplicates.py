@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Erkennung mit MinHash + LSH
+==========================================
+
+Erkennt fast identische Routen (z.B. mehrfach extrahierte
+Inhaltsverzeichnis-Fragmente der ZKB-Wanderguides) über Zeichen-Shingles
+von Titel und Beschreibung. MinHash-Signaturen werden per LSH in Bänder
+aufgeteilt, sodass nur Routen mit gemeinsamem Bucket verglichen werden
+(nahezu lineare Laufzeit statt aller Paare).
+"""
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+import numpy as np
+
+# Mersenne-Primzahl für die universellen Hashfunktionen (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+@dataclass
+class DuplicateCluster:
+    """Gruppe fast identischer Routen (die erste wird behalten)"""
+
+    kept_index: int
+    kept_title: str
+    merged_indices: List[int] = field(default_factory=list)
+    merged_titles: List[str] = field(default_factory=list)
+    min_similarity: float = 1.0
+
+
+def route_dedup_text(route: Dict[str, Any]) -> str:
+    """Text einer Route für den Duplikat-Vergleich (Titel + Beschreibung)"""
+    return f"{route.get('title', '')} {route.get('description', '')}"
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Zeichen-Shingles des normalisierten Texts als 32-Bit Hashes"""
+    normalized = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode("utf-8"))}
+    return {
+        zlib.crc32(normalized[i : i + size].encode("utf-8"))
+        for i in range(len(normalized) - size + 1)
+    }
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    """Exakte Jaccard-Ähnlichkeit zweier Shingle-Mengen"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_bands(
+    threshold: float, num_perm: int, min_recall: float = 0.95
+) -> Tuple[int, int]:
+    """Wählt (Bänder, Zeilen) mit möglichst vielen Zeilen pro Band, sodass
+    Paare mit Ähnlichkeit >= threshold mit Wahrscheinlichkeit >= min_recall
+    Kandidaten werden (Fehlalarme werden exakt nachgeprüft)"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        recall = 1 - (1 - threshold**rows) ** bands
+        if recall >= min_recall:
+            best = (bands, rows)
+    return best
+
+
+class MinHashDeduplicator:
+    """MinHash + LSH Near-Duplicate Erkennung mit exakter Nachprüfung"""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 42,
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        """MinHash-Signatur (num_perm Minima über alle Shingles)"""
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        values %= _MERSENNE_PRIME
+        hashed = (np.outer(values, self._a) + self._b) % _MERSENNE_PRIME
+        return hashed.min(axis=0)
+
+    def candidate_pairs(self, signatures: List[np.ndarray]) -> Set[Tuple[int, int]]:
+        """Paare mit mindestens einem gemeinsamen LSH-Bucket"""
+        pairs = set()
+        for band in range(self.bands):
+            buckets: Dict[bytes, List[int]] = {}
+            start = band * self.rows
+            for i, signature in enumerate(signatures):
+                key = signature[start : start + self.rows].tobytes()
+                buckets.setdefault(key, []).append(i)
+
+            for members in buckets.values():
+                for j, first in enumerate(members):
+                    for second in members[j + 1 :]:
+                        pairs.add((first, second))
+        return pairs
+
+    def find_clusters(self, texts: List[str]) -> List[List[Tuple[int, float]]]:
+        """Cluster fast identischer Texte als [(Index, Ähnlichkeit zum ersten)]"""
+        shingle_sets = [shingles(text, self.shingle_size) for text in texts]
+        signatures = [self.signature(s) for s in shingle_sets]
+
+        # Exakt nachgeprüfte Nachbarn pro Route
+        neighbours: Dict[int, List[int]] = {}
+        for first, second in self.candidate_pairs(signatures):
+            if jaccard(shingle_sets[first], shingle_sets[second]) >= self.threshold:
+                neighbours.setdefault(first, []).append(second)
+                neighbours.setdefault(second, []).append(first)
+
+        # Erste Fundstelle bleibt Repräsentant, ihre noch freien Nachbarn
+        # werden zusammengeführt (jedes Mitglied ist >= threshold ähnlich)
+        assigned = set()
+        clusters = []
+        for i in range(len(texts)):
+            if i in assigned or i not in neighbours:
+                continue
+            members = sorted(j for j in neighbours[i] if j not in assigned)
+            if not members:
+                continue
+            assigned.add(i)
+            assigned.update(members)
+            clusters.append(
+                [(i, 1.0)]
+                + [(j, jaccard(shingle_sets[i], shingle_sets[j])) for j in members]
+            )
+
+        return clusters
+
+    def deduplicate(
+        self,
+        routes: List[Dict[str, Any]],
+        text_fn: Callable[[Dict[str, Any]], str] = route_dedup_text,
+    ) -> Tuple[List[Dict[str, Any]], List[DuplicateCluster]]:
+        """Entfernt Near-Duplicates (Reihenfolge bleibt) und liefert den Cluster-Report"""
+        clusters = self.find_clusters([text_fn(route) for route in routes])
+
+        report = []
+        removed = set()
+        for members in clusters:
+            (kept_index, _), merged = members[0], members[1:]
+            report.append(
+                DuplicateCluster(
+                    kept_index=kept_index,
+                    kept_title=routes[kept_index].get("title", ""),
+                    merged_indices=[i for i, _ in merged],
+                    merged_titles=[routes[i].get("title", "") for i, _ in merged],
+                    min_similarity=min(similarity for _, similarity in merged),
+                )
+            )
+            removed.update(i for i, _ in merged)
+
+        kept_routes = [route for i, route in enumerate(routes) if i not in removed]
+        return kept_routes, report
+
+
+def print_cluster_report(clusters: List[DuplicateCluster], limit: int = 10):
+    """Druckt die zusammengeführten Cluster"""
+    merged_count = sum(len(c.merged_indices) for c in clusters)
+    print(f"   🔗 {len(clusters)} Duplikat-Cluster, {merged_count} Routen entfernt")
+
+    for cluster in clusters[:limit]:
+        print(
+            f"      • {cluster.kept_title[:50]} "
+            f"(+{len(cluster.merged_indices)}, min. Ähnlichkeit "
+            f"{cluster.min_similarity:.2f})"
+        )
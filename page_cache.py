@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Seiten-Cache für die PDF-Extraktion
+===================================
+
+Speichert den extrahierten Text jeder PDF-Seite auf der Festplatte,
+adressiert über (SHA-256 der PDF-Datei, Seitennummer, Extraktionsmodus).
+Bei erneuter Verarbeitung werden nur neue oder geänderte PDFs bzw. noch
+nicht extrahierte Seiten mit pdfplumber gelesen.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pdfplumber
+
+# Extraktionsmodi und ihre pdfplumber-Parameter
+EXTRACTION_MODES = {
+    "layout": {"layout": True},
+    "plain": {},
+}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 einer Datei (blockweise gelesen)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_page_text(pdf, page_num: int, mode: str) -> str:
+    """Text einer Seite (1-basiert); leer falls die Seite nicht existiert"""
+    if page_num > len(pdf.pages):
+        return ""
+    text = pdf.pages[page_num - 1].extract_text(**EXTRACTION_MODES[mode])
+    return text or ""
+
+
+class PageTextCache:
+    """On-Disk Cache für extrahierte Seitentexte (eine JSON-Datei pro PDF)"""
+
+    def __init__(self, cache_dir: str = ".page_cache"):
+        self.cache_dir = cache_dir
+        self._files: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_path(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}.json")
+
+    @staticmethod
+    def _key(page_num: int, mode: str) -> str:
+        return f"{mode}:{page_num}"
+
+    def _entry(self, file_hash: str) -> Dict:
+        """Cache-Eintrag einer PDF (lazy von der Festplatte geladen)"""
+        if file_hash not in self._files:
+            entry = {"page_count": None, "pages": {}}
+            try:
+                with open(self._cache_path(file_hash), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Seiten-Cache für {file_hash[:12]} nicht lesbar: {e}")
+            self._files[file_hash] = entry
+        return self._files[file_hash]
+
+    def _save(self, file_hash: str):
+        """Schreibt den Eintrag einer PDF atomar"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(file_hash)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._files[file_hash], f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Seiten-Cache konnte nicht gespeichert werden: {e}")
+
+    def page_count(self, file_hash: str) -> Optional[int]:
+        """Gespeicherte Seitenanzahl der PDF (None falls unbekannt)"""
+        with self._lock:
+            return self._entry(file_hash)["page_count"]
+
+    def get_pages(
+        self, file_hash: str, page_numbers: Iterable[int], mode: str
+    ) -> Dict[int, str]:
+        """Bereits gecachte Seitentexte (fehlende Seiten sind nicht enthalten)"""
+        with self._lock:
+            pages = self._entry(file_hash)["pages"]
+            found = {}
+            for page_num in page_numbers:
+                text = pages.get(self._key(page_num, mode))
+                if text is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    found[page_num] = text
+            return found
+
+    def put_pages(
+        self,
+        file_hash: str,
+        page_texts: Dict[int, str],
+        mode: str,
+        page_count: Optional[int] = None,
+    ):
+        """Speichert neu extrahierte Seitentexte"""
+        with self._lock:
+            entry = self._entry(file_hash)
+            if page_count is not None:
+                entry["page_count"] = page_count
+            for page_num, text in page_texts.items():
+                entry["pages"][self._key(page_num, mode)] = text
+            self._save(file_hash)
+
+    def extract_pages(
+        self,
+        pdf_path: str,
+        page_numbers: List[int],
+        mode: str,
+        file_hash: Optional[str] = None,
+    ) -> Dict[int, str]:
+        """Seitentexte aus dem Cache, fehlende Seiten werden extrahiert"""
+        file_hash = file_hash or file_sha256(pdf_path)
+        page_texts = self.get_pages(file_hash, page_numbers, mode)
+        missing = [p for p in page_numbers if p not in page_texts]
+
+        if missing:
+            with pdfplumber.open(pdf_path) as pdf:
+                extracted = {p: extract_page_text(pdf, p, mode) for p in missing}
+                page_count = len(pdf.pages)
+            self.put_pages(file_hash, extracted, mode, page_count)
+            page_texts.update(extracted)
+
+        return page_texts
+
+    def stats(self) -> Dict[str, int]:
+        """Cache-Statistiken"""
+        return {"files": len(self._files), "hits": self.hits, "misses": self.misses}
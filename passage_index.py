@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Passagen-Index über PDF-Seiten
+==============================
+
+Zerlegt alle Seiten der PDF-Dokumente in überlappende Passagen fester
+Länge (Wörter) und indexiert sie mit derselben TF-IDF Engine wie die
+Routen (SimpleEmbedding, CSR-Matrix), jedoch mit geglätteter IDF, da eine
+einzelne PDF oft nur wenige Passagen liefert. Für eine Anfrage werden die
+bestbewerteten Passagen gewählt, bis ein Token-Budget ausgeschöpft ist.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from prompt_builder import estimate_tokens
+from rag_hiking_system import SimpleEmbedding, top_k_indices
+
+CHUNK_WORDS = 80
+OVERLAP_WORDS = 20
+
+
+@dataclass
+class Passage:
+    """Textabschnitt einer PDF-Seite"""
+
+    source: str  # Dateiname der PDF
+    page: int  # 1-basiert
+    text: str
+
+
+def split_into_chunks(
+    text: str, chunk_words: int = CHUNK_WORDS, overlap_words: int = OVERLAP_WORDS
+) -> List[str]:
+    """Überlappende Abschnitte mit höchstens chunk_words Wörtern"""
+    words = text.split()
+    if not words:
+        return []
+
+    step = max(1, chunk_words - overlap_words)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start : start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def page_passages(
+    source: str,
+    page_texts: Dict[int, str],
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = OVERLAP_WORDS,
+) -> List[Passage]:
+    """Passagen aller Seiten einer PDF in Seitenreihenfolge"""
+    return [
+        Passage(source, page_num, chunk)
+        for page_num in sorted(page_texts)
+        for chunk in split_into_chunks(page_texts[page_num], chunk_words, overlap_words)
+    ]
+
+
+class PassageEmbedding(SimpleEmbedding):
+    """TF-IDF mit geglätteter IDF (auch bei wenigen Passagen stets > 0)"""
+
+    def _idf(self, doc_count: int) -> float:
+        return np.log((self.total_docs + 1) / (doc_count + 1)) + 1
+
+
+class PassageIndex:
+    """TF-IDF Suche über PDF-Passagen"""
+
+    def __init__(self, passages: List[Passage]):
+        self.passages = passages
+        self.embedding_model = PassageEmbedding()
+        self.embedding_model.fit([passage.text for passage in passages])
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Passage, float]]:
+        """Top-k Passagen mit Score > 0"""
+        if not self.passages:
+            return []
+
+        query_embedding = self.embedding_model.encode(query)
+        scores = (self.embedding_model.doc_matrix @ query_embedding.T).toarray().ravel()
+        return [
+            (self.passages[i], float(scores[i]))
+            for i in top_k_indices(scores, k)
+            if scores[i] > 0
+        ]
+
+    def select(
+        self, query: str, token_budget: int, candidates: int = 10
+    ) -> List[Passage]:
+        """Bestbewertete Passagen, die zusammen ins Token-Budget passen"""
+        selected = []
+        remaining = token_budget
+        for passage, _ in self.search(query, k=candidates):
+            tokens = estimate_tokens(passage.text)
+            if tokens <= remaining:
+                selected.append(passage)
+                remaining -= tokens
+        return selected
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+PDF-Kontext im Hintergrund
+==========================
+
+Extrahiert die Textauszüge der PDFs für den Groq-Kontext in einem
+Thread-Pool, sobald das System startet. Abfragen fragen mit ready() nur
+nach, ob ein Auszug bereits vorliegt, und warten nie auf pdfplumber.
+Ändert sich eine PDF (Grösse oder mtime), wird sie neu eingeplant.
+Aufgaben über alle PDFs (z.B. der Passagen-Index) laufen im selben Pool.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from document_registry import file_signature
+
+
+class BackgroundPdfExtractor:
+    """Thread-Pool für PDF-Textauszüge mit nicht-blockierender Abfrage"""
+
+    def __init__(self, extract: Callable[[str], str], max_workers: int = 2):
+        self._extract = extract
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pdf-context"
+        )
+        self._jobs: Dict[Hashable, Tuple[Tuple, Future]] = {}
+        self._lock = threading.Lock()
+
+    def _schedule(
+        self, key: Hashable, signature: Tuple, function: Callable, argument: Any
+    ) -> Future:
+        """Startet function(argument), ausser derselbe Stand läuft schon"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job[0] == signature:
+                return job[1]
+
+            future = self._executor.submit(function, argument)
+            self._jobs[key] = (signature, future)
+            return future
+
+    @staticmethod
+    def _finished(future: Future) -> Optional[Any]:
+        if not future.done() or future.cancelled() or future.exception():
+            return None
+        return future.result()
+
+    def submit(self, pdf_path: str) -> Future:
+        """Plant die Extraktion ein (nur falls neu oder die Datei geändert ist)"""
+        return self._schedule(
+            pdf_path, file_signature(pdf_path), self._extract, pdf_path
+        )
+
+    def submit_all(
+        self, key: str, pdf_paths: List[str], function: Callable[[List[str]], Any]
+    ) -> Future:
+        """Plant eine Aufgabe über mehrere PDFs ein (neu bei jeder Änderung)"""
+        signature = tuple(file_signature(path) for path in pdf_paths)
+        return self._schedule(key, signature, function, list(pdf_paths))
+
+    def ready(self, pdf_path: str) -> Optional[str]:
+        """Fertiger Auszug oder None (noch in Arbeit, fehlgeschlagen, fehlt)"""
+        try:
+            return self._finished(self.submit(pdf_path))
+        except (OSError, RuntimeError):  # Datei fehlt bzw. Pool beendet
+            return None
+
+    def ready_all(
+        self, key: str, pdf_paths: List[str], function: Callable[[List[str]], Any]
+    ) -> Optional[Any]:
+        """Ergebnis von submit_all, falls bereits fertig (sonst None)"""
+        try:
+            return self._finished(self.submit_all(key, pdf_paths, function))
+        except (OSError, RuntimeError):  # Datei fehlt bzw. Pool beendet
+            return None
+
+    def result(self, pdf_path: str, timeout: Optional[float] = None) -> str:
+        """Auszug einer PDF (wartet falls nötig)"""
+        return self.submit(pdf_path).result(timeout)
+
+    def pending(self) -> int:
+        """Anzahl noch laufender oder wartender Extraktionen"""
+        with self._lock:
+            return sum(1 for _, future in self._jobs.values() if not future.done())
+
+    def shutdown(self, wait: bool = False):
+        """Beendet den Pool; noch nicht gestartete Extraktionen entfallen"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
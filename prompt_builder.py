@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Prompt-Aufbau mit Token-Budget
+==============================
+
+Schätzt Token-Zahlen lokal (Näherung an den BPE-Tokenizer von LLaMA 3,
+ohne Modell-Download) und füllt ein konfigurierbares Budget nach
+Priorität: zuerst die Top-Route, dann Alternativen, dann PDF-Passagen und
+zuletzt allgemeiner Kontext. Abschnitte, die nicht mehr ganz passen, werden
+an einer Wortgrenze gekürzt oder weggelassen. Die Reihenfolge im Prompt
+bleibt die Reihenfolge, in der die Abschnitte hinzugefügt wurden.
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Wörter, Zahlen (LLaMA 3 gruppiert höchstens 3 Ziffern) und einzelne Zeichen
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d{1,3}|\S")
+WORD_PATTERN = re.compile(r"\S+")
+
+# Buchstaben pro Token bei Wörtern (deutsche Komposita werden zerlegt)
+CHARS_PER_WORD_TOKEN = 5
+
+# Kürzere Reste lohnen sich nicht: Abschnitt wird dann weggelassen
+MIN_TRUNCATED_TOKENS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Geschätzte Anzahl Tokens eines Textes"""
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += -(-len(piece) // CHARS_PER_WORD_TOKEN)
+        elif piece.isascii():
+            tokens += 1
+        else:
+            # Emojis und Sonderzeichen belegen mehrere Bytes
+            tokens += max(1, len(piece.encode("utf-8")) // 2)
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "...") -> str:
+    """Kürzt text an einer Wortgrenze auf höchstens max_tokens Tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(suffix)
+    end = 0
+    for match in WORD_PATTERN.finditer(text):
+        budget -= estimate_tokens(match.group())
+        if budget < 0:
+            break
+        end = match.end()
+    return text[:end] + suffix
+
+
+@dataclass
+class PromptSection:
+    """Abschnitt des Kontexts (kleinere priority wird zuerst eingeplant)"""
+
+    name: str
+    text: str
+    priority: int
+    heading: Optional[str] = None  # gemeinsame Überschrift, einmal ausgegeben
+    truncatable: bool = False
+    max_tokens: Optional[int] = None
+
+
+@dataclass
+class PromptUsage:
+    """Token-Verbrauch eines Prompts"""
+
+    budget: int
+    context_tokens: int = 0
+    prompt_tokens: int = 0  # gesamter Prompt inkl. System-Prompt
+    sections: Dict[str, int] = field(default_factory=dict)
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class PromptBuilder:
+    """Füllt ein Token-Budget mit Abschnitten nach Priorität"""
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+        self.sections: List[PromptSection] = []
+
+    def add(
+        self,
+        name: str,
+        text: str,
+        priority: int,
+        heading: Optional[str] = None,
+        truncatable: bool = False,
+        max_tokens: Optional[int] = None,
+    ):
+        """Fügt einen Abschnitt hinzu (leere Texte werden ignoriert)"""
+        if text.strip():
+            self.sections.append(
+                PromptSection(name, text, priority, heading, truncatable, max_tokens)
+            )
+
+    def build(self) -> Tuple[str, PromptUsage]:
+        """Kontext-Text innerhalb des Budgets und dessen Token-Verbrauch"""
+        usage = PromptUsage(budget=self.token_budget)
+        remaining = self.token_budget
+        included: Dict[int, str] = {}
+        paid_headings = set()
+
+        order = sorted(
+            range(len(self.sections)), key=lambda i: self.sections[i].priority
+        )
+        for i in order:
+            section = self.sections[i]
+            heading_tokens = 0
+            if section.heading and section.heading not in paid_headings:
+                heading_tokens = estimate_tokens(section.heading)
+
+            available = remaining - heading_tokens
+            if section.max_tokens is not None:
+                available = min(available, section.max_tokens)
+
+            text = section.text
+            tokens = estimate_tokens(text)
+            if tokens > available:
+                if not section.truncatable or available < MIN_TRUNCATED_TOKENS:
+                    usage.dropped.append(section.name)
+                    continue
+                text = truncate_to_tokens(text, available)
+                tokens = estimate_tokens(text)
+                usage.truncated.append(section.name)
+
+            if section.heading:
+                paid_headings.add(section.heading)
+            included[i] = text
+            remaining -= tokens + heading_tokens
+            usage.sections[section.name] = tokens + heading_tokens
+
+        # Ausgabe in der ursprünglichen Reihenfolge, Überschriften einmal
+        parts = []
+        current_heading = None
+        for i, section in enumerate(self.sections):
+            if i not in included:
+                continue
+            if section.heading and section.heading != current_heading:
+                parts.append(section.heading)
+            current_heading = section.heading
+            parts.append(included[i])
+
+        usage.context_tokens = self.token_budget - remaining
+        return "\n".join(parts), usage
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+LRU-Cache für Retrieval-Ergebnisse
+==================================
+
+Begrenzter, thread-sicherer LRU-Cache mit optionaler TTL und
+Hit/Miss-Zählern. Streamlit führt das Skript bei jeder Interaktion neu aus,
+daher treffen dieselben Anfragen wiederholt auf das RAG-System.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Größen- und TTL-begrenzter LRU-Cache"""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Liefert den Wert oder None (zählt Hit/Miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl_seconds is None or (
+                    time.monotonic() - stored_at <= self.ttl_seconds
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                # Abgelaufen
+                del self._entries[key]
+                self.evictions += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Speichert einen Wert und verdrängt ggf. den ältesten Eintrag"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Leert den Cache (Zähler bleiben erhalten)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache-Statistiken für Monitoring und UI"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
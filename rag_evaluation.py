@@ -17,82 +17,89 @@ from collections import defaultdict, Counter
 import numpy as np
 
 
+# Test-Queries mit erwarteten Charakteristiken
+TEST_QUERIES = [
+    {
+        "query": "Ich möchte eine einfache Wanderung mit Restaurant",
+        "expected_difficulty": "T1",
+        "expected_restaurants": True,
+        "expected_duration": "kurz",
+        "description": "Einfache Route mit Verpflegung",
+    },
+    {
+        "query": "Suche anspruchsvolle Bergtouren mit schöner Aussicht",
+        "expected_difficulty": "T3+",
+        "expected_restaurants": False,
+        "expected_duration": "mittel",
+        "description": "Schwierige Bergtour mit Panorama",
+    },
+    {
+        "query": "Kurze Familienwanderung in der Nähe von einem See",
+        "expected_difficulty": "T1",
+        "expected_restaurants": False,
+        "expected_duration": "kurz",
+        "description": "Kurze familienfreundliche Route",
+    },
+    {
+        "query": "Lange Wanderung mit vielen Höhenmetern zum Säntis",
+        "expected_difficulty": "T2+",
+        "expected_restaurants": False,
+        "expected_duration": "lang",
+        "description": "Herausfordernde Säntis-Tour",
+    },
+    {
+        "query": "Gemütliche Tour mit Einkehrmöglichkeit",
+        "expected_difficulty": "T1",
+        "expected_restaurants": True,
+        "expected_duration": "mittel",
+        "description": "Entspannte Route mit Gastronomie",
+    },
+    {
+        "query": "Wanderung zur Ebenalp mit Restaurant",
+        "expected_difficulty": "T1",
+        "expected_restaurants": True,
+        "expected_duration": "mittel",
+        "description": "Bekannte touristische Route",
+    },
+    {
+        "query": "Schwierige Bergtour für erfahrene Wanderer",
+        "expected_difficulty": "T3+",
+        "expected_restaurants": False,
+        "expected_duration": "lang",
+        "description": "Technisch anspruchsvolle Route",
+    },
+    {
+        "query": "Rundwanderung mit schöner Aussicht",
+        "expected_difficulty": "T2",
+        "expected_restaurants": False,
+        "expected_duration": "mittel",
+        "description": "Panorama-Rundtour",
+    },
+]
+
+
 class RAGEvaluator:
     """Evaluiert die Performance des RAG-Systems"""
 
     def __init__(self):
         self.rag_system = AppenzellHikingRAG()
 
-        # Test-Queries mit erwarteten Charakteristiken
-        self.test_queries = [
-            {
-                "query": "Ich möchte eine einfache Wanderung mit Restaurant",
-                "expected_difficulty": "T1",
-                "expected_restaurants": True,
-                "expected_duration": "kurz",
-                "description": "Einfache Route mit Verpflegung",
-            },
-            {
-                "query": "Suche anspruchsvolle Bergtouren mit schöner Aussicht",
-                "expected_difficulty": "T3+",
-                "expected_restaurants": False,
-                "expected_duration": "mittel",
-                "description": "Schwierige Bergtour mit Panorama",
-            },
-            {
-                "query": "Kurze Familienwanderung in der Nähe von einem See",
-                "expected_difficulty": "T1",
-                "expected_restaurants": False,
-                "expected_duration": "kurz",
-                "description": "Kurze familienfreundliche Route",
-            },
-            {
-                "query": "Lange Wanderung mit vielen Höhenmetern zum Säntis",
-                "expected_difficulty": "T2+",
-                "expected_restaurants": False,
-                "expected_duration": "lang",
-                "description": "Herausfordernde Säntis-Tour",
-            },
-            {
-                "query": "Gemütliche Tour mit Einkehrmöglichkeit",
-                "expected_difficulty": "T1",
-                "expected_restaurants": True,
-                "expected_duration": "mittel",
-                "description": "Entspannte Route mit Gastronomie",
-            },
-            {
-                "query": "Wanderung zur Ebenalp mit Restaurant",
-                "expected_difficulty": "T1",
-                "expected_restaurants": True,
-                "expected_duration": "mittel",
-                "description": "Bekannte touristische Route",
-            },
-            {
-                "query": "Schwierige Bergtour für erfahrene Wanderer",
-                "expected_difficulty": "T3+",
-                "expected_restaurants": False,
-                "expected_duration": "lang",
-                "description": "Technisch anspruchsvolle Route",
-            },
-            {
-                "query": "Rundwanderung mit schöner Aussicht",
-                "expected_difficulty": "T2",
-                "expected_restaurants": False,
-                "expected_duration": "mittel",
-                "description": "Panorama-Rundtour",
-            },
-        ]
+        self.test_queries = TEST_QUERIES
 
-    def evaluate_query(self, test_case: Dict) -> Dict:
-        """Evaluiert eine einzelne Query"""
+    def evaluate_query(
+        self, test_case: Dict, results: List = None, processing_time: float = None
+    ) -> Dict:
+        """Evaluiert eine einzelne Query (optional mit bereits berechneten Ergebnissen)"""
 
         query = test_case["query"]
-        start_time = time.time()
 
-        # RAG-Suche durchführen
-        results = self.rag_system.retrieve(query, k=5)
+        if results is None:
+            start_time = time.time()
+
+            # RAG-Suche durchführen
+            results = self.rag_system.retrieve(query, k=5)
 
-        processing_time = time.time() - start_time
+            processing_time = time.time() - start_time
 
         if not results:
             return {
@@ -200,12 +207,21 @@ class RAGEvaluator:
 
         evaluation_results = []
 
+        # Alle Test-Queries in einem Batch abrufen
+        start_time = time.time()
+        batch_results = self.rag_system.retrieve_many(
+            [test_case["query"] for test_case in self.test_queries], k=5
+        )
+        time_per_query = (time.time() - start_time) / max(len(self.test_queries), 1)
+
         # Evaluiere alle Test-Queries
-        for i, test_case in enumerate(self.test_queries, 1):
+        for i, (test_case, results) in enumerate(
+            zip(self.test_queries, batch_results), 1
+        ):
             print(f"\n📝 Test {i}/{len(self.test_queries)}: {test_case['description']}")
             print(f"   Query: \"{test_case['query']}\"")
 
-            result = self.evaluate_query(test_case)
+            result = self.evaluate_query(test_case, results, time_per_query)
             evaluation_results.append(result)
 
             print(f"   ⏱️ Zeit: {result['processing_time']:.2f}s")
@@ -13,15 +13,25 @@ Features:
 - Intelligente Antwortgenerierung
 """
 
+import hashlib
 import json
 import re
 import os
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+import threading
+from typing import List, Dict, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field, replace
 import numpy as np
+from scipy import sparse
 from collections import defaultdict
+import heapq
 import logging
 
+from index_snapshot import IndexSnapshot, snapshot_dir_for
+from query_cache import LRUCache
+from route_store import RouteStore
+from term_matcher import TermMatcher
+from tracing import SpanRecorder
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -51,6 +61,143 @@ class RetrievalResult:
     preference_score: float
     final_score: float
     explanation: str
+    # Zeit-Aufschlüsselung der Anfrage in Sekunden (geteilt im ganzen Batch)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indizes der k höchsten Scores, absteigend sortiert
+
+    Verwendet Partial Selection (argpartition) statt vollständiger Sortierung.
+    Bei Gleichstand gewinnt der kleinere Index, wie bei einer stabilen Sortierung.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    if k >= n:
+        return np.lexsort((np.arange(n), -scores))
+
+    kth_score = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > kth_score)
+    ties = np.flatnonzero(scores == kth_score)[: k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.lexsort((selected, -scores[selected]))]
+
+
+@dataclass
+class RouteAttributes:
+    """Spaltenweise numerische Routen-Attribute, einmal beim Laden geparst"""
+
+    hours: np.ndarray  # Wanderzeit in Stunden, NaN falls unbekannt
+    ascent_m: np.ndarray  # Aufstieg in Metern, NaN falls unbekannt
+    descent_m: np.ndarray  # Abstieg in Metern, NaN falls unbekannt
+    distance_km: np.ndarray  # Distanz in km, NaN falls unbekannt
+    sac_levels: np.ndarray  # Bitmaske der genannten SAC-Stufen (Bit n = Tn)
+    restaurant_count: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.hours)
+
+
+@dataclass
+class RouteFilters:
+    """Harte Filterbedingungen für das Retrieval (None = kein Filter)"""
+
+    sac_scale: Optional[List[str]] = None  # z.B. ["T1", "T2"]
+    duration: Optional[str] = None  # Schlüssel aus PreferenceReRanker.duration_mapping
+    elevation: Optional[str] = None  # Schlüssel aus elevation_mapping
+    restaurant_required: bool = False
+    regions: Optional[List[str]] = None  # z.B. ["Appenzell"]
+
+
+class RouteFilterIndex:
+    """Vorberechnete Bitmaps für strukturiertes Pre-Filtering"""
+
+    def __init__(
+        self,
+        routes: List[Dict[str, Any]],
+        attributes: RouteAttributes,
+        duration_mapping: Dict[str, Tuple[float, float]],
+        elevation_mapping: Dict[str, Tuple[float, float]],
+    ):
+        self.num_routes = len(routes)
+        hours = attributes.hours
+        ascent = attributes.ascent_m
+
+        self.sac_bitmaps = {
+            f"T{level}": (attributes.sac_levels & (1 << level)) != 0
+            for level in range(1, 7)
+        }
+        self.duration_bitmaps = {
+            bucket: (low <= hours) & (hours <= high)
+            for bucket, (low, high) in duration_mapping.items()
+        }
+        self.elevation_bitmaps = {
+            bucket: (ascent > 0) & (low <= ascent) & (ascent <= high)
+            for bucket, (low, high) in elevation_mapping.items()
+        }
+        self.restaurant_bitmap = attributes.restaurant_count > 0
+
+        route_regions = np.array(
+            [str(route.get("region", "")).lower() for route in routes]
+        )
+        self.region_bitmaps = {
+            region: route_regions == region for region in set(route_regions)
+        }
+
+    @property
+    def regions(self) -> Set[str]:
+        """Regionen mit mindestens einer Route (kleingeschrieben)"""
+        return {region for region in self.region_bitmaps if region}
+
+    def _union(self, bitmaps: Dict[str, np.ndarray], keys, label: str) -> np.ndarray:
+        """ODER-Verknüpfung der Bitmaps mehrerer Filterwerte"""
+        if isinstance(keys, str):
+            keys = [keys]
+
+        union = np.zeros(self.num_routes, dtype=bool)
+        for key in keys:
+            if key not in bitmaps:
+                raise ValueError(f"Unbekannter Filterwert für {label}: {key}")
+            union |= bitmaps[key]
+        return union
+
+    def candidates(self, filters: RouteFilters) -> np.ndarray:
+        """Schneidet die Bitmaps und liefert die aufsteigenden Routen-Indizes"""
+        mask = np.ones(self.num_routes, dtype=bool)
+
+        if filters.sac_scale:
+            sac_levels = (
+                [filters.sac_scale]
+                if isinstance(filters.sac_scale, str)
+                else filters.sac_scale
+            )
+            mask &= self._union(
+                self.sac_bitmaps,
+                [level.upper().replace(" ", "") for level in sac_levels],
+                "SAC-Skala",
+            )
+
+        if filters.duration:
+            mask &= self._union(self.duration_bitmaps, filters.duration, "Dauer")
+
+        if filters.elevation:
+            mask &= self._union(self.elevation_bitmaps, filters.elevation, "Höhenmeter")
+
+        if filters.restaurant_required:
+            mask &= self.restaurant_bitmap
+
+        if filters.regions:
+            regions = (
+                [filters.regions]
+                if isinstance(filters.regions, str)
+                else filters.regions
+            )
+            mask &= self._union(
+                self.region_bitmaps, [region.lower() for region in regions], "Region"
+            )
+
+        return np.flatnonzero(mask)
 
 
 class QueryExpander:
@@ -126,75 +273,147 @@ class QueryExpander:
             "gäbris",
         ]
 
+        # Trigger-Begriffe für Dauer, Höhenmeter und Restaurant-Wunsch
+        self.duration_terms = {
+            "kurz": ["kurz", "schnell", "1 stunde", "2 stunde"],
+            "lang": ["lang", "ganztag", "4 stunde", "5 stunde"],
+        }
+        self.elevation_terms = {
+            "flach": ["flach", "eben", "wenig höhenmeter"],
+            "anspruchsvoll": ["steil", "viele höhenmeter", "aufstieg"],
+        }
+        self.restaurant_terms = [
+            "restaurant",
+            "gasthaus",
+            "einkehr",
+            "verpflegung",
+            "essen",
+        ]
+
+        # Alle Trigger-Begriffe einmalig in einen Aho-Corasick Automaten kompilieren
+        self.term_matcher = TermMatcher(
+            list(self.difficulty_mapping)
+            + [term for terms in self.duration_terms.values() for term in terms]
+            + [term for terms in self.elevation_terms.values() for term in terms]
+            + self.restaurant_terms
+            + list(self.hiking_synonyms)
+            + self.appenzell_places
+        )
+        self._expansion_cache = LRUCache(max_size=1024)
+
     def expand_query(self, query: str) -> HikingQuery:
         """Erweitert Anfrage und extrahiert Präferenzen"""
         query_lower = query.lower()
-        expanded_terms = [query]
 
-        hiking_query = HikingQuery(original_query=query)
+        # Erkennung ist pro kleingeschriebener Anfrage memoisiert
+        expansion = self._expansion_cache.get(query_lower)
+        if expansion is None:
+            expansion = self._analyze_query(query_lower)
+            self._expansion_cache.put(query_lower, expansion)
+
+        expanded_terms = [query] + expansion["expanded_terms"]
+
+        return HikingQuery(
+            original_query=query,
+            expanded_query=" ".join(set(expanded_terms)),
+            difficulty_preference=expansion["difficulty_preference"],
+            duration_preference=expansion["duration_preference"],
+            elevation_preference=expansion["elevation_preference"],
+            restaurant_required=expansion["restaurant_required"],
+            keywords=list(set(expanded_terms)),
+            region_keywords=list(expansion["region_keywords"]),
+        )
 
-        # Schwierigkeitsgrad erkennen
-        for difficulty, sac_level in self.difficulty_mapping.items():
-            if difficulty in query_lower:
-                hiking_query.difficulty_preference = sac_level
-                break
+    def _analyze_query(self, query_lower: str) -> Dict[str, Any]:
+        """Erkennt Präferenzen, Synonyme und Orte in einem Durchlauf"""
+        matched_terms = self.term_matcher.find_all(query_lower)
+        expanded_terms = []
+
+        # Schwierigkeitsgrad erkennen (erste Übereinstimmung im Mapping gewinnt)
+        difficulty_preference = next(
+            (
+                sac_level
+                for difficulty, sac_level in self.difficulty_mapping.items()
+                if difficulty in matched_terms
+            ),
+            None,
+        )
 
         # Dauer-Präferenz erkennen
-        if any(
-            term in query_lower for term in ["kurz", "schnell", "1 stunde", "2 stunde"]
-        ):
-            hiking_query.duration_preference = "kurz"
-        elif any(
-            term in query_lower for term in ["lang", "ganztag", "4 stunde", "5 stunde"]
-        ):
-            hiking_query.duration_preference = "lang"
+        if matched_terms.intersection(self.duration_terms["kurz"]):
+            duration_preference = "kurz"
+        elif matched_terms.intersection(self.duration_terms["lang"]):
+            duration_preference = "lang"
         else:
-            hiking_query.duration_preference = "mittel"
+            duration_preference = "mittel"
 
         # Höhenmeter-Präferenz erkennen
-        if any(term in query_lower for term in ["flach", "eben", "wenig höhenmeter"]):
-            hiking_query.elevation_preference = "flach"
-        elif any(
-            term in query_lower for term in ["steil", "viele höhenmeter", "aufstieg"]
-        ):
-            hiking_query.elevation_preference = "anspruchsvoll"
+        if matched_terms.intersection(self.elevation_terms["flach"]):
+            elevation_preference = "flach"
+        elif matched_terms.intersection(self.elevation_terms["anspruchsvoll"]):
+            elevation_preference = "anspruchsvoll"
         else:
-            hiking_query.elevation_preference = "mittel"
-
-        # Restaurant-Anforderung prüfen
-        hiking_query.restaurant_required = any(
-            term in query_lower
-            for term in ["restaurant", "gasthaus", "einkehr", "verpflegung", "essen"]
-        )
+            elevation_preference = "mittel"
 
         # Synonyme hinzufügen
         for word, synonyms in self.hiking_synonyms.items():
-            if word in query_lower:
+            if word in matched_terms:
                 expanded_terms.extend(synonyms)
 
         # Appenzeller Orte identifizieren
-        region_keywords = []
-        for place in self.appenzell_places:
-            if place in query_lower:
-                region_keywords.append(place)
-                expanded_terms.append(place)
+        region_keywords = [
+            place for place in self.appenzell_places if place in matched_terms
+        ]
+        expanded_terms.extend(region_keywords)
+
+        return {
+            "expanded_terms": expanded_terms,
+            "difficulty_preference": difficulty_preference,
+            "duration_preference": duration_preference,
+            "elevation_preference": elevation_preference,
+            # Restaurant-Anforderung prüfen
+            "restaurant_required": bool(
+                matched_terms.intersection(self.restaurant_terms)
+            ),
+            "region_keywords": region_keywords,
+        }
+
+
+@dataclass
+class DocumentFrequencies:
+    """Dokumentfrequenzen über mehrere Korpora (gemeinsame IDF für Index-Shards)"""
+
+    total_docs: int = 0
+    doc_counts: Dict[str, int] = field(default_factory=dict)
 
-        hiking_query.expanded_query = " ".join(set(expanded_terms))
-        hiking_query.keywords = list(set(expanded_terms))
-        hiking_query.region_keywords = region_keywords
+    def add(self, tokenized_docs: List[List[str]]):
+        """Zählt die tokenisierten Dokumente eines Korpus hinzu"""
+        self.total_docs += len(tokenized_docs)
+        for words in tokenized_docs:
+            for word in set(words):
+                self.doc_counts[word] = self.doc_counts.get(word, 0) + 1
 
-        return hiking_query
+    @property
+    def fingerprint(self) -> str:
+        """Kurzer Hash der Frequenzen (für die Gültigkeit von Index-Snapshots)"""
+        digest = hashlib.sha1(str(self.total_docs).encode("utf-8"))
+        for word in sorted(self.doc_counts):
+            digest.update(f"{word}:{self.doc_counts[word]}\n".encode("utf-8"))
+        return digest.hexdigest()[:12]
 
 
 class SimpleEmbedding:
-    """Einfaches TF-IDF basiertes Embedding für semantische Suche"""
+    """TF-IDF Embedding mit dünnbesetzter Dokument-Term-Matrix (CSR)"""
 
-    def __init__(self):
-        self.word_counts = defaultdict(int)
+    def __init__(self, document_frequencies: Optional[DocumentFrequencies] = None):
+        # Optional gemeinsame Frequenzen statt der des eigenen Korpus
+        self.document_frequencies = document_frequencies
         self.doc_counts = defaultdict(int)
         self.total_docs = 0
-        self.vocab = set()
-        self.embeddings = {}
+        # Stabiles Mapping Term -> Spaltenindex der Dokument-Term-Matrix
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.doc_matrix = sparse.csr_matrix((0, 0))
 
     def _tokenize(self, text: str) -> List[str]:
         """Einfache Tokenisierung"""
@@ -204,107 +423,198 @@ class SimpleEmbedding:
 
     def fit(self, documents: List[str]):
         """Trainiert das Embedding-Modell"""
+        self.doc_counts = defaultdict(int)
+        self.vocabulary = {}
         self.total_docs = len(documents)
+        tokenized_docs = [self._tokenize(doc) for doc in documents]
 
-        # Zähle Wort- und Dokumentfrequenzen
-        for doc in documents:
-            words = self._tokenize(doc)
-            unique_words = set(words)
-
-            for word in words:
-                self.word_counts[word] += 1
-                self.vocab.add(word)
-
-            for word in unique_words:
+        # Zähle Dokumentfrequenzen und vergebe Spaltenindizes
+        for words in tokenized_docs:
+            for word in set(words):
                 self.doc_counts[word] += 1
+                if word not in self.vocabulary:
+                    self.vocabulary[word] = len(self.vocabulary)
+
+        # IDF einmalig vorberechnen (mit gemeinsamen Frequenzen sind die
+        # Scores verschiedener Shards vergleichbar)
+        shared = self.document_frequencies
+        if shared is not None:
+            self.total_docs = shared.total_docs
+        self.idf = np.zeros(len(self.vocabulary))
+        for word, column in self.vocabulary.items():
+            doc_count = self.doc_counts[word]
+            if shared is not None:
+                doc_count = shared.doc_counts.get(word, doc_count)
+            self.idf[column] = self._idf(doc_count)
+
+        # Dokument-Term-Matrix zeilenweise im CSR-Format aufbauen
+        self.doc_matrix = self._build_matrix(tokenized_docs)
+
+    def _idf(self, doc_count: int) -> float:
+        """IDF eines Terms, der in doc_count Dokumenten vorkommt"""
+        return np.log(self.total_docs / (doc_count + 1))
+
+    def _build_matrix(self, tokenized_docs: List[List[str]]) -> sparse.csr_matrix:
+        """Baut eine CSR-Matrix mit einer TF-IDF Zeile pro tokenisiertem Text"""
+        indptr = [0]
+        indices = []
+        data = []
+        for words in tokenized_docs:
+            columns, weights = self._term_weights(words)
+            indices.append(columns)
+            data.append(weights)
+            indptr.append(indptr[-1] + len(columns))
+
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+                np.array(indptr),
+            ),
+            shape=(len(tokenized_docs), len(self.vocabulary)),
+        )
 
-        # Erstelle Embeddings für jedes Dokument
-        for i, doc in enumerate(documents):
-            self.embeddings[i] = self._create_embedding(doc)
-
-    def _create_embedding(self, text: str) -> np.ndarray:
-        """Erstellt TF-IDF Embedding für Text"""
-        words = self._tokenize(text)
+    def _term_weights(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Berechnet normalisierte TF-IDF Gewichte nur für die Terme des Textes"""
         word_freq = defaultdict(int)
+        # Terme, die nur andere Shards kennen (bei gemeinsamen Frequenzen)
+        foreign_freq = defaultdict(int)
+        shared = self.document_frequencies
 
-        # Term Frequency
+        # Term Frequency (nur Terme aus dem Vokabular)
         for word in words:
-            word_freq[word] += 1
-
-        # TF-IDF Vektor erstellen
-        embedding = np.zeros(len(self.vocab))
-        vocab_list = list(self.vocab)
-
-        for i, word in enumerate(vocab_list):
-            if word in word_freq:
-                tf = word_freq[word] / len(words)
-                idf = np.log(self.total_docs / (self.doc_counts[word] + 1))
-                embedding[i] = tf * idf
-
-        # Normalisierung
-        norm = np.linalg.norm(embedding)
+            column = self.vocabulary.get(word)
+            if column is not None:
+                word_freq[column] += 1
+            elif shared is not None and word in shared.doc_counts:
+                foreign_freq[word] += 1
+
+        if not word_freq:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        columns = np.fromiter(word_freq.keys(), dtype=np.int32, count=len(word_freq))
+        tf = np.fromiter(word_freq.values(), dtype=float, count=len(word_freq))
+        weights = tf / len(words) * self.idf[columns]
+
+        # Normalisierung (fremde Terme zählen mit, wie in einem Gesamtindex)
+        norm = np.sqrt(
+            np.dot(weights, weights)
+            + sum(
+                (freq / len(words) * self._idf(shared.doc_counts[word])) ** 2
+                for word, freq in foreign_freq.items()
+            )
+        )
         if norm > 0:
-            embedding = embedding / norm
-
-        return embedding
+            weights = weights / norm
+
+        # Nullgewichte weglassen, Spalten sortiert halten (CSR-Konvention)
+        nonzero = weights != 0
+        columns, weights = columns[nonzero], weights[nonzero]
+        order = np.argsort(columns)
+        return columns[order], weights[order]
+
+    def _create_embedding(self, text: str) -> sparse.csr_matrix:
+        """Erstellt TF-IDF Embedding für Text als 1 x |Vokabular| CSR-Zeile"""
+        columns, weights = self._term_weights(self._tokenize(text))
+        return sparse.csr_matrix(
+            (weights, columns, np.array([0, len(columns)])),
+            shape=(1, len(self.vocabulary)),
+        )
 
-    def encode(self, text: str) -> np.ndarray:
+    def encode(self, text: str) -> sparse.csr_matrix:
         """Kodiert Text zu Embedding"""
         return self._create_embedding(text)
 
-    def similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
+    def encode_many(self, texts: List[str]) -> sparse.csr_matrix:
+        """Kodiert mehrere Texte zu einer Anfragen x Vokabular CSR-Matrix"""
+        return self._build_matrix([self._tokenize(text) for text in texts])
+
+    def similarity(self, emb1, emb2) -> float:
         """Berechnet Kosinus-Ähnlichkeit"""
-        return np.dot(emb1, emb2)
+        if sparse.issparse(emb1) or sparse.issparse(emb2):
+            return float(
+                sparse.csr_matrix(emb1).multiply(sparse.csr_matrix(emb2)).sum()
+            )
+        return float(np.dot(emb1, emb2))
 
 
 class SemanticRetriever:
     """Semantische Suche mit einfachen Embeddings"""
 
-    def __init__(self):
-        self.embedding_model = SimpleEmbedding()
+    def __init__(self, document_frequencies: Optional[DocumentFrequencies] = None):
+        self.embedding_model = SimpleEmbedding(document_frequencies)
         self.routes = []
-        self.route_embeddings = {}
+
+    def route_text(self, route: Dict[str, Any]) -> str:
+        """Umfassende Textrepräsentation einer Route für das Embedding"""
+        text_parts = [
+            route.get("title", ""),
+            route.get("description", ""),
+            f"Dauer: {route.get('duration', '')}",
+            f"Distanz: {route.get('distance', '')}",
+            f"Höhenmeter: {route.get('elevation_gain', '')}",
+            f"SAC: {route.get('sac_scale', '')}",
+            f"Restaurants: {', '.join(route.get('restaurants', []))}",
+            f"Highlights: {', '.join(route.get('highlights', []))}",
+        ]
+        return " ".join(filter(None, text_parts))
+
+    def count_documents(
+        self, routes: List[Dict[str, Any]], frequencies: DocumentFrequencies
+    ):
+        """Zählt die Routen zu gemeinsamen Dokumentfrequenzen hinzu"""
+        tokenize = self.embedding_model._tokenize
+        frequencies.add([tokenize(self.route_text(route)) for route in routes])
 
     def build_index(self, routes: List[Dict[str, Any]]):
         """Erstellt Index für semantische Suche"""
         self.routes = routes
 
-        # Erstelle umfassende Textrepräsentationen
-        route_texts = []
-        for route in routes:
-            text_parts = [
-                route.get("title", ""),
-                route.get("description", ""),
-                f"Dauer: {route.get('duration', '')}",
-                f"Distanz: {route.get('distance', '')}",
-                f"Höhenmeter: {route.get('elevation_gain', '')}",
-                f"SAC: {route.get('sac_scale', '')}",
-                f"Restaurants: {', '.join(route.get('restaurants', []))}",
-                f"Highlights: {', '.join(route.get('highlights', []))}",
-            ]
-            combined_text = " ".join(filter(None, text_parts))
-            route_texts.append(combined_text)
-
         # Trainiere Embedding-Modell
-        self.embedding_model.fit(route_texts)
+        self.embedding_model.fit([self.route_text(route) for route in routes])
 
         logger.info(f"Semantischer Index für {len(routes)} Routen erstellt")
 
-    def search(self, query: str, k: int = 10) -> List[Tuple[Dict, float]]:
-        """Semantische Suche"""
+    def _candidate_matrix(self, candidates: Optional[np.ndarray]):
+        """Dokument-Matrix, optional auf die Kandidaten-Zeilen eingeschränkt"""
+        if candidates is None:
+            return self.embedding_model.doc_matrix
+        return self.embedding_model.doc_matrix[candidates]
+
+    def _top_results(
+        self, scores: np.ndarray, k: int, candidates: Optional[np.ndarray]
+    ) -> List[Tuple[Dict, float]]:
+        """Wählt die Top-k und bildet Kandidaten-Positionen auf Routen ab"""
+        top = top_k_indices(scores, k)
+        positions = top if candidates is None else candidates[top]
+        return [(self.routes[i], float(scores[j])) for i, j in zip(positions, top)]
+
+    def search(
+        self, query: str, k: int = 10, candidates: Optional[np.ndarray] = None
+    ) -> List[Tuple[Dict, float]]:
+        """Semantische Suche (optional nur über die Kandidaten-Indizes)"""
         query_embedding = self.embedding_model.encode(query)
 
-        results = []
-        for i, route in enumerate(self.routes):
-            route_embedding = self.embedding_model.embeddings[i]
-            similarity = self.embedding_model.similarity(
-                query_embedding, route_embedding
-            )
-            results.append((route, similarity))
+        # Ein Sparse-Matrix-Vektor-Produkt bewertet alle Routen auf einmal
+        scores = (
+            (self._candidate_matrix(candidates) @ query_embedding.T).toarray().ravel()
+        )
 
-        # Sortiere nach Ähnlichkeit
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:k]
+        return self._top_results(scores, k, candidates)
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 10,
+        candidates: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[Dict, float]]]:
+        """Semantische Suche für mehrere Anfragen mit einem Matrixprodukt"""
+        query_matrix = self.embedding_model.encode_many(queries)
+
+        # Routen x Anfragen Score-Matrix, eine Spalte pro Anfrage
+        scores = (self._candidate_matrix(candidates) @ query_matrix.T).toarray()
+
+        return [self._top_results(column, k, candidates) for column in scores.T]
 
 
 class KeywordRetriever:
@@ -312,48 +622,80 @@ class KeywordRetriever:
 
     def __init__(self):
         self.routes = []
-        self.route_texts = []
+        self.token_set_sizes = []
+        # Invertierter Index: Term -> aufsteigende Liste von Routen-Indizes
+        self.inverted_index: Dict[str, List[int]] = {}
+
+    def route_text(self, route: Dict[str, Any]) -> str:
+        """Kleingeschriebene Textrepräsentation einer Route für die Keyword-Suche"""
+        text_parts = [
+            route.get("title", ""),
+            route.get("description", ""),
+            route.get("duration", ""),
+            route.get("distance", ""),
+            route.get("sac_scale", ""),
+            " ".join(route.get("restaurants", [])),
+            " ".join(route.get("highlights", [])),
+        ]
+        return " ".join(filter(None, text_parts)).lower()
+
+    @property
+    def route_texts(self) -> List[str]:
+        """Textrepräsentationen aller Routen (nur für Aufbau und Tests)"""
+        return [self.route_text(route) for route in self.routes]
 
     def build_index(self, routes: List[Dict[str, Any]]):
         """Erstellt Keyword-Index"""
         self.routes = routes
 
-        self.route_texts = []
-        for route in routes:
-            text_parts = [
-                route.get("title", ""),
-                route.get("description", ""),
-                route.get("duration", ""),
-                route.get("distance", ""),
-                route.get("sac_scale", ""),
-                " ".join(route.get("restaurants", [])),
-                " ".join(route.get("highlights", [])),
-            ]
-            combined_text = " ".join(filter(None, text_parts)).lower()
-            self.route_texts.append(combined_text)
+        # Token-Mengen und Posting-Listen einmalig vorberechnen
+        self.token_set_sizes = []
+        inverted_index = defaultdict(list)
+        for i, text in enumerate(self.route_texts):
+            text_words = set(text.split())
+            self.token_set_sizes.append(len(text_words))
+            for word in text_words:
+                inverted_index[word].append(i)
+        self.inverted_index = dict(inverted_index)
 
         logger.info(f"Keyword-Index für {len(routes)} Routen erstellt")
 
-    def search(self, query: str, k: int = 10) -> List[Tuple[Dict, float]]:
-        """Keyword-Suche"""
+    def search(
+        self, query: str, k: int = 10, candidates: Optional[np.ndarray] = None
+    ) -> List[Tuple[Dict, float]]:
+        """Keyword-Suche (optional nur über die Kandidaten-Indizes)"""
         query_words = set(query.lower().split())
 
-        results = []
-        for i, (route, text) in enumerate(zip(self.routes, self.route_texts)):
-            text_words = set(text.split())
+        allowed = None
+        if candidates is not None:
+            allowed = np.zeros(len(self.routes), dtype=bool)
+            allowed[candidates] = True
 
-            # Berechne Jaccard-Ähnlichkeit
-            intersection = len(query_words & text_words)
-            union = len(query_words | text_words)
+        # Schnittmengen nur für Routen mit mindestens einem gemeinsamen Term
+        intersections = defaultdict(int)
+        for word in query_words:
+            for i in self.inverted_index.get(word, ()):
+                if allowed is None or allowed[i]:
+                    intersections[i] += 1
 
-            if union > 0:
-                similarity = intersection / union
-                if similarity > 0:
-                    results.append((route, similarity))
+        results = []
+        for i, intersection in intersections.items():
+            # Berechne Jaccard-Ähnlichkeit über vorberechnete Mengengrössen
+            union = len(query_words) + self.token_set_sizes[i] - intersection
+            results.append((i, intersection / union))
 
-        # Sortiere nach Ähnlichkeit
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:k]
+        # Top-k nach Ähnlichkeit, bei Gleichstand in Routen-Reihenfolge
+        top_results = heapq.nsmallest(k, results, key=lambda x: (-x[1], x[0]))
+        return [(self.routes[i], similarity) for i, similarity in top_results]
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 10,
+        candidates: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[Dict, float]]]:
+        """Keyword-Suche für mehrere Anfragen"""
+        return [self.search(query, k=k, candidates=candidates) for query in queries]
 
 
 class PreferenceReRanker:
@@ -372,10 +714,75 @@ class PreferenceReRanker:
             "anspruchsvoll": (600, 2000),  # 600m+
         }
 
+    def build_attributes(self, routes: List[Dict[str, Any]]) -> RouteAttributes:
+        """Parst die numerischen Routen-Attribute einmalig in eine Spaltentabelle"""
+
+        def column(values, dtype=float) -> np.ndarray:
+            return np.array(
+                [np.nan if value is None else value for value in values], dtype=dtype
+            )
+
+        return RouteAttributes(
+            hours=column(self._extract_hours(r.get("duration", "")) for r in routes),
+            ascent_m=column(
+                self._extract_elevation(r.get("elevation_gain", "")) for r in routes
+            ),
+            descent_m=column(
+                self._extract_elevation(r.get("elevation_loss", "")) for r in routes
+            ),
+            distance_km=column(
+                self._extract_distance(r.get("distance", "")) for r in routes
+            ),
+            sac_levels=column(
+                (self._extract_sac_levels(r.get("sac_scale", "")) for r in routes),
+                dtype=np.uint8,
+            ),
+            restaurant_count=column(
+                (len(r.get("restaurants") or []) for r in routes), dtype=np.int16
+            ),
+        )
+
+    def score_routes(
+        self,
+        attributes: RouteAttributes,
+        query: HikingQuery,
+        indices: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Berechnet Präferenz-Scores vektorisiert für alle bzw. ausgewählte Routen"""
+        if indices is None:
+            indices = slice(None)
+
+        scores = np.zeros(len(attributes.hours[indices]))
+
+        # Schwierigkeitsgrad: Stufe irgendwo in der Angabe (z.B. T3 in "T2-T3")
+        if query.difficulty_preference:
+            target = self._sac_bit(query.difficulty_preference)
+            scores += 0.3 * ((attributes.sac_levels[indices] & target) != 0)
+
+        # Dauer
+        if query.duration_preference:
+            hours = attributes.hours[indices]
+            low, high = self.duration_mapping.get(query.duration_preference, (0, 10))
+            scores += 0.3 * ((low <= hours) & (hours <= high))
+
+        # Höhenmeter (0 m zählt wie eine fehlende Angabe)
+        if query.elevation_preference:
+            ascent = attributes.ascent_m[indices]
+            low, high = self.elevation_mapping.get(
+                query.elevation_preference, (0, 2000)
+            )
+            scores += 0.2 * ((ascent > 0) & (low <= ascent) & (ascent <= high))
+
+        # Restaurant-Anforderung
+        if query.restaurant_required:
+            scores += 0.2 * (attributes.restaurant_count[indices] > 0)
+
+        return scores
+
     def calculate_preference_score(
         self, route: Dict[str, Any], query: HikingQuery
     ) -> float:
-        """Berechnet Präferenz-Score"""
+        """Berechnet Präferenz-Score für eine einzelne Route (wie score_routes)"""
         score = 0.0
 
         # Schwierigkeitsgrad
@@ -386,29 +793,27 @@ class PreferenceReRanker:
 
         # Dauer
         if query.duration_preference:
-            duration_str = route.get("duration", "")
-            duration_hours = self._extract_hours(duration_str)
+            duration_hours = self._extract_hours(route.get("duration", ""))
             if duration_hours:
-                target_range = self.duration_mapping.get(
+                low, high = self.duration_mapping.get(
                     query.duration_preference, (0, 10)
                 )
-                if target_range[0] <= duration_hours <= target_range[1]:
+                if low <= duration_hours <= high:
                     score += 0.3
 
         # Höhenmeter
         if query.elevation_preference:
-            elevation_str = route.get("elevation_gain", "")
-            elevation_meters = self._extract_elevation(elevation_str)
+            elevation_meters = self._extract_elevation(route.get("elevation_gain", ""))
             if elevation_meters:
-                target_range = self.elevation_mapping.get(
+                low, high = self.elevation_mapping.get(
                     query.elevation_preference, (0, 2000)
                 )
-                if target_range[0] <= elevation_meters <= target_range[1]:
+                if low <= elevation_meters <= high:
                     score += 0.2
 
         # Restaurant-Anforderung
         if query.restaurant_required:
-            if route.get("restaurants") and len(route["restaurants"]) > 0:
+            if route.get("restaurants"):
                 score += 0.2
 
         return score
@@ -436,67 +841,394 @@ class PreferenceReRanker:
         match = re.search(r"(\d+)", elevation_str)
         return int(match.group(1)) if match else None
 
+    def _extract_distance(self, distance_str: str) -> Optional[float]:
+        """Extrahiert Distanz in Kilometern"""
+        if not distance_str:
+            return None
+
+        match = re.search(
+            r"(\d+(?:[.,]\d+)?)\s*(?:km|Kilometer)", distance_str, re.IGNORECASE
+        )
+        return float(match.group(1).replace(",", ".")) if match else None
+
+    def _extract_sac_levels(self, sac_str: str) -> int:
+        """Bitmaske aller in der SAC-Angabe enthaltenen Stufen T1-T6"""
+        sac_upper = (sac_str or "").upper()
+        return sum(1 << level for level in range(1, 7) if f"T{level}" in sac_upper)
+
+    @staticmethod
+    def _sac_bit(difficulty: str) -> int:
+        """Bit einer SAC-Präferenz ("T1"-"T6"), 0 für andere Angaben"""
+        match = re.fullmatch(r"T([1-6])", difficulty.strip().upper())
+        return 1 << int(match.group(1)) if match else 0
+
+
+@dataclass
+class IndexState:
+    """Routen und Indizes eines Ladevorgangs (wird beim Neuladen als Ganzes ersetzt)"""
+
+    route_store: RouteStore
+    # Kompakte Routen ohne grosse Felder (siehe route_store.HEAVY_FIELDS)
+    routes: List[Dict[str, Any]]
+    routes_hash: str
+    route_positions: Dict[str, int]
+    route_attributes: RouteAttributes
+    filter_index: RouteFilterIndex
+    semantic_retriever: SemanticRetriever
+    keyword_retriever: KeywordRetriever
+    generation: int = 0
+
+    @property
+    def version(self) -> str:
+        """Routen-Hash + Neuaufbau-Zähler"""
+        return f"{self.routes_hash[:12]}:{self.generation}"
+
 
 class AppenzellHikingRAG:
     """Haupt-RAG System für Appenzeller Wanderungen"""
 
-    def __init__(self, routes_file: str = "appenzell_routes_clean.json"):
+    def __init__(
+        self,
+        routes_file: str = "appenzell_routes_clean.json",
+        use_index_snapshot: bool = True,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = 3600,
+        enable_tracing: bool = True,
+        document_frequencies: Optional[DocumentFrequencies] = None,
+    ):
         self.routes_file = routes_file
-        self.routes = []
+        # Gemeinsame IDF mehrerer Kataloge (None = IDF der eigenen Routen)
+        self.document_frequencies = document_frequencies
+        # Aktueller Stand; Anfragen lesen ihn einmal, reload() ersetzt ihn atomar
+        self.state: Optional[IndexState] = None
+        self.use_index_snapshot = use_index_snapshot
+        # (Grösse, mtime) der Routen-Datei beim letzten Laden
+        self.routes_signature: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.RLock()
 
         # Initialisiere Komponenten
         self.query_expander = QueryExpander()
-        self.semantic_retriever = SemanticRetriever()
-        self.keyword_retriever = KeywordRetriever()
         self.reranker = PreferenceReRanker()
+        self.result_cache = LRUCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.tracer = SpanRecorder(enabled=enable_tracing)
 
         # Lade und indexiere Routen
-        self._load_routes()
-        self._build_indices()
-
-    def _load_routes(self):
-        """Lädt Wanderrouten aus JSON-Datei"""
+        self.reload()
+
+    # Lesezugriff auf den aktuellen Stand
+    @property
+    def route_store(self) -> RouteStore:
+        return self.state.route_store
+
+    @property
+    def routes(self) -> List[Dict[str, Any]]:
+        return self.state.routes
+
+    @property
+    def routes_hash(self) -> str:
+        return self.state.routes_hash
+
+    @property
+    def route_positions(self) -> Dict[str, int]:
+        return self.state.route_positions
+
+    @property
+    def route_attributes(self) -> RouteAttributes:
+        return self.state.route_attributes
+
+    @property
+    def filter_index(self) -> RouteFilterIndex:
+        return self.state.filter_index
+
+    @property
+    def semantic_retriever(self) -> SemanticRetriever:
+        return self.state.semantic_retriever
+
+    @property
+    def keyword_retriever(self) -> KeywordRetriever:
+        return self.state.keyword_retriever
+
+    @property
+    def index_generation(self) -> int:
+        return self.state.generation if self.state is not None else 0
+
+    @property
+    def index_version(self) -> str:
+        """Version des aktuellen Index (Routen-Hash + Neuaufbau-Zähler)"""
+        return self.state.version
+
+    def reload(self):
+        """Lädt die Routen neu und baut die Indizes auf (leert den Ergebnis-Cache)
+
+        Der neue Stand wird vollständig aufgebaut und dann mit einer Zuweisung
+        übernommen; laufende Anfragen arbeiten mit dem alten Stand weiter.
+        """
+        with self._reload_lock:
+            signature = self._routes_file_signature()
+            state = self._load_routes()
+            if not (self.use_index_snapshot and self._load_index_snapshot(state)):
+                self._build_indices(state)
+                if self.use_index_snapshot:
+                    self._save_index_snapshot(state)
+
+            # Neuer Index -> alte Cache-Einträge sind ungültig (neue Version)
+            state.generation = self.index_generation + 1
+            self.state = state
+            self.routes_signature = signature
+            self.result_cache.clear()
+
+    def _routes_file_signature(self) -> Optional[Tuple[int, int]]:
+        """(Grösse, mtime in ns) der Routen-Datei, None falls nicht lesbar"""
         try:
-            with open(self.routes_file, "r", encoding="utf-8") as f:
-                self.routes = json.load(f)
-            logger.info(f"✅ {len(self.routes)} Appenzeller Routen geladen")
+            stat = os.stat(self.routes_file)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _reload_if_changed(self):
+        """Baut die Indizes neu auf, wenn sich die Routen-Datei geändert hat"""
+        signature = self._routes_file_signature()
+        if signature is None or signature == self.routes_signature:
+            return
+
+        with self._reload_lock:
+            if self._routes_file_signature() != self.routes_signature:
+                logger.info(f"🔄 Routen-Datei geändert, lade neu: {self.routes_file}")
+                try:
+                    self.reload()
+                except (OSError, ValueError) as e:
+                    # z.B. Datei wird gerade geschrieben: alten Stand weiter nutzen
+                    logger.warning(f"⚠️ Neuladen fehlgeschlagen, nutze alten Stand: {e}")
+
+    def _load_routes(self) -> IndexState:
+        """Lädt Wanderrouten aus dem JSONL Routen-Store (JSON wird konvertiert)"""
+        try:
+            route_store = RouteStore.open(self.routes_file)
         except FileNotFoundError:
             logger.error(f"❌ Routen-Datei nicht gefunden: {self.routes_file}")
             raise
 
-    def _build_indices(self):
+        routes = list(route_store.iter_compact())
+        route_attributes = self.reranker.build_attributes(routes)
+        state = IndexState(
+            route_store=route_store,
+            routes=routes,
+            routes_hash=route_store.sha256,
+            route_positions={route["id"]: i for i, route in enumerate(routes)},
+            route_attributes=route_attributes,
+            filter_index=RouteFilterIndex(
+                routes,
+                route_attributes,
+                self.reranker.duration_mapping,
+                self.reranker.elevation_mapping,
+            ),
+            semantic_retriever=SemanticRetriever(self.document_frequencies),
+            keyword_retriever=KeywordRetriever(),
+        )
+        logger.info(f"✅ {len(routes)} Appenzeller Routen geladen")
+        return state
+
+    def _build_indices(self, state: IndexState):
         """Erstellt alle Retrieval-Indizes"""
         logger.info("🔧 Erstelle Retrieval-Indizes...")
-        self.semantic_retriever.build_index(self.routes)
-        self.keyword_retriever.build_index(self.routes)
+        state.semantic_retriever.build_index(state.routes)
+        state.keyword_retriever.build_index(state.routes)
         logger.info("✅ Alle Indizes erfolgreich erstellt")
 
-    def retrieve(self, query: str, k: int = 5) -> List[RetrievalResult]:
-        """Haupt-Retrieval-Funktion mit Hybrid-Ansatz"""
+    def _snapshot_hash(self, state: IndexState) -> str:
+        """Routen-Hash, bei gemeinsamer IDF ergänzt um deren Fingerabdruck"""
+        if self.document_frequencies is None:
+            return state.routes_hash
+        return f"{state.routes_hash}:{self.document_frequencies.fingerprint}"
+
+    def _load_index_snapshot(self, state: Optional[IndexState] = None) -> bool:
+        """Lädt die Indizes aus dem Snapshot, falls der Routen-Hash passt"""
+        state = state or self.state
+        snapshot = IndexSnapshot(snapshot_dir_for(self.routes_file))
+        try:
+            loaded = snapshot.load(
+                self._snapshot_hash(state),
+                state.routes,
+                state.semantic_retriever,
+                state.keyword_retriever,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Index-Snapshot unbrauchbar, baue neu auf: {e}")
+            return False
+
+        if loaded:
+            logger.info(f"⚡ Indizes aus Snapshot geladen: {snapshot.directory}")
+        return loaded
+
+    def _save_index_snapshot(self, state: Optional[IndexState] = None):
+        """Speichert die Indizes als Snapshot neben der Routen-Datei"""
+        state = state or self.state
+        snapshot = IndexSnapshot(snapshot_dir_for(self.routes_file))
+        try:
+            snapshot.save(
+                self._snapshot_hash(state),
+                state.semantic_retriever,
+                state.keyword_retriever,
+            )
+        except OSError as e:
+            logger.warning(f"⚠️ Index-Snapshot konnte nicht gespeichert werden: {e}")
+
+    def _filter_candidates(
+        self, state: IndexState, filters: Optional[RouteFilters]
+    ) -> Optional[np.ndarray]:
+        """Kandidaten-Indizes aus den Filter-Bitmaps (None = alle Routen)"""
+        if filters is None:
+            return None
+
+        with self.tracer.span("filter"):
+            candidates = state.filter_index.candidates(filters)
+        logger.info(f"🧮 Filter: {len(candidates)}/{len(state.routes)} Routen übrig")
+        return candidates
+
+    @staticmethod
+    def _cache_key(
+        state: IndexState, query: str, k: int, filters: Optional[RouteFilters]
+    ) -> Tuple[str, int, str, str]:
+        """Cache-Schlüssel aus normalisierter Anfrage, k, Filtern und Index-Version"""
+        normalized_query = " ".join(query.lower().split())
+        return (normalized_query, k, repr(filters), state.version)
+
+    def retrieve(
+        self, query: str, k: int = 5, filters: Optional[RouteFilters] = None
+    ) -> List[RetrievalResult]:
+        """Haupt-Retrieval-Funktion mit Hybrid-Ansatz (mit LRU-Cache)"""
+        self._reload_if_changed()
+        state = self.state  # ein Stand für die ganze Anfrage
+        with self.tracer.trace("retrieve") as trace:
+            cache_key = self._cache_key(state, query, k, filters)
+            with self.tracer.span("cache"):
+                results = self.result_cache.get(cache_key)
+
+            if results is not None:
+                logger.info(f"⚡ Cache-Treffer für Anfrage: {query}")
+            else:
+                results = self._retrieve_uncached(state, query, k, filters)
+                self.result_cache.put(cache_key, results)
+
+        return self._with_timings(results, trace)
+
+    @staticmethod
+    def _with_timings(results: List[RetrievalResult], trace) -> List[RetrievalResult]:
+        """Kopien der (ggf. gecachten) Ergebnisse mit der Zeit-Aufschlüsselung"""
+        if trace is None:
+            return list(results)
+        return [replace(result, timings=trace.timings) for result in results]
+
+    def _retrieve_uncached(
+        self,
+        state: IndexState,
+        query: str,
+        k: int,
+        filters: Optional[RouteFilters],
+    ) -> List[RetrievalResult]:
+        """Retrieval-Pipeline ohne Cache"""
+
+        # 0. Optionales Pre-Filtering über Bitmaps
+        candidates = self._filter_candidates(state, filters)
+        if candidates is not None and len(candidates) == 0:
+            return []
 
         # 1. Query Expansion
-        expanded_query = self.query_expander.expand_query(query)
+        with self.tracer.span("expand"):
+            expanded_query = self.query_expander.expand_query(query)
         logger.info(f"🔍 Erweiterte Anfrage: {expanded_query.expanded_query[:100]}...")
 
         # 2. Semantische Suche
-        semantic_results = self.semantic_retriever.search(
-            expanded_query.expanded_query, k=k * 2
-        )
+        with self.tracer.span("semantic"):
+            semantic_results = state.semantic_retriever.search(
+                expanded_query.expanded_query, k=k * 2, candidates=candidates
+            )
 
         # 3. Keyword-Suche
-        keyword_results = self.keyword_retriever.search(
-            expanded_query.expanded_query, k=k * 2
-        )
+        with self.tracer.span("keyword"):
+            keyword_results = state.keyword_retriever.search(
+                expanded_query.expanded_query, k=k * 2, candidates=candidates
+            )
 
         # 4. Kombiniere und re-ranke Ergebnisse
         combined_results = self._combine_results(
-            semantic_results, keyword_results, expanded_query, k
+            state, semantic_results, keyword_results, expanded_query, k
         )
 
         return combined_results
 
+    def retrieve_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filters: Optional[RouteFilters] = None,
+    ) -> List[List[RetrievalResult]]:
+        """Batch-Retrieval: bewertet alle Anfragen mit einem Anfragen x Routen Produkt"""
+        self._reload_if_changed()
+        state = self.state  # ein Stand für den ganzen Batch
+        with self.tracer.trace("retrieve_many") as trace:
+            cache_keys = [
+                self._cache_key(state, query, k, filters) for query in queries
+            ]
+            with self.tracer.span("cache"):
+                batch_results = [self.result_cache.get(key) for key in cache_keys]
+
+            # Nur Cache-Misses gemeinsam berechnen
+            missing = [i for i, results in enumerate(batch_results) if results is None]
+            if missing:
+                computed = self._retrieve_many_uncached(
+                    state, [queries[i] for i in missing], k, filters
+                )
+                for i, results in zip(missing, computed):
+                    self.result_cache.put(cache_keys[i], results)
+                    batch_results[i] = results
+
+        return [self._with_timings(results, trace) for results in batch_results]
+
+    def _retrieve_many_uncached(
+        self,
+        state: IndexState,
+        queries: List[str],
+        k: int,
+        filters: Optional[RouteFilters],
+    ) -> List[List[RetrievalResult]]:
+        """Batch-Retrieval-Pipeline ohne Cache"""
+
+        # 0. Optionales Pre-Filtering (gilt für den ganzen Batch)
+        candidates = self._filter_candidates(state, filters)
+        if candidates is not None and len(candidates) == 0:
+            return [[] for _ in queries]
+
+        # 1. Query Expansion für alle Anfragen
+        with self.tracer.span("expand"):
+            expanded_queries = [self.query_expander.expand_query(q) for q in queries]
+        expanded_texts = [q.expanded_query for q in expanded_queries]
+
+        # 2. Semantische Suche (ein Matrixprodukt für den ganzen Batch)
+        with self.tracer.span("semantic"):
+            semantic_batches = state.semantic_retriever.search_many(
+                expanded_texts, k=k * 2, candidates=candidates
+            )
+
+        # 3. Keyword-Suche
+        with self.tracer.span("keyword"):
+            keyword_batches = state.keyword_retriever.search_many(
+                expanded_texts, k=k * 2, candidates=candidates
+            )
+
+        # 4. Kombiniere und re-ranke Ergebnisse pro Anfrage
+        return [
+            self._combine_results(
+                state, semantic_results, keyword_results, expanded_query, k
+            )
+            for semantic_results, keyword_results, expanded_query in zip(
+                semantic_batches, keyword_batches, expanded_queries
+            )
+        ]
+
     def _combine_results(
         self,
+        state: IndexState,
         semantic_results: List[Tuple],
         keyword_results: List[Tuple],
         query: HikingQuery,
@@ -504,7 +1236,38 @@ class AppenzellHikingRAG:
     ) -> List[RetrievalResult]:
         """Kombiniert und re-ranked Ergebnisse verschiedener Retriever"""
 
-        # Sammle Scores für jede Route
+        with self.tracer.span("merge"):
+            route_scores = self._merge_scores(semantic_results, keyword_results)
+
+        # Präferenz-Scores für alle Kandidaten auf einmal aus der Attribut-Tabelle
+        with self.tracer.span("rerank"):
+            candidate_positions = np.array(
+                [state.route_positions[route_id] for route_id in route_scores],
+                dtype=np.intp,
+            )
+            preference_scores = self.reranker.score_routes(
+                state.route_attributes, query, candidate_positions
+            )
+
+        # Berechne finale Scores und Erklärungen
+        with self.tracer.span("explain"):
+            results = self._score_results(route_scores, preference_scores, query, k)
+
+        # Nur die finalen Top-k vollständig (inkl. raw_text) aus dem Store lesen
+        with self.tracer.span("hydrate"):
+            full_routes = state.route_store.get_many(
+                [state.route_positions[result.route["id"]] for result in results]
+            )
+        for result, route in zip(results, full_routes):
+            result.route = route
+
+        return results
+
+    @staticmethod
+    def _merge_scores(
+        semantic_results: List[Tuple], keyword_results: List[Tuple]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Sammelt semantische und Keyword-Scores pro Route"""
         route_scores = {}
 
         # Semantische Ergebnisse hinzufügen
@@ -535,15 +1298,24 @@ class AppenzellHikingRAG:
                     route_scores[route_id]["keyword_score"], score
                 )
 
-        # Berechne finale Scores
+        return route_scores
+
+    def _score_results(
+        self,
+        route_scores: Dict[str, Dict[str, Any]],
+        preference_scores: np.ndarray,
+        query: HikingQuery,
+        k: int,
+    ) -> List[RetrievalResult]:
+        """Gewichtete finale Scores mit Erklärung, sortiert und auf k gekürzt"""
         results = []
-        for route_data in route_scores.values():
+        for route_data, preference_score in zip(
+            route_scores.values(), preference_scores
+        ):
             route = route_data["route"]
             semantic_score = route_data["semantic_score"]
             keyword_score = route_data["keyword_score"]
-
-            # Präferenz-Score
-            preference_score = self.reranker.calculate_preference_score(route, query)
+            preference_score = float(preference_score)
 
             # Gewichteter finaler Score
             final_score = (
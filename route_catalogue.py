@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Multi-Katalog Index für Wanderrouten
+====================================
+
+Führt mehrere Routen-Quellen (Appenzeller Wanderführer, ZKB-Wanderguides)
+in einem gemeinsamen Suchindex zusammen. Jede Quelle wird normalisiert
+(stabile ID, Spalten source/region) und als eigener Shard indexiert; alle
+Shards nutzen dieselbe IDF, damit ihre Scores vergleichbar sind. Eine
+Anfrage fragt die gewählten Shards ab und führt deren Top-k zusammen.
+"""
+
+import hashlib
+import heapq
+import logging
+import os
+from dataclasses import replace
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from rag_hiking_system import (
+    AppenzellHikingRAG,
+    DocumentFrequencies,
+    RetrievalResult,
+    RouteFilters,
+    SemanticRetriever,
+)
+from route_store import RouteStore
+
+logger = logging.getLogger(__name__)
+
+# Standard-Kataloge: Name -> Routen-Datei
+DEFAULT_CATALOGUES = {
+    "appenzell": "appenzell_routes_clean.json",
+    "zkb": "zkb_routes.json",
+}
+
+
+def stable_route_id(source: str, route: Dict[str, Any]) -> str:
+    """Inhaltsbasierte ID (gleich bei erneuter Extraktion derselben Route)"""
+    key = "|".join(
+        [
+            source,
+            route.get("source_pdf", ""),
+            route.get("title", ""),
+            route.get("description", "")[:200],
+        ]
+    )
+    return f"{source}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}"
+
+
+def normalize_routes(source: str, routes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ergänzt ID, Quelle und Region für den gemeinsamen Index"""
+    normalized = []
+    seen_ids = set()
+
+    for route in routes:
+        route = dict(route)
+
+        # ZKB-Routen führen die PDF im Feld "source"
+        if "source" in route and "source_pdf" not in route:
+            route["source_pdf"] = route["source"]
+        route["source"] = source
+        route.setdefault("region", "")
+
+        # Vorhandene IDs behalten, sonst stabile ID erzeugen
+        route_id = route.get("id") or stable_route_id(source, route)
+        base_id, occurrence = route_id, 1
+        while route_id in seen_ids:
+            occurrence += 1
+            route_id = f"{base_id}-{occurrence}"
+        seen_ids.add(route_id)
+        route["id"] = route_id
+
+        normalized.append(route)
+
+    return normalized
+
+
+def prepare_catalogue(source: str, routes_file: str, catalogue_dir: str) -> str:
+    """Schreibt den normalisierten Shard als JSONL (nur bei Änderungen)"""
+    shard_file = os.path.join(catalogue_dir, f"{source}.jsonl")
+
+    if not os.path.exists(shard_file) or os.path.getmtime(
+        shard_file
+    ) <= os.path.getmtime(routes_file):
+        os.makedirs(catalogue_dir, exist_ok=True)
+        routes = list(RouteStore.open(routes_file))
+        RouteStore.write(normalize_routes(source, routes), shard_file)
+        logger.info(f"📚 Katalog {source}: {len(routes)} Routen normalisiert")
+
+    return shard_file
+
+
+def shared_document_frequencies(shard_files: List[str]) -> DocumentFrequencies:
+    """Dokumentfrequenzen über alle Shards (eine IDF für den ganzen Katalog)"""
+    frequencies = DocumentFrequencies()
+    retriever = SemanticRetriever()
+    for shard_file in shard_files:
+        store = RouteStore.open(shard_file)
+        try:
+            retriever.count_documents(list(store.iter_compact()), frequencies)
+        finally:
+            store.close()
+    return frequencies
+
+
+class MultiCatalogueRAG:
+    """Gemeinsame Suche über mehrere Routen-Kataloge (ein Index-Shard pro Quelle)"""
+
+    def __init__(
+        self,
+        catalogues: Optional[Dict[str, str]] = None,
+        catalogue_dir: str = ".catalogue",
+        use_index_snapshot: bool = True,
+    ):
+        self.catalogues = catalogues or DEFAULT_CATALOGUES
+        self.catalogue_dir = catalogue_dir
+        self.shards: Dict[str, AppenzellHikingRAG] = {}
+
+        shard_files = {}
+        for source, routes_file in self.catalogues.items():
+            if not os.path.exists(routes_file):
+                logger.warning(f"⚠️ Katalog {source} nicht gefunden: {routes_file}")
+                continue
+            shard_files[source] = prepare_catalogue(source, routes_file, catalogue_dir)
+
+        # Pro Shard eigene IDF wäre nicht vergleichbar (z.B. 27 vs. 900 Routen)
+        self.document_frequencies = shared_document_frequencies(
+            list(shard_files.values())
+        )
+        for source, shard_file in shard_files.items():
+            self.shards[source] = AppenzellHikingRAG(
+                shard_file,
+                use_index_snapshot=use_index_snapshot,
+                document_frequencies=self.document_frequencies,
+            )
+
+        logger.info(
+            f"✅ {len(self)} Routen aus {len(self.shards)} Katalogen "
+            f"({', '.join(self.shards)})"
+        )
+
+    def __len__(self) -> int:
+        return sum(len(shard.routes) for shard in self.shards.values())
+
+    @property
+    def routes(self) -> List[Dict[str, Any]]:
+        """Kompakte Routen aller Kataloge in Shard-Reihenfolge"""
+        return [route for shard in self.shards.values() for route in shard.routes]
+
+    def _selected_shards(
+        self, sources: Optional[List[str]]
+    ) -> List[AppenzellHikingRAG]:
+        if sources is None:
+            return list(self.shards.values())
+
+        unknown = set(sources) - set(self.shards)
+        if unknown:
+            raise ValueError(f"Unbekannte Kataloge: {sorted(unknown)}")
+        return [self.shards[source] for source in sources]
+
+    def _shard_plan(
+        self, filters: Optional[RouteFilters], sources: Optional[List[str]]
+    ) -> List[Tuple[AppenzellHikingRAG, Optional[RouteFilters]]]:
+        """Shards mit ihren Filtern; Regionen nur an Shards, die sie kennen"""
+        shards = self._selected_shards(sources)
+        if filters is None or not filters.regions:
+            return [(shard, filters) for shard in shards]
+
+        regions = (
+            [filters.regions] if isinstance(filters.regions, str) else filters.regions
+        )
+        known = set().union(*(shard.filter_index.regions for shard in shards))
+        unknown = [region for region in regions if region.lower() not in known]
+        if unknown:
+            raise ValueError(f"Unbekannter Filterwert für Region: {unknown}")
+
+        plan = []
+        for shard in shards:
+            shard_regions = [
+                region
+                for region in regions
+                if region.lower() in shard.filter_index.regions
+            ]
+            if shard_regions:
+                plan.append((shard, replace(filters, regions=shard_regions)))
+        return plan
+
+    @staticmethod
+    def _merge_top_k(
+        shard_results: List[List[RetrievalResult]], k: int
+    ) -> List[RetrievalResult]:
+        """Führt die absteigend sortierten Top-k der Shards zusammen"""
+        merged = heapq.merge(*shard_results, key=lambda result: -result.final_score)
+        return list(islice(merged, k))
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[RouteFilters] = None,
+        sources: Optional[List[str]] = None,
+    ) -> List[RetrievalResult]:
+        """Top-k über alle (oder die gewählten) Kataloge"""
+        shard_results = [
+            shard.retrieve(query, k=k, filters=shard_filters)
+            for shard, shard_filters in self._shard_plan(filters, sources)
+        ]
+        return self._merge_top_k(shard_results, k)
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filters: Optional[RouteFilters] = None,
+        sources: Optional[List[str]] = None,
+    ) -> List[List[RetrievalResult]]:
+        """Batch-Retrieval: ein Batch pro Shard, danach Merge pro Anfrage"""
+        shard_batches = [
+            shard.retrieve_many(queries, k=k, filters=shard_filters)
+            for shard, shard_filters in self._shard_plan(filters, sources)
+        ]
+        return [
+            self._merge_top_k([batch[i] for batch in shard_batches], k)
+            for i in range(len(queries))
+        ]
+
+
+def main():
+    """Demo der Multi-Katalog Suche"""
+
+    catalogue = MultiCatalogueRAG()
+    for query in ["Einfache Wanderung mit Restaurant", "Bergtour im Kanton Bern"]:
+        print(f"\n🔍 {query}")
+        for result in catalogue.retrieve(query, k=5):
+            route = result.route
+            print(
+                f"   [{route['source']}] {route['title'][:60]} "
+                f"({route.get('region', '')}, Score {result.final_score:.2f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
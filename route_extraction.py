@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Feld-Extraktion für die PDF-Prozessoren
+==================================================
+
+Alle Regex-Muster für Dauer, Distanz, Höhenmeter, SAC-Skala, Restaurants
+und Highlights werden einmalig beim Import kompiliert. Muster mit einem
+seltenen Pflicht-Literal (z.B. "aufstieg", "restaurant") werden nur
+ausgeführt, wenn das Literal im kleingeschriebenen Text vorkommt. Die
+Ergebnisse sind identisch mit der bisherigen Extraktion pro Methode.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Zeichen, bei denen IGNORECASE anders faltet als str.lower() -> keine Gates
+_GATE_UNSAFE_CHARS = ("\u017f", "\u0131", "\u0130", "\u212a")
+
+
+class TextBlock:
+    """Einmal vorbereiteter Text (Kleinschreibung, Zeilen) für alle Felder"""
+
+    def __init__(self, text: str, use_gates: bool = True):
+        self.text = text
+        self.lower = text.lower()
+        self.gates_enabled = use_gates and not any(
+            c in text for c in _GATE_UNSAFE_CHARS
+        )
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.split("\n")
+        return self._lines
+
+    def may_contain(self, literals: Optional[Sequence[str]]) -> bool:
+        """False nur falls sicher keines der Literale vorkommt"""
+        if not literals or not self.gates_enabled:
+            return True
+        return any(literal in self.lower for literal in literals)
+
+
+class PatternBank:
+    """Vorkompilierte Muster in Prioritätsreihenfolge mit optionalem Literal-Gate"""
+
+    def __init__(
+        self,
+        patterns: Sequence[Tuple[str, Optional[Sequence[str]]]],
+        flags: int = re.IGNORECASE,
+    ):
+        self.entries = [
+            (re.compile(pattern, flags), gate) for pattern, gate in patterns
+        ]
+
+    def first_match(self, block: TextBlock) -> Optional[re.Match]:
+        """Treffer des ersten Musters (in Reihenfolge), das irgendwo passt"""
+        for compiled, gate in self.entries:
+            if not block.may_contain(gate):
+                continue
+            match = compiled.search(block.text)
+            if match:
+                return match
+        return None
+
+    def iter_matches(self, block: TextBlock) -> Iterator[re.Match]:
+        """Alle Treffer, Muster für Muster (wie einzelne finditer-Aufrufe)"""
+        for compiled, gate in self.entries:
+            if block.may_contain(gate):
+                yield from compiled.finditer(block.text)
+
+
+def _as_block(text) -> TextBlock:
+    return text if isinstance(text, TextBlock) else TextBlock(text)
+
+
+# ---------------------------------------------------------------------------
+# Appenzeller Wanderführer
+# ---------------------------------------------------------------------------
+
+APPENZELL_DURATION = PatternBank(
+    [
+        (r"(\d+)\s*Stunden?\s*(\d+)?\s*Minuten?", ("stunde",)),
+        (r"(\d+)\s*h\s*(\d+)?\s*min", ("min",)),
+        (r"(\d+)\s*Std\.?\s*(\d+)?\s*Min\.?", ("std",)),
+        (r"(\d+[,.]?\d*)\s*Stunden?", ("stunde",)),
+        (r"Wanderzeit[:\s]*(\d+[,.]?\d*)\s*(?:Stunden?|h)", ("wanderzeit",)),
+    ]
+)
+
+APPENZELL_DISTANCE = PatternBank(
+    [
+        (r"(\d+[,.]?\d*)\s*km", ("km",)),
+        (r"(\d+[,.]?\d*)\s*Kilometer", ("kilometer",)),
+        (r"Distanz[:\s]*(\d+[,.]?\d*)\s*km", ("distanz",)),
+    ]
+)
+
+# Spezifisches Appenzeller Format: "8.73 km 510 m 510 m" (Distanz, Auf-, Abstieg)
+APPENZELL_KM_LINE = re.compile(r"(\d+[.,]?\d*)\s*km\s+(\d+)\s*m\s+(\d+)\s*m")
+
+APPENZELL_ELEVATION_GAIN = PatternBank(
+    [
+        (r"(\d+)\s*m\s*(?:Aufstieg|↑|auf)", ("auf", "↑")),
+        (r"Aufstieg[:\s]*(\d+)\s*m", ("aufstieg",)),
+        (r"(\d+)\s*m\s*Höhenmeter\s*(?:auf|Aufstieg)", ("höhenmeter",)),
+        (r"(\d+)\s*m\s+\d+\s*m", None),  # Erstes m in "XXX m YYY m"
+    ]
+)
+
+APPENZELL_ELEVATION_LOSS = PatternBank(
+    [
+        (r"(\d+)\s*m\s*(?:Abstieg|↓|ab)", ("ab", "↓")),
+        (r"Abstieg[:\s]*(\d+)\s*m", ("abstieg",)),
+        (r"(\d+)\s*m\s*Höhenmeter\s*(?:ab|Abstieg)", ("höhenmeter",)),
+        (r"\d+\s*m\s+(\d+)\s*m", None),  # Zweites m in "XXX m YYY m"
+    ]
+)
+
+APPENZELL_SAC = PatternBank(
+    [
+        (r"SAC[:\s-]*T\s*([1-6])", ("sac",)),  # "SAC-Wanderskala T 1"
+        (r"Wanderskala[:\s]*T\s*([1-6])", ("wanderskala",)),  # "Wanderskala T 1"
+        (r"\bT\s*([1-6])\b", None),  # Standalone "T 1" bis "T 6"
+        (r"SAC[:\s-]*([T1-6])", ("sac",)),  # Fallback für "T1" format
+        (r"([T][1-6])", None),  # Direkte T1-T6 Matches
+    ]
+)
+
+APPENZELL_RESTAURANT_KEYWORDS = [
+    "Restaurant",
+    "Gasthaus",
+    "Gasthof",
+    "Beizli",
+    "Café",
+    "Hütte",
+    "Berggasthaus",
+    "Bergrestaurant",
+    "Wirtschaft",
+    "Alp",
+]
+
+APPENZELL_RESTAURANTS = PatternBank(
+    [
+        (f"{keyword}[\\s]*([A-ZÄÖÜa-zäöü\\s-]+?)(?=[,\\.\\n]|$)", (keyword.lower(),))
+        for keyword in APPENZELL_RESTAURANT_KEYWORDS
+    ]
+)
+
+APPENZELL_HIGHLIGHT_KEYWORDS = [
+    "Aussicht",
+    "Panorama",
+    "Gipfel",
+    "See",
+    "Seealpsee",
+    "Wasserfall",
+    "Alpstein",
+    "Säntis",
+    "Ebenalp",
+    "Aescher",
+    "Schöne Aussicht",
+    "Bergsee",
+    "Alp",
+    "Hochebene",
+    "Gratwanderung",
+]
+
+
+def appenzell_duration(text) -> str:
+    """Wanderdauer im Appenzeller Format"""
+    match = APPENZELL_DURATION.first_match(_as_block(text))
+    return match.group(0).strip() if match else ""
+
+
+def appenzell_distance(text) -> str:
+    """Wanderdistanz im Appenzeller Format"""
+    match = APPENZELL_DISTANCE.first_match(_as_block(text))
+    if not match:
+        return ""
+    if "Distanz" in match.group(0):
+        return match.group(1) + " km"
+    return match.group(0).strip()
+
+
+def appenzell_elevation(text) -> Tuple[str, str]:
+    """Höhenmeter (Aufstieg, Abstieg) im Appenzeller Format"""
+    block = _as_block(text)
+
+    for line in block.lines[:10]:  # Schaue in den ersten 10 Zeilen
+        match = APPENZELL_KM_LINE.search(line)
+        if match:
+            return match.group(2) + "m", match.group(3) + "m"
+
+    gain_match = APPENZELL_ELEVATION_GAIN.first_match(block)
+    loss_match = APPENZELL_ELEVATION_LOSS.first_match(block)
+    return (
+        gain_match.group(1) + "m" if gain_match else "",
+        loss_match.group(1) + "m" if loss_match else "",
+    )
+
+
+def appenzell_sac_scale(text) -> str:
+    """SAC Wanderskala ("T1" bis "T6")"""
+    match = APPENZELL_SAC.first_match(_as_block(text))
+    if not match:
+        return ""
+    # Füge "T" hinzu falls nur Zahl gefunden
+    result = match.group(1)
+    return f"T{result}" if result.isdigit() else result
+
+
+def appenzell_restaurants(text) -> List[str]:
+    """Restaurant-/Einkehrmöglichkeiten (max. 3)"""
+    block = _as_block(text)
+    restaurants = []
+    for keyword, (compiled, gate) in zip(
+        APPENZELL_RESTAURANT_KEYWORDS, APPENZELL_RESTAURANTS.entries
+    ):
+        if not block.may_contain(gate):
+            continue
+        for name in compiled.findall(block.text):
+            restaurant_name = f"{keyword} {name.strip()}"
+            if 5 < len(restaurant_name) < 50 and restaurant_name not in restaurants:
+                restaurants.append(restaurant_name)
+    return restaurants[:3]
+
+
+def appenzell_highlights(text) -> List[str]:
+    """Typische Appenzeller Highlights (max. 4)"""
+    block = _as_block(text)
+    return [
+        keyword
+        for keyword in APPENZELL_HIGHLIGHT_KEYWORDS
+        if keyword.lower() in block.lower
+    ][:4]
+
+
+def extract_appenzell_fields(text: str, use_gates: bool = True) -> Dict[str, Any]:
+    """Alle Regex-Felder einer Appenzeller Route in einem Aufruf"""
+    block = TextBlock(text, use_gates)
+    elevation_gain, elevation_loss = appenzell_elevation(block)
+    return {
+        "duration": appenzell_duration(block),
+        "distance": appenzell_distance(block),
+        "elevation_gain": elevation_gain,
+        "elevation_loss": elevation_loss,
+        "sac_scale": appenzell_sac_scale(block),
+        "restaurants": appenzell_restaurants(block),
+        "highlights": appenzell_highlights(block),
+    }
+
+
+# ---------------------------------------------------------------------------
+# ZKB-Wanderguides
+# ---------------------------------------------------------------------------
+
+ZKB_DURATION = PatternBank(
+    [
+        (r"(\d+[.,]?\d*\s*(?:Std|Stunden?))", ("std", "stunde")),
+        (r"(\d+[.,]?\d*\s*h\s*\d*)", ("h",)),
+        (r"(\d+\s*-\s*\d+\s*(?:Std|Stunden?))", ("std", "stunde")),
+    ]
+)
+
+ZKB_DISTANCE = PatternBank(
+    [
+        (r"(\d+[.,]?\d*\s*km)", ("km",)),
+        (r"(\d+[.,]?\d*\s*Kilometer)", ("kilometer",)),
+    ]
+)
+
+ZKB_ELEVATION = PatternBank(
+    [
+        (r"(\d+\s*m\s*ü\.?\s*M\.?)", ("ü",)),
+        (r"(\d+\s*Höhenmeter)", ("höhenmeter",)),
+        (r"(\d+\s*hm)", ("hm",)),
+        (r"(\d+\s*m\s*Aufstieg)", ("aufstieg",)),
+    ]
+)
+
+ZKB_SAC = re.compile(r"T\s*([1-6])", re.IGNORECASE)
+ZKB_DIFFICULTY_KEYWORDS = [
+    (re.compile(r"(schwierig|anspruchsvoll|steil|klettern)", re.IGNORECASE), "T3"),
+    (re.compile(r"(mittel|bergwanderung|bergweg)", re.IGNORECASE), "T2"),
+    (re.compile(r"(einfach|leicht|spaziergang|familien)", re.IGNORECASE), "T1"),
+]
+ZKB_HOURS = re.compile(r"(\d+)")
+
+ZKB_RESTAURANTS = PatternBank(
+    [
+        (r"(Restaurant\s+[\w\s\-äöüÄÖÜ]{3,25})", ("restaurant",)),
+        (r"(Gasthaus\s+[\w\s\-äöüÄÖÜ]{3,25})", ("gasthaus",)),
+        (r"(Beizli\s+[\w\s\-äöüÄÖÜ]{3,25})", ("beizli",)),
+        (r"(Hotel\s+[\w\s\-äöüÄÖÜ]{3,25})", ("hotel",)),
+    ]
+)
+
+ZKB_HIGHLIGHTS = PatternBank(
+    [
+        (r"(Aussicht\s+[\w\s\-äöüÄÖÜ]{5,30})", ("aussicht",)),
+        (r"(See\s+[\w\s\-äöüÄÖÜ]{3,20})", ("see",)),
+        (r"(Gipfel\s+[\w\s\-äöüÄÖÜ]{3,20})", ("gipfel",)),
+        (r"(Wasserfall\s+[\w\s\-äöüÄÖÜ]{3,20})", ("wasserfall",)),
+        (r"(Kapelle\s+[\w\s\-äöüÄÖÜ]{3,20})", ("kapelle",)),
+    ]
+)
+
+
+def _first_group_or_default(bank: PatternBank, text) -> str:
+    match = bank.first_match(_as_block(text))
+    return match.group(1) if match else "Nicht angegeben"
+
+
+def _unique_groups(bank: PatternBank, text, limit: int) -> List[str]:
+    values = []
+    for match in bank.iter_matches(_as_block(text)):
+        value = match.group(1).strip()
+        if value not in values:
+            values.append(value)
+    return values[:limit]
+
+
+def zkb_duration(context) -> str:
+    """Zeitangabe im ZKB-Format"""
+    return _first_group_or_default(ZKB_DURATION, context)
+
+
+def zkb_distance(context) -> str:
+    """Distanzangabe im ZKB-Format"""
+    return _first_group_or_default(ZKB_DISTANCE, context)
+
+
+def zkb_elevation(context) -> str:
+    """Höhenmeter im ZKB-Format"""
+    return _first_group_or_default(ZKB_ELEVATION, context)
+
+
+def zkb_difficulty(context, duration: str) -> str:
+    """Geschätzte SAC-Schwierigkeit aus Kontext und Dauer"""
+    text = context.text if isinstance(context, TextBlock) else context
+
+    # Direkte SAC-Angaben suchen
+    sac_match = ZKB_SAC.search(text)
+    if sac_match:
+        return f"T{sac_match.group(1)}"
+
+    # Schlüsselwörter für Schwierigkeit
+    for pattern, level in ZKB_DIFFICULTY_KEYWORDS:
+        if pattern.search(text):
+            return level
+
+    # Fallback basierend auf Dauer
+    if "Std" in duration or "h" in duration:
+        try:
+            hours = float(ZKB_HOURS.search(duration).group(1))
+            if hours >= 5:
+                return "T3"
+            elif hours >= 3:
+                return "T2"
+            else:
+                return "T1"
+        except:
+            pass
+
+    return "T1"  # Konservativer Fallback
+
+
+def zkb_restaurants(context) -> List[str]:
+    """Restaurant-/Einkehrmöglichkeiten (max. 3)"""
+    return _unique_groups(ZKB_RESTAURANTS, context, 3)
+
+
+def zkb_highlights(context) -> List[str]:
+    """Highlights/Sehenswürdigkeiten (max. 3)"""
+    return _unique_groups(ZKB_HIGHLIGHTS, context, 3)
+
+
+def extract_zkb_fields(context: str, use_gates: bool = True) -> Dict[str, Any]:
+    """Alle Regex-Felder einer ZKB-Route in einem Aufruf"""
+    block = TextBlock(context, use_gates)
+    duration = zkb_duration(block)
+    return {
+        "duration": duration,
+        "distance": zkb_distance(block),
+        "elevation_gain": zkb_elevation(block),
+        "sac_scale": zkb_difficulty(block, duration),
+        "restaurants": zkb_restaurants(block),
+        "highlights": zkb_highlights(block),
+    }
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+JSONL Routen-Store mit Byte-Offset-Index
+========================================
+
+Speichert Routen als JSONL (eine Route pro Zeile) und merkt sich beim
+Öffnen nur die Byte-Offsets der Zeilen. Das Retrieval arbeitet auf
+kompakten Routen ohne grosse Felder (raw_text); vollständige Routen werden
+erst für die finalen Top-k Ergebnisse per Offset gelesen.
+
+Ist das Verzeichnis des Katalogs nicht schreibbar (z.B. read-only
+Container), bleibt das konvertierte JSONL im Speicher. Ein RouteStore ist
+eine Sequence (len, Index, Slices, Iteration) und kann an Stelle der
+früheren Routen-Liste verwendet werden.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections.abc import Sequence
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+# Grosse Felder, die nur bei Bedarf (Hydrierung) gelesen werden
+HEAVY_FIELDS = ("raw_text",)
+
+
+def store_path_for(routes_file: str) -> str:
+    """JSONL-Pfad zu einer Routen-Datei (JSON-Array oder bereits JSONL)"""
+    if routes_file.endswith(".jsonl"):
+        return routes_file
+    base, _ = os.path.splitext(routes_file)
+    return f"{base}.jsonl"
+
+
+def is_route_catalogue(file_path: str) -> bool:
+    """Erkennt Routen-Kataloge (z.B. appenzell_routes_clean.json, zkb_routes.json)"""
+    name = os.path.basename(file_path)
+    return "routes" in name and name.endswith((".json", ".jsonl"))
+
+
+class RouteStore(Sequence):
+    """Lesezugriff auf einen JSONL Routen-Katalog über Byte-Offsets"""
+
+    # Zeilen pro Lesezugriff beim Streamen aller Routen
+    ITER_BATCH_SIZE = 64
+
+    def __init__(self, path: str, data: Optional[bytes] = None):
+        self.path = path
+        self._data = data  # JSONL im Speicher, falls nicht schreibbar
+        self.sha256 = ""
+        self.offsets = np.zeros(0, dtype=np.int64)
+
+        # Offene Datei: Offsets bleiben gültig, auch wenn ein Neuladen die
+        # Datei per os.replace ersetzt (alter Inhalt bleibt lesbar)
+        self._file: BinaryIO = (
+            io.BytesIO(data) if data is not None else open(path, "rb")
+        )
+        self._lock = threading.Lock()
+        self._scan()
+
+    @classmethod
+    def open(cls, routes_file: str) -> "RouteStore":
+        """Öffnet einen Katalog; JSON-Arrays werden einmalig nach JSONL konvertiert"""
+        store_path = store_path_for(routes_file)
+        if store_path != routes_file and (
+            not os.path.exists(store_path)
+            or os.path.getmtime(store_path) <= os.path.getmtime(routes_file)
+        ):
+            with open(routes_file, "r", encoding="utf-8") as f:
+                routes = json.load(f)
+            try:
+                cls.write(routes, store_path)
+            except OSError as e:
+                print(f"⚠️ JSONL-Store nicht schreibbar, Routen im Speicher: {e}")
+                return cls(routes_file, data=cls.encode(routes))
+        return cls(store_path)
+
+    @staticmethod
+    def encode(routes: List[Dict[str, Any]]) -> bytes:
+        """Routen als JSONL-Bytes (eine Route pro Zeile)"""
+        return "".join(
+            json.dumps(route, ensure_ascii=False) + "\n" for route in routes
+        ).encode("utf-8")
+
+    @classmethod
+    def write(cls, routes: List[Dict[str, Any]], path: str):
+        """Schreibt Routen atomar als JSONL"""
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(cls.encode(routes))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _scan(self):
+        """Liest Zeilen-Offsets und Inhalts-Hash in einem Durchgang (ohne Parsen)"""
+        digest = hashlib.sha256()
+        offsets = []
+        position = 0
+        with self._lock:
+            self._file.seek(0)
+            for line in self._file:
+                digest.update(line)
+                if line.strip():
+                    offsets.append(position)
+                position += len(line)
+
+        self.sha256 = digest.hexdigest()
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Route bzw. Routen wie bei einer Liste (inkl. negativer Indizes)"""
+        if isinstance(index, slice):
+            return self.get_many(range(*index.indices(len(self))))
+        if not -len(self) <= index < len(self):
+            raise IndexError("Routen-Index ausserhalb des Katalogs")
+        return self.get(index % len(self))
+
+    def get(self, index: int) -> Dict[str, Any]:
+        """Vollständige Route an Position index"""
+        return self.get_many([index])[0]
+
+    def get_many(self, indices: List[int]) -> List[Dict[str, Any]]:
+        """Vollständige Routen für mehrere Positionen (ein Lesezugriff)"""
+        with self._lock:
+            lines = []
+            for index in indices:
+                self._file.seek(int(self.offsets[index]))
+                lines.append(self._file.readline())
+        return [json.loads(line) for line in lines]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Streamt alle Routen (jeweils nur einen Block im Speicher)"""
+        for start in range(0, len(self), self.ITER_BATCH_SIZE):
+            yield from self.get_many(
+                range(start, min(start + self.ITER_BATCH_SIZE, len(self)))
+            )
+
+    def close(self):
+        """Schliesst die Datei des Stores"""
+        self._file.close()
+
+    def iter_compact(self) -> Iterator[Dict[str, Any]]:
+        """Streamt Routen ohne grosse Felder für den Retrieval-Index"""
+        for route in self:
+            yield {k: v for k, v in route.items() if k not in HEAVY_FIELDS}
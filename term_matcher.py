@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Multi-Pattern Matcher für die Query Expansion
+=============================================
+
+Aho-Corasick Automat, der alle Trigger-Begriffe in einem einzigen Durchlauf
+über den Text findet - unabhängig davon, wie viele Synonyme und Orte
+hinterlegt sind. Überlappende Treffer (z.B. "schwer" in "sehr schwer")
+werden wie bei einer einfachen Teilstring-Suche alle gemeldet.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class TermMatcher:
+    """Aho-Corasick Automat für Teilstring-Suche nach vielen Begriffen"""
+
+    def __init__(self, terms: Iterable[str]):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[Set[str]] = [set()]
+
+        for term in terms:
+            if term:
+                self._add_term(term)
+        self._build_fail_links()
+
+    def _add_term(self, term: str):
+        """Fügt einen Begriff in den Trie ein"""
+        state = 0
+        for char in term:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append(set())
+            state = next_state
+        self.outputs[state].add(term)
+
+    def _build_fail_links(self):
+        """Berechnet Fehlerübergänge per Breitensuche"""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+
+                # Treffer des längsten echten Suffixes übernehmen
+                self.outputs[next_state] |= self.outputs[self.fail[next_state]]
+
+    def find_all(self, text: str) -> Set[str]:
+        """Alle im Text enthaltenen Begriffe (ein Durchlauf)"""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.outputs[state]:
+                found |= self.outputs[state]
+        return found
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test Script für das asynchrone Groq RAG System
+==============================================
+
+Prüft Parallelität, Coalescing, Timeouts und Abbruch gegen einen lokalen
+Async-Stub-Client (kein Groq API Key nötig).
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from async_groq_system import AsyncAdvancedGroqRAG
+from groq_response_cache import GroqResponseCache
+
+
+class AsyncStubGroqClient:
+    """Lokaler Ersatz für groq.AsyncGroq mit Aufrufzähler"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.cancelled = 0
+        self.closed = 0
+        self.delay = delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **params):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        content = f"Antwort auf: {messages[-1]['content'][:40]}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+    async def close(self):
+        self.closed += 1
+        await asyncio.sleep(0)
+
+
+def create_rag_system(stub, **kwargs) -> AsyncAdvancedGroqRAG:
+    rag_system = AsyncAdvancedGroqRAG(
+        groq_api_key="stub",
+        response_cache=GroqResponseCache(cache_file=None),
+        **kwargs,
+    )
+    rag_system._create_async_client = lambda: stub
+    return rag_system
+
+
+def test_concurrent_searches_share_one_event_loop():
+    """Verschiedene Anfragen laufen parallel, identische nur einmal upstream"""
+
+    print("🧪 Test: Parallele asearch-Aufrufe")
+
+    stub = AsyncStubGroqClient(delay=0.3)
+    rag_system = create_rag_system(stub)
+    queries = [
+        "Einfache Wanderung mit Restaurant",
+        "Anspruchsvolle Bergtour",
+        "Kurze Familienwanderung",
+    ]
+
+    async def run():
+        start = time.time()
+        answers = await rag_system.asearch_many(queries + queries, k=3)
+        return answers, time.time() - start
+
+    answers, elapsed = asyncio.run(run())
+
+    assert len(answers) == 6
+    assert stub.calls == 3
+    assert elapsed < 0.9
+    assert answers[0]["response"] == rag_system.generate_intelligent_response(
+        queries[0], answers[0]["results"]
+    )
+    print(f"   ✅ 6 Anfragen in {elapsed:.2f}s, {stub.calls} Groq-Aufrufe")
+
+
+def test_timeout_and_cancellation():
+    """Timeouts liefern die Fallback-Antwort, Abbruch stoppt den Upstream-Aufruf"""
+
+    print("🧪 Test: Timeout und Abbruch")
+
+    stub = AsyncStubGroqClient(delay=1.0)
+    rag_system = create_rag_system(stub, request_timeout=0.05)
+    query = "Einfache Wanderung mit Restaurant"
+    results = rag_system.retrieve(query, k=3)
+
+    response = asyncio.run(rag_system.agenerate_intelligent_response(query, results))
+    assert response == rag_system.generate_fallback_response(query, results)
+
+    rag_system.request_timeout = 5.0
+
+    async def cancel_search():
+        task = asyncio.ensure_future(rag_system.asearch("Aussicht im Alpstein", k=3))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+    asyncio.run(cancel_search())
+    assert stub.cancelled == 2
+    assert not rag_system._in_flight
+
+
+def test_client_of_previous_event_loop_is_closed():
+    """Jedes asyncio.run erhält einen neuen Client, der alte wird geschlossen"""
+
+    print("🧪 Test: Client pro Event Loop")
+
+    stubs = []
+
+    def create_stub():
+        stubs.append(AsyncStubGroqClient())
+        return stubs[-1]
+
+    rag_system = create_rag_system(None)
+    rag_system._create_async_client = create_stub
+    query = "Einfache Wanderung mit Restaurant"
+    results = rag_system.retrieve(query, k=3)
+
+    for _ in range(3):
+        rag_system.response_cache.clear()
+        asyncio.run(rag_system.agenerate_intelligent_response(query, results))
+    assert [stub.closed for stub in stubs] == [1, 1, 0]
+
+    asyncio.run(rag_system.aclose())
+    assert stubs[-1].closed == 1 and rag_system.async_groq_client is None
+    print(f"   ✅ {len(stubs)} Clients, alle geschlossen")
+
+
+def test_concurrent_rebind_creates_one_client_per_loop():
+    """Gleichzeitige Coroutines auf einem neuen Loop teilen sich einen Client"""
+
+    print("🧪 Test: Gleichzeitiger Wechsel des Event Loops")
+
+    stubs = []
+
+    def create_stub():
+        stubs.append(AsyncStubGroqClient())
+        return stubs[-1]
+
+    rag_system = create_rag_system(None)
+    rag_system._create_async_client = create_stub
+    query = "Einfache Wanderung mit Restaurant"
+    results = rag_system.retrieve(query, k=3)
+
+    async def run(prefix: str):
+        await asyncio.gather(
+            *(
+                rag_system.agenerate_intelligent_response(f"{prefix} {i}", results)
+                for i in range(4)
+            )
+        )
+
+    for prefix in ["erster", "zweiter", "dritter"]:
+        asyncio.run(run(prefix))
+    asyncio.run(rag_system.aclose())
+
+    assert len(stubs) == 3
+    assert [stub.closed for stub in stubs] == [1, 1, 1]
+    assert [stub.calls for stub in stubs] == [4, 4, 4]
+    print(f"   ✅ {len(stubs)} Clients für 3 Event Loops")
+
+
+def test_shares_upstream_call_with_sync_system():
+    """Läuft dieselbe Anfrage bereits im Sync-System, wartet asyncio darauf"""
+
+    print("🧪 Test: Coalescing mit dem Sync-System")
+
+    stub = AsyncStubGroqClient()
+    rag_system = create_rag_system(stub)
+    messages = [{"role": "user", "content": "Wanderung zum Seealpsee"}]
+    cache_key = rag_system.response_cache.make_key(messages, {})
+
+    # Sync-Thread hat die Anfrage beansprucht und liefert später die Antwort
+    assert rag_system.response_cache.claim(cache_key) == (None, None)
+    timer = threading.Timer(
+        0.1, rag_system.response_cache.complete, (cache_key, "Sync-Antwort")
+    )
+    timer.start()
+
+    response = asyncio.run(rag_system.acreate_chat_completion(messages))
+    timer.join()
+    assert response == "Sync-Antwort"
+    assert stub.calls == 0
+
+    # Ein abgebrochener async Leader darf Sync-Wartende nicht hängen lassen
+    stub.delay = 1.0
+    other = [{"role": "user", "content": "Wanderung zum Säntis"}]
+    other_key = rag_system.response_cache.make_key(other, {})
+
+    async def cancel_leader():
+        task = asyncio.ensure_future(rag_system.acreate_chat_completion(other))
+        await asyncio.sleep(0.05)
+        _, pending = rag_system.response_cache.claim(other_key)
+        task.cancel()
+        await asyncio.sleep(0)
+        return pending
+
+    pending = asyncio.run(cancel_leader())
+    assert isinstance(pending.exception(timeout=1), RuntimeError)
+    assert rag_system.response_cache.claim(other_key) == (None, None)
+    print("   ✅ Antwort aus dem Sync-System übernommen")
+
+
+if __name__ == "__main__":
+    test_concurrent_searches_share_one_event_loop()
+    test_timeout_and_cancellation()
+    test_client_of_previous_event_loop_is_closed()
+    test_concurrent_rebind_creates_one_client_per_loop()
+    test_shares_upstream_call_with_sync_system()
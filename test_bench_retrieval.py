@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test Script für den Retrieval-Benchmark
+=======================================
+
+Prüft den synthetischen Katalog und die Messung auf einem kleinen
+Katalog (ohne Kind-Prozess).
+"""
+
+import shutil
+import tempfile
+
+from bench_retrieval import (
+    STAGES,
+    build_workload,
+    measure_catalogue,
+    prepare_catalogues,
+)
+from route_store import RouteStore
+
+
+def test_synthetic_catalogue_is_reproducible():
+    """Gleicher Seed -> identischer synthetischer Katalog"""
+
+    print("🧪 Test: Synthetischer Katalog")
+
+    first_dir, second_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        first = prepare_catalogues(synthetic_size=500, bench_dir=first_dir)
+        second = prepare_catalogues(synthetic_size=500, bench_dir=second_dir)
+
+        first_store = RouteStore(first["synthetic"])
+        assert len(first_store) == 500
+        assert first_store.sha256 == RouteStore(second["synthetic"]).sha256
+        assert len({route["id"] for route in first_store}) == 500
+        print(f"   ✅ {len(first_store)} Routen, Hash {first_store.sha256[:12]}")
+    finally:
+        shutil.rmtree(first_dir)
+        shutil.rmtree(second_dir)
+
+
+def test_measure_catalogue_reports_all_metrics():
+    """Messung liefert Kaltstart, Aufbau, Perzentile pro Stufe, QPS und RSS"""
+
+    print("🧪 Test: Benchmark-Messung")
+
+    bench_dir = tempfile.mkdtemp()
+    try:
+        catalogues = prepare_catalogues(synthetic_size=200, bench_dir=bench_dir)
+        queries = build_workload(20)
+        result = measure_catalogue(catalogues["synthetic"], queries, repeat=1)
+    finally:
+        shutil.rmtree(bench_dir)
+
+    assert len(queries) == 20 and len(set(queries)) == 20
+    assert result["routes"] == 200 and result["queries"] == 20
+    assert result["build_s"] > 0 and result["cold_start_s"] >= result["build_s"]
+    for stage in ("total",) + STAGES:
+        latency = result["latency_ms"][stage]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"]
+    assert result["qps"] > 0 and result["peak_rss_mb"] > 0
+    print(f"   ✅ p50 {result['latency_ms']['total']['p50']:.2f}ms")
+
+
+if __name__ == "__main__":
+    test_synthetic_catalogue_is_reproducible()
+    test_measure_catalogue_reports_all_metrics()
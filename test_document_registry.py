@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Test Script für die lazy Dokumenten-Registry
+============================================
+
+Prüft, dass Dokumente erst beim ersten Zugriff gelesen und bei geänderter
+Datei neu geladen werden, und dass AdvancedGroqRAG beim Start nichts liest.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from advanced_groq_system import AdvancedGroqRAG
+from document_registry import DocumentRegistry, read_json
+from groq_response_cache import GroqResponseCache
+from page_cache import PageTextCache
+from pdf_context import BackgroundPdfExtractor
+from route_store import RouteStore
+from test_pdf_ingestion import write_text_pdf
+
+
+def test_registry_loads_on_first_access_and_reloads_on_change():
+    """Erster Zugriff lädt, weitere Zugriffe cachen, neue mtime lädt neu"""
+
+    print("🧪 Test: Lazy Registry mit mtime-Cache")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "daten.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"version": 1}')
+
+        loads = []
+
+        def loader(file_path):
+            loads.append(file_path)
+            return read_json(file_path)
+
+        registry = DocumentRegistry()
+        registry.register("data", path, loader)
+        assert (
+            registry.register("fehlt", os.path.join(tmp_dir, "x.json"), loader) is None
+        )
+
+        assert list(registry) == ["data"] and not registry.is_loaded("data")
+        assert loads == []
+
+        assert registry["data"] == {"version": 1}
+        assert registry["data"] == {"version": 1}
+        assert len(loads) == 1
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"version": 2, "neu": true}')
+        os.utime(path, ns=(0, registry.document("data").mtime_ns + 10**9))
+
+        assert registry["data"] == {"version": 2, "neu": True}
+        assert len(loads) == 2
+        print(f"   ✅ {len(loads)} Ladevorgänge für 4 Zugriffe")
+
+
+def test_advanced_groq_startup_reads_no_documents():
+    """Start registriert nur; PDFs und Kataloge werden bei Bedarf gelesen"""
+
+    print("🧪 Test: AdvancedGroqRAG Start ohne Dokument-Lesen")
+
+    repo_dir = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for name in ["appenzell_routes_clean.json", "zkb_routes.json", "README.md"]:
+            shutil.copy(os.path.join(repo_dir, name), tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, "PDFs"))
+        write_text_pdf(
+            os.path.join(tmp_dir, "PDFs", "guide.pdf"),
+            [["Wanderung zum Seealpsee"], ["Aufstieg zur Ebenalp"]],
+        )
+
+        os.chdir(tmp_dir)
+        rag_system = AdvancedGroqRAG(
+            groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+        )
+        context = rag_system.additional_context
+
+        assert {"project_info", "pdf_guide.pdf", "data_zkb_routes.json"} <= set(context)
+        assert context.stats()["loaded"] == 0
+
+        assert "Seealpsee" in context["pdf_guide.pdf"]["content"]
+        assert isinstance(context["data_zkb_routes.json"], RouteStore)
+        assert context.stats()["loaded"] == 2
+
+        results = rag_system.retrieve("Wanderung mit Restaurant", k=3)
+        assert "guide.pdf" in rag_system.create_enhanced_context("Wanderung", results)
+        print(f"   ✅ {context.stats()}")
+    finally:
+        os.chdir(repo_dir)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_background_pdf_extraction_never_blocks():
+    """ready() liefert None solange extrahiert wird, danach den Auszug"""
+
+    print("🧪 Test: PDF-Extraktion im Hintergrund")
+
+    release = threading.Event()
+    calls = []
+
+    def slow_extract(pdf_path):
+        calls.append(pdf_path)
+        release.wait(5)
+        return f"Auszug {len(calls)}"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "guide.pdf")
+        write_text_pdf(pdf_path, [["Wanderung zum Seealpsee"]])
+
+        extractor = BackgroundPdfExtractor(slow_extract)
+        try:
+            extractor.submit(pdf_path)
+            assert extractor.ready(pdf_path) is None
+            assert extractor.pending() == 1
+
+            release.set()
+            assert extractor.result(pdf_path, timeout=5) == "Auszug 1"
+            assert extractor.ready(pdf_path) == "Auszug 1"
+
+            # Geänderte Datei wird neu eingeplant
+            write_text_pdf(pdf_path, [["Wanderung zur Ebenalp"], ["Seite 2"]])
+            assert extractor.result(pdf_path, timeout=5) == "Auszug 2"
+            assert len(calls) == 2
+        finally:
+            extractor.shutdown(wait=True)
+    print("   ✅ Nicht-blockierende Abfrage und Neuplanung")
+
+
+def test_unfinished_pdfs_are_skipped_and_extractor_closed():
+    """Unfertige PDFs fehlen im Kontext; close() beendet die Extraktion"""
+
+    print("🧪 Test: Unfertige PDFs und close()")
+
+    repo_dir = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    release = threading.Event()
+
+    def slow_extract(pdf_path):
+        release.wait(5)
+        return "Auszug Seealpsee"
+
+    def slow_passage_index(pdf_paths):
+        release.wait(5)
+        return None  # kein Passagen-Index: Auszüge der ersten Seiten
+
+    try:
+        shutil.copy(os.path.join(repo_dir, "appenzell_routes_clean.json"), tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, "PDFs"))
+        write_text_pdf(os.path.join(tmp_dir, "PDFs", "guide.pdf"), [["Seealpsee"]])
+        os.chdir(tmp_dir)
+
+        with AdvancedGroqRAG(
+            groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+        ) as rag_system:
+            rag_system.pdf_extractor.shutdown(wait=True)
+            rag_system.pdf_extractor = BackgroundPdfExtractor(slow_extract)
+            rag_system.build_passage_index = slow_passage_index
+
+            results = rag_system.retrieve("Wanderung zum Seealpsee", k=2)
+            context = rag_system.create_enhanced_context("Seealpsee", results)
+            assert "guide.pdf" not in context and "Hintergrund" not in context
+
+            release.set()
+            rag_system.pdf_extractor.result("PDFs/guide.pdf", timeout=5)
+            context = rag_system.create_enhanced_context("Seealpsee", results)
+            assert "• guide.pdf: Auszug Seealpsee" in context
+
+        # Nach close(): keine neuen Aufträge, Abfragen blockieren nicht
+        write_text_pdf(os.path.join("PDFs", "neu.pdf"), [["Ebenalp"]])
+        assert rag_system.pdf_extractor.ready("PDFs/neu.pdf") is None
+        assert rag_system.pdf_extractor.ready("PDFs/guide.pdf") == "Auszug Seealpsee"
+        print("   ✅ Nur fertige Auszüge im Kontext, Pool beendet")
+    finally:
+        release.set()
+        os.chdir(repo_dir)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_pdf_context_uses_persistent_page_cache():
+    """Zweiter Start liest die PDF-Seiten aus dem Seiten-Cache"""
+
+    print("🧪 Test: Persistenter PDF-Kontext")
+
+    repo_dir = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(os.path.join(repo_dir, "appenzell_routes_clean.json"), tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, "PDFs"))
+        write_text_pdf(
+            os.path.join(tmp_dir, "PDFs", "guide.pdf"),
+            [[f"Seite {i} Wanderung"] for i in range(1, 8)],
+        )
+        os.chdir(tmp_dir)
+
+        contents = []
+        for _ in range(2):
+            page_cache = PageTextCache(os.path.join(tmp_dir, "cache"))
+            rag_system = AdvancedGroqRAG(
+                groq_api_key="stub",
+                response_cache=GroqResponseCache(cache_file=None),
+                page_cache=page_cache,
+            )
+            contents.append(rag_system.pdf_extractor.result("PDFs/guide.pdf"))
+            rag_system.pdf_extractor.submit_all(
+                "passages", ["PDFs/guide.pdf"], rag_system.build_passage_index
+            ).result(timeout=10)
+            rag_system.pdf_extractor.shutdown(wait=True)
+
+        assert contents[0] == contents[1]
+        assert "Seite 5 Wanderung" in contents[0]
+        assert "Seite 6" not in contents[0] and "PDF hat 7 Seiten" in contents[0]
+        # 5 Seiten für den Auszug + 7 Seiten für den Passagen-Index
+        assert page_cache.stats() == {"files": 1, "hits": 12, "misses": 0}
+        print(f"   ✅ {page_cache.stats()}")
+    finally:
+        os.chdir(repo_dir)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_registry_loads_on_first_access_and_reloads_on_change()
+    test_advanced_groq_startup_reads_no_documents()
+    test_background_pdf_extraction_never_blocks()
+    test_unfinished_pdfs_are_skipped_and_extractor_closed()
+    test_pdf_context_uses_persistent_page_cache()
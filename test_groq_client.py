@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Test Script für den gemeinsamen Groq-Client
+===========================================
+
+Startet einen lokalen HTTP-Stub (http.server) an Stelle der Groq API und
+prüft Retries bei 429/5xx inkl. retry-after, Keep-Alive Verbindungen,
+den Token-Bucket und die Metriken.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from groq import BadRequestError
+
+from groq_client import GroqClient, TokenBucket, parse_retry_after, throttle_notices
+
+
+class StubGroqServer:
+    """Beantwortet Chat-Completions nach einem Skript von Statuscodes"""
+
+    def __init__(self, script):
+        self.script = list(script)  # (status, headers) pro Anfrage
+        self.requests = 0
+        self.connections = set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-Alive
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests += 1
+                stub.connections.add(self.client_address)
+                status, headers = stub.script.pop(0) if stub.script else (200, {})
+
+                if status == 200:
+                    body = {
+                        "id": f"stub-{stub.requests}",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "llama3-8b-8192",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {
+                                    "role": "assistant",
+                                    "content": f"Antwort {stub.requests}",
+                                },
+                                "finish_reason": "stop",
+                            }
+                        ],
+                    }
+                else:
+                    body = {"error": {"message": f"Status {status}"}}
+
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(url, sleeps, **kwargs):
+    return GroqClient("stub", base_url=url, sleep=sleeps.append, **kwargs)
+
+
+def ask(client):
+    completion = client.chat.completions.create(
+        messages=[{"role": "user", "content": "Wanderung"}],
+        model="llama3-8b-8192",
+        max_tokens=50,
+    )
+    return completion.choices[0].message.content
+
+
+def test_retries_on_429_and_5xx_with_retry_after():
+    """429 mit retry-after und 503 werden wiederholt, über eine Verbindung"""
+
+    print("🧪 Test: Retries gegen lokalen Stub")
+
+    server = StubGroqServer([(429, {"retry-after": "1.5"}), (503, {}), (200, {})])
+    sleeps = []
+    client = make_client(server.url, sleeps)
+    try:
+        assert ask(client) == "Antwort 3"
+        assert ask(client) == "Antwort 4"
+
+        assert sleeps[0] == 1.5  # retry-after hat Vorrang
+        assert 0 <= sleeps[1] <= client.base_delay * 2  # Backoff mit Jitter
+        assert server.requests == 4
+        assert len(server.connections) == 1  # Keep-Alive
+
+        stats = client.stats()
+        assert stats["requests"] == 4 and stats["retries"] == 2
+        assert stats["rate_limited"] == 1 and stats["server_errors"] == 1
+        assert stats["failures"] == 0
+        print(f"   ✅ {stats}")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_client_errors_and_exhausted_retries_raise():
+    """4xx wird nicht wiederholt; nach max_retries wird der Fehler geworfen"""
+
+    print("🧪 Test: Keine Retries bei Client-Fehlern")
+
+    server = StubGroqServer([(400, {})] + [(500, {})] * 3)
+    sleeps = []
+    client = make_client(server.url, sleeps, max_retries=2)
+    try:
+        try:
+            ask(client)
+            assert False, "400 muss geworfen werden"
+        except BadRequestError:
+            pass
+        assert server.requests == 1 and sleeps == []
+
+        try:
+            ask(client)
+            assert False, "500 nach 2 Retries muss geworfen werden"
+        except Exception as e:
+            assert getattr(e, "status_code", None) == 500
+        assert server.requests == 4 and len(sleeps) == 2
+        assert client.stats()["failures"] == 2
+        print(f"   ✅ {client.stats()['failures']} Fehler weitergegeben")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_token_bucket_throttles_to_quota():
+    """Mehr Anfragen als das Kontingent warten auf neue Tokens"""
+
+    print("🧪 Test: Token-Bucket")
+
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=lambda: now[0], sleep=sleep)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 1.0, 1.0]
+    assert bucket.acquire(10) == 2.0  # höchstens die Kapazität wird gebucht
+
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert parse_retry_after({}) is None
+
+    # Client: 2 Requests pro Minute, die dritte Anfrage wird gedrosselt
+    server = StubGroqServer([])
+    client_sleeps = []
+    client = make_client(server.url, client_sleeps, requests_per_minute=2)
+    try:
+        for _ in range(3):
+            ask(client)
+        stats = client.stats()
+        assert stats["throttled"] == 1 and 0 < stats["throttle_wait_s"] <= 30
+        assert client_sleeps == [stats["throttle_wait_s"]]
+        print(f"   ✅ gedrosselt: {stats['throttle_wait_s']:.1f}s")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_async_client_shares_quota_and_retries():
+    """Async-Client wiederholt wie der Sync-Client und nutzt dessen Kontingent"""
+
+    print("🧪 Test: Async-Client mit gemeinsamem Kontingent")
+
+    server = StubGroqServer([(503, {}), (200, {}), (500, {"retry-after": "0.5"})])
+    sync_sleeps, async_sleeps, notices = [], [], []
+    client = make_client(server.url, sync_sleeps, requests_per_minute=2)
+
+    async def ask_async():
+        async def sleep(seconds):
+            async_sleeps.append(seconds)
+
+        async_client = client.create_async_client()
+        async_client._sleep = sleep
+        try:
+            answers = []
+            for _ in range(2):
+                completion = await async_client.chat.completions.create(
+                    messages=[{"role": "user", "content": "Wanderung"}],
+                    model="llama3-8b-8192",
+                    max_tokens=50,
+                )
+                answers.append(completion.choices[0].message.content)
+            return answers
+        finally:
+            await async_client.close()
+
+    try:
+        assert ask(client) == "Antwort 2"  # 503 wird wiederholt (auch async: 500)
+        with throttle_notices(notices.append):
+            assert asyncio.run(ask_async()) == ["Antwort 4", "Antwort 5"]
+
+        # Zweite Async-Anfrage ist die dritte im Kontingent von 2 pro Minute
+        stats = client.stats()
+        assert stats["retries"] == 2 and stats["requests"] == 5
+        assert stats["throttled"] == 1 and async_sleeps == [0.5] + notices
+        assert len(sync_sleeps) == 1 and 0 < notices[0] <= 30
+        print(f"   ✅ gedrosselt: {notices[0]:.1f}s (gemeldet)")
+    finally:
+        client.close()
+        server.close()
+
+
+def test_async_quota_is_released_on_timeout_and_cancel():
+    """Nie gesendete Anfragen geben ihr Kontingent zurück"""
+
+    print("🧪 Test: Kontingent bei Timeout und Abbruch")
+
+    server = StubGroqServer([])
+    notices = []
+    client = make_client(server.url, [], requests_per_minute=1, timeout=5.0)
+
+    async def ask_async(async_client):
+        return await async_client.chat.completions.create(
+            messages=[{"role": "user", "content": "Wanderung"}],
+            model="llama3-8b-8192",
+            max_tokens=50,
+        )
+
+    async def run():
+        async_client = client.create_async_client()
+        try:
+            await ask_async(async_client)
+
+            # Wartezeit (~60s) über dem Timeout: sofortiger Fehler
+            for _ in range(2):
+                try:
+                    await ask_async(async_client)
+                    assert False, "Wartezeit über dem Timeout muss fehlschlagen"
+                except TimeoutError:
+                    pass
+
+            # Abbruch während der Wartezeit
+            async_client.timeout = 300.0
+            try:
+                await asyncio.wait_for(ask_async(async_client), timeout=0.05)
+                assert False, "wait_for muss abbrechen"
+            except TimeoutError:
+                pass
+        finally:
+            await async_client.close()
+
+    try:
+        with throttle_notices(notices.append):
+            asyncio.run(run())
+
+        # Ohne Rückgabe würde jede Wartezeit um weitere 60s wachsen
+        assert len(notices) == 3 and max(notices) - min(notices) < 1
+        assert client.stats()["quota_timeouts"] == 2
+        assert server.requests == 1
+        print(f"   ✅ Wartezeit bleibt bei {notices[-1]:.1f}s")
+    finally:
+        client.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    test_retries_on_429_and_5xx_with_retry_after()
+    test_client_errors_and_exhausted_retries_raise()
+    test_token_bucket_throttles_to_quota()
+    test_async_client_shares_quota_and_retries()
+    test_async_quota_is_released_on_timeout_and_cancel()
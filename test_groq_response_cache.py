@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Test Script für den Groq Response-Cache
+=======================================
+
+Testet Cache, Persistenz und Request-Coalescing gegen einen lokalen
+Stub-Client (kein Groq API Key nötig).
+"""
+
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from advanced_groq_system import AdvancedGroqRAG
+from groq_response_cache import GroqResponseCache
+
+
+class StubGroqClient:
+    """Lokaler Ersatz für groq.Groq mit Aufrufzähler"""
+
+    def __init__(self, delay: float = 0.0, fail_after: int = None):
+        self.calls = 0
+        self.delay = delay
+        self.fail_after = fail_after  # Stream bricht nach n Chunks ab
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, stream=False, **params):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        content = f"Antwort auf: {messages[-1]['content'][:40]}"
+        if stream:
+            return self.stream(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+    def stream(self, content):
+        for i, token in enumerate([content[:10], content[10:], None]):
+            if i == self.fail_after:
+                raise ConnectionError("Verbindung unterbrochen")
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token))]
+            )
+
+
+def test_cache_persists_and_expires():
+    """Antworten überleben einen Neustart und verfallen nach der TTL"""
+
+    print("🧪 Test: Persistenter Response-Cache")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, "responses.json")
+        messages = [{"role": "user", "content": "Wanderung zum Seealpsee"}]
+        key = GroqResponseCache.make_key(messages, {"model": "m", "temperature": 0.7})
+
+        GroqResponseCache(cache_file).put(key, "gespeichert")
+        assert GroqResponseCache(cache_file).get(key) == "gespeichert"
+
+        other_key = GroqResponseCache.make_key(
+            messages, {"model": "m", "temperature": 0.8}
+        )
+        assert other_key != key
+
+        expiring = GroqResponseCache(cache_file, ttl_seconds=0.01)
+        time.sleep(0.02)
+        assert expiring.get(key) is None
+
+
+def test_concurrent_requests_are_coalesced():
+    """Gleichzeitige identische Anfragen lösen nur einen Upstream-Aufruf aus"""
+
+    print("🧪 Test: Request-Coalescing")
+
+    stub = StubGroqClient(delay=0.2)
+    cache = GroqResponseCache(cache_file=None)
+    key = "gleiche-anfrage"
+
+    def create():
+        return (
+            stub.chat.completions.create(messages=[{"role": "user", "content": "x"}])
+            .choices[0]
+            .message.content
+        )
+
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda: responses.append(cache.get_or_create(key, create))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.calls == 1
+    assert len(set(responses)) == 1 and len(responses) == 5
+    print(f"   ✅ {cache.stats()['coalesced']} Anfragen zusammengeführt")
+
+
+def test_advanced_groq_uses_response_cache():
+    """Wiederholte Suche nach einem Streamlit-Rerun ruft Groq nicht erneut auf"""
+
+    print("🧪 Test: AdvancedGroqRAG mit Stub-Client")
+
+    rag_system = AdvancedGroqRAG(
+        groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+    )
+    rag_system.groq_client = StubGroqClient()
+
+    query = "Einfache Wanderung mit Restaurant"
+    results = rag_system.retrieve(query, k=3)
+    first = rag_system.generate_intelligent_response(query, results)
+    second = rag_system.generate_intelligent_response(query, results)
+
+    assert first == second
+    assert rag_system.groq_client.calls == 1
+
+
+def test_streamed_response_matches_cached_response():
+    """Gestreamte Chunks ergeben dieselbe Antwort wie der nicht gestreamte Pfad"""
+
+    print("🧪 Test: Streaming-Antwort")
+
+    rag_system = AdvancedGroqRAG(
+        groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+    )
+    rag_system.groq_client = StubGroqClient()
+
+    query = "Aussichtsreiche Wanderung im Alpstein"
+    results = rag_system.retrieve(query, k=3)
+    chunks = list(rag_system.stream_intelligent_response(query, results))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == rag_system.generate_intelligent_response(query, results)
+    assert rag_system.groq_client.calls == 1
+    print(f"   ✅ {len(chunks)} Chunks gestreamt")
+
+
+def test_interrupted_stream_is_marked_and_not_cached():
+    """Abbruch nach dem ersten Chunk zeigt einen Hinweis, die Antwort wird nicht gecacht"""
+
+    print("🧪 Test: Abgebrochener Stream")
+
+    rag_system = AdvancedGroqRAG(
+        groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+    )
+    rag_system.groq_client = StubGroqClient(fail_after=1)
+
+    query = "Aussichtsreiche Wanderung im Alpstein"
+    results = rag_system.retrieve(query, k=3)
+    chunks = list(rag_system.stream_intelligent_response(query, results))
+
+    assert len(chunks) == 2
+    assert AdvancedGroqRAG.INCOMPLETE_RESPONSE_NOTICE in chunks[1]
+    assert results[0].route["title"] in chunks[1]  # Fallback angehängt
+
+    rag_system.groq_client.fail_after = None
+    complete = "".join(rag_system.stream_intelligent_response(query, results))
+    assert AdvancedGroqRAG.INCOMPLETE_RESPONSE_NOTICE not in complete
+    assert rag_system.groq_client.calls == 2
+    print("   ✅ Hinweis angezeigt, vollständige Antwort neu angefragt")
+
+
+def test_concurrent_streams_are_coalesced():
+    """Gleichzeitige identische Streams lösen nur einen Upstream-Aufruf aus"""
+
+    print("🧪 Test: Coalescing beim Streaming")
+
+    rag_system = AdvancedGroqRAG(
+        groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+    )
+    rag_system.groq_client = StubGroqClient(delay=0.2)
+
+    query = "Aussichtsreiche Wanderung im Alpstein"
+    results = rag_system.retrieve(query, k=3)
+
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda: responses.append(
+                "".join(rag_system.stream_intelligent_response(query, results))
+            )
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert rag_system.groq_client.calls == 1
+    assert len(responses) == 4 and len(set(responses)) == 1
+    assert rag_system.response_cache.stats()["coalesced"] == 3
+    print(
+        f"   ✅ {rag_system.response_cache.stats()['coalesced']} Streams zusammengeführt"
+    )
+
+
+if __name__ == "__main__":
+    test_cache_persists_and_expires()
+    test_concurrent_requests_are_coalesced()
+    test_advanced_groq_uses_response_cache()
+    test_streamed_response_matches_cached_response()
+    test_interrupted_stream_is_marked_and_not_cached()
+    test_concurrent_streams_are_coalesced()
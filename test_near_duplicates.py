@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test Script für die Near-Duplicate Erkennung
+============================================
+
+Vergleicht MinHash/LSH mit dem exakten paarweisen Jaccard-Vergleich auf den
+ZKB-Routen und prüft die Einbindung in den ZKBProcessor.
+"""
+
+import itertools
+import json
+
+from near_duplicates import MinHashDeduplicator, jaccard, route_dedup_text, shingles
+from zkb_processor import ZKBProcessor
+
+
+def test_lsh_finds_all_similar_pairs():
+    """Alle Paare über dem Schwellwert werden LSH-Kandidaten"""
+
+    print("🧪 Test: MinHash/LSH Recall")
+
+    with open("zkb_routes.json", "r", encoding="utf-8") as f:
+        routes = json.load(f)[:300]
+
+    deduplicator = MinHashDeduplicator(threshold=0.8)
+    shingle_sets = [shingles(route_dedup_text(route)) for route in routes]
+    expected = {
+        (i, j)
+        for i, j in itertools.combinations(range(len(routes)), 2)
+        if jaccard(shingle_sets[i], shingle_sets[j]) >= 0.8
+    }
+    candidates = deduplicator.candidate_pairs(
+        [deduplicator.signature(s) for s in shingle_sets]
+    )
+
+    assert expected and expected <= candidates
+    print(f"   ✅ {len(expected)} ähnliche Paare, {len(candidates)} Kandidaten")
+
+
+def test_zkb_deduplicate_merges_near_duplicates():
+    """Erste Fundstelle bleibt, fast identische Einträge landen im Report"""
+
+    print("🧪 Test: ZKB Deduplizierung")
+
+    base = {
+        "title": "Rundwanderung Hörnli",
+        "description": "Vom Bahnhof Steg über den Grat auf das Hörnli mit Aussicht "
+        "auf Alpen und Säntis, Abstieg nach Bauma durch das Tösstal.",
+    }
+    routes = [
+        base,
+        {"title": "Napoleontour TG", "description": "Arenenberg und Untersee."},
+        {**base, "title": "Rundwanderung Hörnli."},
+        {**base, "description": base["description"] + " Einkehr unterwegs."},
+    ]
+
+    processor = ZKBProcessor()
+    unique = processor.remove_near_duplicates(routes)
+
+    assert unique == routes[:2]
+    assert processor.duplicate_clusters[0].merged_indices == [2, 3]
+    assert processor.duplicate_clusters[0].min_similarity >= 0.8
+
+
+if __name__ == "__main__":
+    test_lsh_finds_all_similar_pairs()
+    test_zkb_deduplicate_merges_near_duplicates()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test Script für den Passagen-Index über PDF-Seiten
+==================================================
+
+Prüft die überlappende Zerlegung in Passagen, die Auswahl innerhalb des
+Token-Budgets und dass der Groq-Kontext passende Passagen auch von
+hinteren Seiten einer PDF enthält.
+"""
+
+import os
+import shutil
+import tempfile
+
+from advanced_groq_system import AdvancedGroqRAG
+from groq_response_cache import GroqResponseCache
+from page_cache import PageTextCache
+from passage_index import PassageIndex, page_passages, split_into_chunks
+from prompt_builder import estimate_tokens
+from test_pdf_ingestion import write_text_pdf
+
+
+def test_chunks_overlap_and_cover_all_words():
+    """Passagen überlappen um overlap_words und decken alle Wörter ab"""
+
+    print("🧪 Test: Überlappende Passagen")
+
+    words = [f"w{i}" for i in range(25)]
+    chunks = split_into_chunks(" ".join(words), chunk_words=10, overlap_words=3)
+
+    assert [len(chunk.split()) for chunk in chunks] == [10, 10, 10, 4]
+    assert chunks[0].split()[-3:] == chunks[1].split()[:3]
+    assert chunks[-1].split()[-1] == "w24"
+    assert split_into_chunks("   ") == []
+
+    passages = page_passages("guide.pdf", {2: "b c", 1: "a"})
+    assert [(p.page, p.text) for p in passages] == [(1, "a"), (2, "b c")]
+    print(f"   ✅ {len(chunks)} Passagen aus {len(words)} Wörtern")
+
+
+def test_select_respects_token_budget():
+    """Nur relevante Passagen, zusammen höchstens token_budget Tokens"""
+
+    print("🧪 Test: Auswahl im Token-Budget")
+
+    pages = {
+        1: "Anreise mit dem Postauto nach Wasserauen",
+        2: "Der Seealpsee liegt idyllisch unter dem Säntis " * 4,
+        3: "Am Seealpsee gibt es ein Berggasthaus",
+        4: "Fondue und Käse aus der Region",
+    }
+    index = PassageIndex(page_passages("guide.pdf", pages))
+
+    assert index.search("Gletscher Skitour") == []
+
+    budget = estimate_tokens(pages[3]) + 5
+    selected = index.select("Seealpsee", token_budget=budget)
+    assert [passage.page for passage in selected] == [3]
+    assert sum(estimate_tokens(p.text) for p in selected) <= budget
+
+    selected = index.select("Seealpsee", token_budget=1000)
+    assert {passage.page for passage in selected} == {2, 3}
+    print(f"   ✅ Budget {budget}: Seite 3 gewählt")
+
+
+def test_enhanced_context_uses_relevant_pdf_pages():
+    """Kontext enthält die passende Passage von Seite 9 statt der ersten Seiten"""
+
+    print("🧪 Test: PDF-Passagen im Groq-Kontext")
+
+    repo_dir = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(os.path.join(repo_dir, "appenzell_routes_clean.json"), tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, "PDFs"))
+        pages = [[f"Seite {i} allgemeine Hinweise zum Wandern"] for i in range(1, 9)]
+        pages.append(["Der Zahme Gocht ist ein Kletterfels beim Altmann"])
+        write_text_pdf(os.path.join(tmp_dir, "PDFs", "guide.pdf"), pages)
+        os.chdir(tmp_dir)
+
+        rag_system = AdvancedGroqRAG(
+            groq_api_key="stub",
+            response_cache=GroqResponseCache(cache_file=None),
+            page_cache=PageTextCache(os.path.join(tmp_dir, "cache")),
+        )
+        pdf_paths = [os.path.join("PDFs", "guide.pdf")]
+        index = rag_system.pdf_extractor.submit_all(
+            "passages", pdf_paths, rag_system.build_passage_index
+        ).result(timeout=10)
+        assert len(index) == 9
+
+        query = "Kletterfels Zahme Gocht"
+        context = rag_system.create_enhanced_context(query, rag_system.retrieve(query))
+        assert "guide.pdf (S. 9): Der Zahme Gocht" in context
+        assert "Seite 1 allgemeine" not in context
+        rag_system.pdf_extractor.shutdown(wait=True)
+        print("   ✅ Seite 9 im Kontext")
+    finally:
+        os.chdir(repo_dir)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_chunks_overlap_and_cover_all_words()
+    test_select_respects_token_budget()
+    test_enhanced_context_uses_relevant_pdf_pages()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test Script für die PDF-Ingestion
+=================================
+
+Erstellt eine kleine Test-PDF und prüft, dass die parallele Extraktion
+dieselben Routen in derselben Reihenfolge liefert wie die serielle und
+dass unveränderte Seiten aus dem Seiten-Cache kommen.
+"""
+
+import os
+import tempfile
+from typing import List
+
+from appenzell_processor import AppenzellProcessor
+from page_cache import PageTextCache
+from zkb_processor import ZKBProcessor
+
+
+def write_text_pdf(path: str, pages: List[List[str]]):
+    """Schreibt eine minimale PDF mit einer Textzeile pro Listeneintrag"""
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None]
+    page_refs = []
+
+    for lines in pages:
+        commands = ["BT", "/F1 11 Tf", "14 TL", "40 800 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            commands.append(f"({escaped}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1")
+            + stream
+            + b"\nendstream"
+        )
+        content_ref = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Contents {content_ref} 0 R "
+            "/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 "
+            "/BaseFont /Helvetica /Encoding /WinAnsiEncoding >> >> >> >>"
+        )
+        page_refs.append(f"{len(objects)} 0 R")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        body = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        data += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+
+    xref_offset = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        data += f"{offset:010d} 00000 n \n".encode("latin-1")
+    data += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode("latin-1")
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+DESTINATIONS = ["Ebenalp", "Hoher Kasten", "Kronberg", "Faelensee", "Saentis", "Gonten"]
+
+
+def route_page(number: int) -> List[str]:
+    destination = DESTINATIONS[number % len(DESTINATIONS)]
+    return [
+        f"WANDERUNG NUMMER {number} ZUM SEEALPSEE",
+        f"{number}.5 km {100 + number} m {90 + number} m",
+        "Wanderzeit 2 Stunden 30 Minuten SAC-Wanderskala T 2",
+        f"Route {number} fuehrt ueber {destination} mit Aussicht auf den Alpstein.",
+        f"Einkehr im Berggasthaus {destination} nach Etappe {number}.",
+    ]
+
+
+def create_test_processor(cache_dir: str) -> AppenzellProcessor:
+    processor = AppenzellProcessor(PageTextCache(cache_dir))
+    processor.config = {
+        "start_page": 1,
+        "end_page": 6,
+        "skip_pages": {2},
+        "double_pages": {4: [4, 5]},
+    }
+    return processor
+
+
+def test_parallel_ingestion_matches_serial():
+    """Prozess-Pool liefert dieselben Routen in Seitenreihenfolge"""
+
+    print("🧪 Test: Parallele PDF-Ingestion")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "test.pdf")
+        write_text_pdf(pdf_path, [route_page(i) for i in range(1, 7)])
+
+        serial_processor = create_test_processor(os.path.join(tmp_dir, "serial"))
+        assert serial_processor.plan_page_groups() == [[1], [3], [4, 5], [6]]
+        serial = serial_processor.process_appenzell_pdf(pdf_path)
+
+        parallel_processor = create_test_processor(os.path.join(tmp_dir, "parallel"))
+        parallel = parallel_processor.process_appenzell_pdf(pdf_path, max_workers=2)
+
+    assert len(serial) == 4
+    assert [r["page_number"] for r in serial] == [1, 3, 4, 6]
+    assert "--- Seite 5 ---" in serial[2]["raw_text"]
+    assert parallel == serial
+    print(f"   ✅ {len(parallel)} Routen identisch extrahiert")
+
+
+def test_page_cache_skips_unchanged_pages():
+    """Zweiter Lauf liest nur noch aus dem Cache, geänderte PDFs werden neu gelesen"""
+
+    print("🧪 Test: Seiten-Cache")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "cache")
+        pdf_path = os.path.join(tmp_dir, "test.pdf")
+        write_text_pdf(pdf_path, [route_page(i) for i in range(1, 7)])
+
+        first = create_test_processor(cache_dir).process_appenzell_pdf(pdf_path)
+
+        processor = create_test_processor(cache_dir)
+        second = processor.process_appenzell_pdf(pdf_path)
+        assert second == first
+        assert processor.page_cache.stats()["misses"] == 0
+
+        write_text_pdf(pdf_path, [route_page(i + 10) for i in range(1, 7)])
+        changed = processor.process_appenzell_pdf(pdf_path)
+        assert changed[0]["title"] == "WANDERUNG NUMMER 11 ZUM SEEALPSEE"
+        assert processor.page_cache.stats()["misses"] == 5
+
+        # ZKB-Processor liest die Seiten im Plain-Modus über denselben Cache
+        zkb_cache = PageTextCache(cache_dir)
+        ZKBProcessor(zkb_cache).extract_zkb_routes(pdf_path, max_pages=3)
+        ZKBProcessor(zkb_cache).extract_zkb_routes(pdf_path, max_pages=3)
+        assert zkb_cache.stats() == {"files": 1, "hits": 3, "misses": 3}
+
+    print("   ✅ Unveränderte Seiten kommen aus dem Cache")
+
+
+if __name__ == "__main__":
+    test_parallel_ingestion_matches_serial()
+    test_page_cache_skips_unchanged_pages()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test Script für den Prompt-Aufbau mit Token-Budget
+==================================================
+
+Prüft die lokale Token-Schätzung, das Kürzen an Wortgrenzen und dass das
+Budget nach Priorität gefüllt wird (Top-Route vor Alternativen vor PDFs).
+"""
+
+from advanced_groq_system import AdvancedGroqRAG
+from groq_response_cache import GroqResponseCache
+from prompt_builder import PromptBuilder, estimate_tokens, truncate_to_tokens
+from test_groq_response_cache import StubGroqClient
+
+
+def test_estimate_and_truncate():
+    """Schätzung zählt Wörter, Ziffergruppen und Zeichen; Kürzen hält das Limit"""
+
+    print("🧪 Test: Token-Schätzung")
+
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Wanderung zum See") == 2 + 1 + 1
+    assert estimate_tokens("2225m, T3") == 2 + 1 + 1 + 1 + 1
+
+    text = " ".join(["Seealpsee"] * 50)
+    shortened = truncate_to_tokens(text, 30)
+    assert shortened.endswith("Seealpsee...")
+    assert estimate_tokens(shortened) <= 30
+    assert truncate_to_tokens("kurz", 30) == "kurz"
+    print(f"   ✅ {estimate_tokens(text)} -> {estimate_tokens(shortened)} Tokens")
+
+
+def test_budget_filled_by_priority():
+    """Top-Route ganz, Alternative gekürzt, PDF-Passage weggelassen"""
+
+    print("🧪 Test: Budget nach Priorität")
+
+    builder = PromptBuilder(token_budget=60)
+    builder.add("route_1", "Top Route " + "Aufstieg " * 10, priority=0)
+    builder.add("pdf", "• guide.pdf (S. 3): Seealpsee", priority=2, heading="PDF:")
+    builder.add("route_2", "Alternative " + "Abstieg " * 40, 1, truncatable=True)
+    context, usage = builder.build()
+
+    assert usage.dropped == ["pdf"] and usage.truncated == ["route_2"]
+    assert usage.context_tokens <= usage.budget
+    assert context.startswith("Top Route") and "PDF:" not in context
+
+    builder = PromptBuilder(token_budget=100)
+    builder.add("a", "Passage eins", priority=2, heading="PDF:")
+    builder.add("b", "Passage zwei", priority=2, heading="PDF:")
+    context, usage = builder.build()
+    assert context == "PDF:\nPassage eins\nPassage zwei"
+    assert usage.context_tokens == sum(usage.sections.values())
+    print(f"   ✅ {usage.sections}")
+
+
+def test_response_messages_report_prompt_usage():
+    """Jede Anfrage hält den Token-Verbrauch des Prompts fest"""
+
+    print("🧪 Test: Token-Verbrauch pro Anfrage")
+
+    rag_system = AdvancedGroqRAG(
+        groq_api_key="stub", response_cache=GroqResponseCache(cache_file=None)
+    )
+    rag_system.CONTEXT_TOKEN_BUDGET = 300
+
+    query = "Seealpsee Wanderung mit Restaurant"
+    results = rag_system.retrieve(query)
+    messages, usage = rag_system.build_response_messages(query, results)
+
+    assert 0 < usage.context_tokens <= 300
+    assert "route_1" in usage.sections and "route_1" not in usage.dropped
+    assert usage.prompt_tokens == sum(estimate_tokens(m["content"]) for m in messages)
+
+    # Streaming meldet den Verbrauch pro Anfrage, nicht am geteilten System
+    rag_system.groq_client = StubGroqClient()
+    usages = []
+    "".join(rag_system.stream_intelligent_response(query, results, usages.append))
+    assert usages == [usage]
+    assert not hasattr(rag_system, "last_prompt_usage")
+    print(f"   ✅ {usage.prompt_tokens} Tokens, Kontext {usage.context_tokens}/300")
+
+
+if __name__ == "__main__":
+    test_estimate_and_truncate()
+    test_budget_filled_by_priority()
+    test_response_messages_report_prompt_usage()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test Script für den Retrieval-Cache
+===================================
+
+Prüft LRU-Verdrängung, TTL und die Invalidierung beim Index-Neuaufbau,
+auch wenn die Routen-Datei ohne reload() geändert wird.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from query_cache import LRUCache
+from rag_hiking_system import AppenzellHikingRAG
+
+
+def test_lru_eviction_and_ttl():
+    """Älteste Einträge werden verdrängt, abgelaufene nicht mehr geliefert"""
+
+    print("🧪 Test: LRU-Cache")
+
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" ist jetzt der jüngste Eintrag
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+    expiring = LRUCache(max_size=10, ttl_seconds=0.01)
+    expiring.put("x", "wert")
+    time.sleep(0.02)
+    assert expiring.get("x") is None
+
+    stats = cache.stats()
+    print(f"   ✅ Hits: {stats['hits']}, Misses: {stats['misses']}")
+
+
+def test_retrieve_uses_cache_and_invalidates_on_reload():
+    """Wiederholte Anfragen treffen den Cache, reload() leert ihn"""
+
+    print("🧪 Test: Retrieval-Cache")
+
+    rag_system = AppenzellHikingRAG()
+    first = rag_system.retrieve("Einfache Wanderung mit Restaurant", k=3)
+    second = rag_system.retrieve("  einfache wanderung MIT restaurant ", k=3)
+
+    assert [r.route["id"] for r in first] == [r.route["id"] for r in second]
+    assert rag_system.result_cache.hits == 1
+
+    version = rag_system.index_version
+    rag_system.reload()
+    assert rag_system.index_version != version
+    assert len(rag_system.result_cache) == 0
+
+    rag_system.retrieve("Einfache Wanderung mit Restaurant", k=3)
+    assert rag_system.result_cache.hits == 1
+
+
+def test_changed_routes_file_invalidates_cache():
+    """Geänderte Routen-Datei führt beim nächsten retrieve() zu einem Miss"""
+
+    print("🧪 Test: Cache-Invalidierung bei geänderter Routen-Datei")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        routes_file = os.path.join(tmp_dir, "routes.json")
+        shutil.copy("appenzell_routes_clean.json", routes_file)
+        rag_system = AppenzellHikingRAG(routes_file, use_index_snapshot=False)
+
+        query = "Wanderung zum Seealpsee"
+        before = rag_system.retrieve(query, k=3)
+        rag_system.retrieve(query, k=3)
+        assert rag_system.result_cache.hits == 1
+
+        # Top-Route umbenennen und Datei neu schreiben (mtime sicher neuer)
+        with open(routes_file, "r", encoding="utf-8") as f:
+            routes = json.load(f)
+        top_id = before[0].route["id"]
+        for route in routes:
+            if route["id"] == top_id:
+                route["title"] = "Umbenannte Route"
+        with open(routes_file, "w", encoding="utf-8") as f:
+            json.dump(routes, f, ensure_ascii=False)
+        mtime_ns = rag_system.routes_signature[1] + 10**9
+        os.utime(routes_file, ns=(mtime_ns, mtime_ns))
+
+        version = rag_system.index_version
+        stats = rag_system.result_cache.stats()
+        rag_system.retrieve(query, k=3)
+        assert rag_system.index_version != version
+        assert rag_system.result_cache.hits == stats["hits"]
+        assert rag_system.result_cache.misses == stats["misses"] + 1
+        position = rag_system.route_positions[top_id]
+        assert rag_system.routes[position]["title"] == "Umbenannte Route"
+        print(f"   ✅ Neu geladen: {version} -> {rag_system.index_version}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_concurrent_retrieve_during_reload():
+    """Anfragen während reload() sehen immer einen vollständigen Stand"""
+
+    print("🧪 Test: Retrieval während Neuaufbau")
+
+    with open("appenzell_routes_clean.json", "r", encoding="utf-8") as f:
+        routes = json.load(f)
+    routes_by_id = {route["id"]: route for route in routes}
+    # Zweiter Stand: andere Reihenfolge und weniger Routen (andere Positionen)
+    variants = [routes, list(reversed(routes[5:]))]
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        routes_file = os.path.join(tmp_dir, "routes.json")
+        shutil.copy("appenzell_routes_clean.json", routes_file)
+        rag_system = AppenzellHikingRAG(
+            routes_file, use_index_snapshot=False, cache_size=0
+        )
+
+        # Ein gehaltener Stand bleibt nach reload() unverändert
+        state = rag_system.state
+        rag_system.reload()
+        assert rag_system.state is not state
+        assert state.semantic_retriever is not rag_system.semantic_retriever
+
+        errors = []
+        done = threading.Event()
+
+        def search():
+            while not done.is_set():
+                try:
+                    for result in rag_system.retrieve("Wanderung zum Seealpsee", k=3):
+                        assert result.route == routes_by_id[result.route["id"]]
+                    rag_system.retrieve_many(["Ebenalp", "Restaurant"], k=2)
+                except Exception as e:  # KeyError/IndexError bei gemischtem Stand
+                    errors.append(e)
+
+        threads = [threading.Thread(target=search) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(8):
+                with open(routes_file, "w", encoding="utf-8") as f:
+                    json.dump(variants[i % 2], f, ensure_ascii=False)
+                rag_system.reload()
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+
+        assert errors == [], errors[:3]
+        print(f"   ✅ 8 Neuaufbauten, Stand {rag_system.index_version}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_retrieve_uses_cache_and_invalidates_on_reload()
+    test_changed_routes_file_invalidates_cache()
+    test_concurrent_retrieve_during_reload()
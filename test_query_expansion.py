@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test Script für die Query Expansion
+===================================
+
+Vergleicht den Aho-Corasick Matcher und die memoisierte Query Expansion
+mit einer einfachen Teilstring-Suche pro Begriff (ursprüngliche
+Implementierung), inkl. überlappender Begriffe und Umlaute.
+"""
+
+import random
+
+from rag_hiking_system import HikingQuery, QueryExpander
+from term_matcher import TermMatcher
+
+QUERIES = [
+    "Ich möchte eine einfache Wanderung mit Restaurant",
+    "Sehr schwere Bergtour zum Säntis, viele Höhenmeter",
+    "Kurze Familienwanderung zum Seealpsee mit Einkehr",
+    "ganztags wandern über Ebenalp, Aescher und Schäfler",
+    "Flache Route am See mit Gasthaus und Essen",
+    "mäßig steiler Aufstieg zum Hohen Kasten",
+    "Anfänger Tour 2 Stunden ab Wasserauen nach Brülisau",
+    "Experte: extrem lange Gratwanderung",
+    "leichte Wanderung mit schnellem Abstieg, ebenes Gelände",
+    "SÄNTIS ALPSTEIN MEGLISALP",
+    "",
+    "xyz",
+]
+
+
+def reference_expand(expander: QueryExpander, query: str) -> HikingQuery:
+    """Ursprüngliche Expansion: Teilstring-Suche für jeden Begriff einzeln"""
+    query_lower = query.lower()
+    expanded_terms = [query]
+    hiking_query = HikingQuery(original_query=query)
+
+    for difficulty, sac_level in expander.difficulty_mapping.items():
+        if difficulty in query_lower:
+            hiking_query.difficulty_preference = sac_level
+            break
+
+    if any(term in query_lower for term in expander.duration_terms["kurz"]):
+        hiking_query.duration_preference = "kurz"
+    elif any(term in query_lower for term in expander.duration_terms["lang"]):
+        hiking_query.duration_preference = "lang"
+    else:
+        hiking_query.duration_preference = "mittel"
+
+    if any(term in query_lower for term in expander.elevation_terms["flach"]):
+        hiking_query.elevation_preference = "flach"
+    elif any(term in query_lower for term in expander.elevation_terms["anspruchsvoll"]):
+        hiking_query.elevation_preference = "anspruchsvoll"
+    else:
+        hiking_query.elevation_preference = "mittel"
+
+    hiking_query.restaurant_required = any(
+        term in query_lower for term in expander.restaurant_terms
+    )
+
+    for word, synonyms in expander.hiking_synonyms.items():
+        if word in query_lower:
+            expanded_terms.extend(synonyms)
+
+    region_keywords = [p for p in expander.appenzell_places if p in query_lower]
+    expanded_terms.extend(region_keywords)
+
+    hiking_query.expanded_query = " ".join(set(expanded_terms))
+    hiking_query.keywords = list(set(expanded_terms))
+    hiking_query.region_keywords = region_keywords
+    return hiking_query
+
+
+def assert_same_expansion(actual: HikingQuery, expected: HikingQuery):
+    """Gleiche Präferenzen und Begriffe (Reihenfolge aus set() ist beliebig)"""
+    assert actual.original_query == expected.original_query
+    assert actual.difficulty_preference == expected.difficulty_preference
+    assert actual.duration_preference == expected.duration_preference
+    assert actual.elevation_preference == expected.elevation_preference
+    assert actual.restaurant_required == expected.restaurant_required
+    assert actual.region_keywords == expected.region_keywords
+    assert sorted(actual.keywords) == sorted(expected.keywords)
+    assert sorted(actual.expanded_query.split()) == sorted(
+        expected.expanded_query.split()
+    )
+
+
+def test_term_matcher_matches_substring_scan():
+    """Alle Treffer inkl. Überlappungen und Umlauten wie bei 'term in text'"""
+
+    print("🧪 Test: Aho-Corasick Matcher")
+
+    terms = ["schwer", "sehr schwer", "see", "seealpsee", "alp", "säntis", "ä", "ab"]
+    terms += ["abc", "bc", "c", "höhe", "höhenmeter", "mäßig"]
+    matcher = TermMatcher(terms + [""])
+
+    rng = random.Random(7)
+    alphabet = "abcehlmnprswäöüß t"
+    texts = ["sehr schwere tour", "seealpsee", "höhenmeter", "mäßig", "abc"]
+    texts += ["".join(rng.choice(alphabet) for _ in range(30)) for _ in range(300)]
+
+    for text in texts:
+        assert matcher.find_all(text) == {t for t in terms if t in text}, text
+    assert TermMatcher([]).find_all("text") == set()
+    print(f"   ✅ {len(texts)} Texte")
+
+
+def test_expand_query_matches_reference_and_memo():
+    """Expansion entspricht der Teilstring-Suche; Memo liefert gleiche Ergebnisse"""
+
+    print("🧪 Test: Query Expansion mit Memo")
+
+    expander = QueryExpander()
+    for query in QUERIES:
+        expected = reference_expand(expander, query)
+        first = expander.expand_query(query)
+        assert_same_expansion(first, expected)
+
+        # Zweiter Aufruf aus dem Memo, auch mit anderer Gross-/Kleinschreibung
+        hits = expander._expansion_cache.hits
+        assert_same_expansion(expander.expand_query(query), expected)
+        assert_same_expansion(
+            expander.expand_query(query.upper()),
+            reference_expand(expander, query.upper()),
+        )
+        # "ß".upper() ist "SS": dann ist es eine andere Anfrage (kein Memo-Treffer)
+        same_key = query.upper().lower() == query.lower()
+        assert expander._expansion_cache.hits == hits + (2 if same_key else 1)
+
+    # Das Memo darf nicht durch Aufrufer verändert werden
+    result = expander.expand_query(QUERIES[0])
+    result.keywords.append("fremd")
+    result.region_keywords.append("fremd")
+    assert_same_expansion(
+        expander.expand_query(QUERIES[0]), reference_expand(expander, QUERIES[0])
+    )
+    print(
+        f"   ✅ {len(QUERIES)} Anfragen, {expander._expansion_cache.hits} Memo-Treffer"
+    )
+
+
+if __name__ == "__main__":
+    test_term_matcher_matches_substring_scan()
+    test_expand_query_matches_reference_and_memo()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Test Script für die Retrieval-Indizes
+=====================================
+
+Prüft, dass die optimierten Indizes dieselben Ergebnisse liefern wie
+die ursprüngliche Brute-Force-Berechnung.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from index_snapshot import IndexSnapshot, snapshot_dir_for
+from rag_hiking_system import (
+    AppenzellHikingRAG,
+    HikingQuery,
+    PreferenceReRanker,
+    RouteFilters,
+    SemanticRetriever,
+    top_k_indices,
+)
+from route_catalogue import MultiCatalogueRAG, normalize_routes
+from route_store import RouteStore
+from tracing import SpanRecorder
+
+
+TEST_QUERIES = [
+    "Ich möchte eine einfache Wanderung mit Restaurant",
+    "Suche anspruchsvolle Bergtouren mit schöner Aussicht",
+    "Kurze Familienwanderung in der Nähe von einem See",
+    "Wanderung zur Ebenalp mit Restaurant",
+]
+
+
+def brute_force_keyword_search(retriever, query: str, k: int):
+    """Referenz-Implementierung: Jaccard über alle Routen"""
+    query_words = set(query.lower().split())
+    results = []
+    for route, text in zip(retriever.routes, retriever.route_texts):
+        text_words = set(text.split())
+        similarity = len(query_words & text_words) / len(query_words | text_words)
+        if similarity > 0:
+            results.append((route, similarity))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results[:k]
+
+
+def test_top_k_indices_matches_stable_sort():
+    """Partial Selection liefert dieselbe Reihenfolge wie eine stabile Sortierung"""
+
+    print("🧪 Test: top_k_indices")
+
+    rng = np.random.default_rng(42)
+    for _ in range(200):
+        scores = rng.integers(0, 4, rng.integers(0, 25)).astype(float)
+        k = int(rng.integers(0, 30))
+        expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+        assert list(top_k_indices(scores, k)) == expected
+
+
+def test_keyword_inverted_index():
+    """Invertierter Index entspricht der Brute-Force Jaccard-Suche"""
+
+    print("🧪 Test: Keyword-Index")
+
+    rag_system = AppenzellHikingRAG()
+    retriever = rag_system.keyword_retriever
+
+    for query in TEST_QUERIES:
+        expanded = rag_system.query_expander.expand_query(query).expanded_query
+        expected = brute_force_keyword_search(retriever, expanded, k=10)
+        actual = retriever.search(expanded, k=10)
+
+        assert [(r["id"], s) for r, s in actual] == [(r["id"], s) for r, s in expected]
+        print(f"   ✅ {query}: {len(actual)} Treffer")
+
+
+def test_index_snapshot_roundtrip():
+    """Snapshot wird geschrieben, wiederverwendet und bei Änderungen verworfen"""
+
+    print("🧪 Test: Index-Snapshot")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        routes_file = os.path.join(tmp_dir, "routes.json")
+        shutil.copy("appenzell_routes_clean.json", routes_file)
+
+        built = AppenzellHikingRAG(routes_file)
+        snapshot = IndexSnapshot(snapshot_dir_for(routes_file))
+        first_generation = snapshot.current_generation()
+        assert snapshot.read_meta()["routes_hash"] == built.routes_hash
+
+        loaded = AppenzellHikingRAG(routes_file)
+        assert loaded._load_index_snapshot()
+        for query in TEST_QUERIES:
+            assert [(r.route["id"], r.final_score) for r in built.retrieve(query)] == [
+                (r.route["id"], r.final_score) for r in loaded.retrieve(query)
+            ]
+
+        # Geänderte Routen-Datei -> Snapshot passt nicht mehr
+        with open(routes_file, "r", encoding="utf-8") as f:
+            routes = json.load(f)
+        with open(routes_file, "w", encoding="utf-8") as f:
+            json.dump(routes[:-1], f, ensure_ascii=False)
+
+        rebuilt = AppenzellHikingRAG(routes_file, use_index_snapshot=False)
+        assert not rebuilt._load_index_snapshot()
+        assert len(rebuilt.routes) == len(routes) - 1
+
+        # Generation eines anderen Prozesses, die gerade geschrieben wird
+        foreign_generation = os.path.join(snapshot.directory, "gen-fremd")
+        os.makedirs(foreign_generation)
+        np.save(os.path.join(foreign_generation, "idf.npy"), np.zeros(3))
+
+        # Neue Generation ersetzt die alte erst nach dem vollständigen Schreiben
+        rebuilt._save_index_snapshot()
+        assert snapshot.current_generation() != first_generation
+        assert not os.path.exists(first_generation)
+        assert set(os.listdir(snapshot.directory)) == {
+            "CURRENT",
+            "gen-fremd",
+            os.path.basename(snapshot.current_generation()),
+        }
+        assert os.listdir(foreign_generation) == ["idf.npy"]
+        assert rebuilt._load_index_snapshot()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_score_routes_matches_per_route_scores():
+    """Vektorisierte Präferenz-Scores entsprechen der Einzelrouten-Bewertung"""
+
+    print("🧪 Test: Präferenz-Scores über Spaltentabelle")
+
+    routes = []
+    for routes_file in ["appenzell_routes_clean.json", "zkb_routes.json"]:
+        with open(routes_file, "r", encoding="utf-8") as f:
+            routes.extend(json.load(f))
+
+    # Mehrstufige und unübliche SAC-Angaben, fehlende Felder
+    for sac_scale in ["T2-T3", "t3", "T4 / T5", "T 2", "", "Wanderweg"]:
+        routes.append({"title": "X", "sac_scale": sac_scale, "duration": "2 h"})
+    routes.append({"title": "Leer"})
+
+    reranker = PreferenceReRanker()
+    attributes = reranker.build_attributes(routes)
+
+    for difficulty, duration, elevation, restaurant in itertools.product(
+        [None, "T1", "T2", "T3", "T5"],
+        [None, *reranker.duration_mapping],
+        [None, *reranker.elevation_mapping],
+        [False, True],
+    ):
+        query = HikingQuery(
+            "test",
+            difficulty_preference=difficulty,
+            duration_preference=duration,
+            elevation_preference=elevation,
+            restaurant_required=restaurant,
+        )
+        scores = reranker.score_routes(attributes, query)
+        expected = [reranker.calculate_preference_score(r, query) for r in routes]
+        assert np.allclose(scores, expected), query
+
+    t3_query = HikingQuery("test", difficulty_preference="T3")
+    assert reranker.score_routes(attributes, t3_query)[-7] == 0.3  # "T2-T3"
+    print(f"   ✅ {len(routes)} Routen x 240 Präferenz-Kombinationen")
+
+
+def test_bitmap_prefiltering():
+    """Gefilterte Suche liefert nur passende Routen mit unveränderten Scores"""
+
+    print("🧪 Test: Bitmap-Filter")
+
+    rag_system = AppenzellHikingRAG()
+    filters = RouteFilters(sac_scale=["T1", "T2"], restaurant_required=True)
+    candidates = set(rag_system.filter_index.candidates(filters).tolist())
+
+    for query in TEST_QUERIES:
+        expanded = rag_system.query_expander.expand_query(query).expanded_query
+        full_scores = {
+            route["id"]: score
+            for route, score in rag_system.semantic_retriever.search(expanded, k=100)
+        }
+
+        results = rag_system.retrieve(query, k=5, filters=filters)
+        assert results
+        for result in results:
+            assert rag_system.route_positions[result.route["id"]] in candidates
+            assert result.route["sac_scale"] in ("T1", "T2")
+            assert result.route["restaurants"]
+            if result.semantic_score:
+                assert result.semantic_score == full_scores[result.route["id"]]
+
+    # Unbekannte Region ist ein Fehler wie unbekannte Dauer/Höhenmeter
+    for unknown in [RouteFilters(regions="Mond"), RouteFilters(duration="ewig")]:
+        try:
+            rag_system.retrieve("Wanderung", filters=unknown)
+            assert False, f"{unknown} muss ValueError auslösen"
+        except ValueError:
+            pass
+    assert rag_system.retrieve("Wanderung", filters=RouteFilters(regions="APPENZELL"))
+
+
+def test_route_store_hydrates_top_k():
+    """Index hält kompakte Routen, nur die Top-k werden vollständig gelesen"""
+
+    print("🧪 Test: JSONL Routen-Store")
+
+    with open("appenzell_routes_clean.json", "r", encoding="utf-8") as f:
+        routes = json.load(f)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        routes_file = os.path.join(tmp_dir, "routes.jsonl")
+        RouteStore.write(routes, routes_file)
+
+        store = RouteStore(routes_file)
+        assert len(store) == len(routes)
+        assert store.get_many([3, 0]) == [routes[3], routes[0]]
+
+        rag_system = AppenzellHikingRAG(routes_file, use_index_snapshot=False)
+        assert all("raw_text" not in route for route in rag_system.routes)
+
+        routes_by_id = {route["id"]: route for route in routes}
+        for result in rag_system.retrieve(TEST_QUERIES[0], k=3):
+            assert result.route == routes_by_id[result.route["id"]]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_route_store_in_read_only_directory():
+    """Nicht schreibbares Verzeichnis: JSONL bleibt im Speicher, Start klappt"""
+
+    print("🧪 Test: Routen-Store in read-only Verzeichnis")
+
+    with open("appenzell_routes_clean.json", "r", encoding="utf-8") as f:
+        routes = json.load(f)
+
+    tmp_dir = tempfile.mkdtemp()
+    routes_file = os.path.join(tmp_dir, "routes.json")
+    try:
+        shutil.copy("appenzell_routes_clean.json", routes_file)
+        # Verzeichnis am JSONL-Pfad: Schreiben scheitert auch für root
+        os.mkdir(os.path.join(tmp_dir, "routes.jsonl"))
+        os.chmod(tmp_dir, 0o555)
+
+        store = RouteStore.open(routes_file)
+        assert store._data is not None and len(store) == len(routes)
+        assert store[1] == routes[1] and store[-1] == routes[-1]
+        assert store[2:4] == routes[2:4] and list(store) == routes
+        assert sorted(os.listdir(tmp_dir)) == ["routes.json", "routes.jsonl"]
+
+        rag_system = AppenzellHikingRAG(routes_file, use_index_snapshot=False)
+        assert len(rag_system.routes) == len(routes)
+        result = rag_system.retrieve(TEST_QUERIES[0], k=1)[0]
+        assert result.route == routes[rag_system.route_positions[result.route["id"]]]
+    finally:
+        os.chmod(tmp_dir, 0o755)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_multi_catalogue_sharded_top_k():
+    """Stabile IDs je Katalog, Shard-Merge entspricht dem globalen Top-k"""
+
+    print("🧪 Test: Multi-Katalog Index")
+
+    with open("zkb_routes.json", "r", encoding="utf-8") as f:
+        zkb_routes = json.load(f)
+    first = normalize_routes("zkb", zkb_routes)
+    assert [r["id"] for r in first] == [
+        r["id"] for r in normalize_routes("zkb", zkb_routes)
+    ]
+    assert len({r["id"] for r in first}) == len(zkb_routes)
+    assert first[0]["source"] == "zkb" and first[0]["source_pdf"].startswith("ZKB")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        catalogue = MultiCatalogueRAG(catalogue_dir=tmp_dir, use_index_snapshot=False)
+        assert set(catalogue.shards) == {"appenzell", "zkb"}
+
+        for query in TEST_QUERIES:
+            merged = catalogue.retrieve(query, k=5)
+            per_shard = [
+                result
+                for source in catalogue.shards
+                for result in catalogue.retrieve(query, k=5, sources=[source])
+            ]
+            expected = sorted(per_shard, key=lambda r: r.final_score, reverse=True)
+            assert [r.final_score for r in merged] == [
+                r.final_score for r in expected[:5]
+            ]
+
+        zkb_only = catalogue.retrieve(TEST_QUERIES[0], k=5, sources=["zkb"])
+        assert zkb_only and all(r.route["source"] == "zkb" for r in zkb_only)
+
+        # Regionen gehen nur an Shards, die sie kennen
+        zurich = catalogue.retrieve(
+            TEST_QUERIES[0], k=5, filters=RouteFilters(regions=["Zürich"])
+        )
+        assert zurich and all(r.route["region"] == "Zürich" for r in zurich)
+        try:
+            catalogue.retrieve_many(TEST_QUERIES, filters=RouteFilters(regions="Mond"))
+            assert False, "Unbekannte Region muss ValueError auslösen"
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_multi_catalogue_shares_idf():
+    """Semantische Scores der Shards entsprechen einem gemeinsamen Index"""
+
+    print("🧪 Test: Gemeinsame IDF über alle Kataloge")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        catalogue = MultiCatalogueRAG(catalogue_dir=tmp_dir, use_index_snapshot=True)
+        combined = SemanticRetriever()
+        combined.build_index(catalogue.routes)
+
+        # Trifft Routen aus beiden Katalogen
+        query = "Wanderung Appenzell Ebenalp"
+        expected = {
+            route["id"]: score
+            for route, score in combined.search(query, k=len(catalogue))
+        }
+        for shard in catalogue.shards.values():
+            assert shard.semantic_retriever.embedding_model.total_docs == len(catalogue)
+            for route, score in shard.semantic_retriever.search(query, k=10):
+                assert np.isclose(score, expected[route["id"]]), route["id"]
+
+        merged = catalogue.retrieve(query, k=10)
+        assert {result.route["source"] for result in merged} == {"appenzell", "zkb"}
+
+        # Snapshots gelten nur für dieselbe IDF (Einzel-Shard baut eigene auf)
+        reloaded = MultiCatalogueRAG(catalogue_dir=tmp_dir, use_index_snapshot=True)
+        assert [r.final_score for r in reloaded.retrieve(query, k=10)] == [
+            r.final_score for r in merged
+        ]
+        single = AppenzellHikingRAG(
+            catalogue.shards["appenzell"].routes_file, use_index_snapshot=True
+        )
+        assert single.semantic_retriever.embedding_model.total_docs == len(
+            single.routes
+        )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def test_retrieval_timing_breakdown():
+    """Ergebnisse tragen die Stufen-Zeiten, Histogramme aggregieren sie"""
+
+    print("🧪 Test: Span-Tracing im Retrieval")
+
+    rag = AppenzellHikingRAG(use_index_snapshot=False)
+    results = rag.retrieve(TEST_QUERIES[0], k=3)
+    cached = rag.retrieve(TEST_QUERIES[0], k=3)
+    batch = rag.retrieve_many(TEST_QUERIES, k=3)
+
+    timings = results[0].timings
+    stages = ["expand", "semantic", "keyword", "rerank", "explain", "hydrate"]
+    assert all(result.timings is timings for result in results)
+    assert all(timings[stage] > 0 for stage in stages)
+    assert timings["retrieve"] >= sum(timings[stage] for stage in stages)
+
+    # Cache-Treffer: eigene Aufschlüsselung ohne Pipeline-Stufen
+    assert "expand" not in cached[0].timings and "cache" in cached[0].timings
+    assert [r.final_score for r in cached] == [r.final_score for r in results]
+    assert "retrieve_many" in batch[1][0].timings
+
+    histograms = rag.tracer.histograms()
+    assert histograms["retrieve"]["count"] == 2
+    assert histograms["semantic"]["p50_ms"] <= histograms["semantic"]["p99_ms"]
+
+    # Deaktiviert: keine Zeiten, keine Histogramme
+    untraced = AppenzellHikingRAG(enable_tracing=False)
+    assert untraced.retrieve(TEST_QUERIES[0], k=3)[0].timings == {}
+    assert untraced.tracer.histograms() == {}
+    print(f"   ✅ Gesamt {timings['retrieve'] * 1000:.2f}ms")
+
+
+def test_traces_are_isolated_per_task():
+    """Gleichzeitige asyncio-Tasks haben eigene Traces, auch über to_thread"""
+
+    print("🧪 Test: Tracing unter asyncio")
+
+    recorder = SpanRecorder()
+
+    async def request(name: str, delay: float):
+        with recorder.trace(name) as trace:
+            with recorder.span(f"{name}_loop"):
+                await asyncio.sleep(delay)
+            await asyncio.to_thread(recorder.record, f"{name}_thread", delay)
+        return trace
+
+    async def run():
+        return await asyncio.gather(request("a", 0.02), request("b", 0.01))
+
+    first, second = asyncio.run(run())
+    assert set(first.timings) == {"a", "a_loop", "a_thread"}
+    assert set(second.timings) == {"b", "b_loop", "b_thread"}
+    assert recorder.current_trace() is None
+    assert recorder.histograms()["a_thread"]["count"] == 1
+    print(f"   ✅ {sorted(first.timings)} / {sorted(second.timings)}")
+
+
+if __name__ == "__main__":
+    test_top_k_indices_matches_stable_sort()
+    test_keyword_inverted_index()
+    test_index_snapshot_roundtrip()
+    test_score_routes_matches_per_route_scores()
+    test_bitmap_prefiltering()
+    test_route_store_hydrates_top_k()
+    test_route_store_in_read_only_directory()
+    test_multi_catalogue_sharded_top_k()
+    test_multi_catalogue_shares_idf()
+    test_retrieval_timing_breakdown()
+    test_traces_are_isolated_per_task()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test Script für die gemeinsame Feld-Extraktion
+==============================================
+
+Prüft, dass Literal-Gates und der gemeinsame Text-Durchgang dieselben
+Felder liefern wie die Einzel-Extraktion ohne Gates.
+"""
+
+from bench_route_extraction import (
+    appenzell_fields_per_field,
+    check_identical,
+    load_texts,
+    zkb_contexts,
+    zkb_fields_per_field,
+)
+from route_extraction import extract_appenzell_fields, extract_zkb_fields
+
+# Sonderfälle: Unicode-Zeichen, bei denen IGNORECASE anders faltet als lower()
+EDGE_CASES = [
+    "Wanderzeit: 3,5 h, Distanz: 12 km",
+    "2 h 30 mİn, Restaurant Hoher Kasten.",
+    "Route am ſee, 450 m Aufstieg, 300 m Abstieg",
+    "8.73 km 510 m 510 m\nSAC-Wanderskala T 2",
+    "Einfache Wanderung zum Gasthaus Sonne, 2 Std",
+]
+
+
+def test_appenzell_fields_identical():
+    """Appenzeller Felder identisch zur Einzel-Extraktion"""
+
+    print("🧪 Test: Appenzeller Feld-Extraktion")
+
+    texts = load_texts() + EDGE_CASES
+    check_identical(texts, appenzell_fields_per_field, extract_appenzell_fields)
+    print(f"   ✅ {len(texts)} Texte identisch")
+
+
+def test_zkb_fields_identical():
+    """ZKB-Felder identisch zur Einzel-Extraktion"""
+
+    print("🧪 Test: ZKB Feld-Extraktion")
+
+    contexts = zkb_contexts(load_texts()) + EDGE_CASES
+    check_identical(contexts, zkb_fields_per_field, extract_zkb_fields)
+    print(f"   ✅ {len(contexts)} Kontexte identisch")
+
+
+if __name__ == "__main__":
+    test_appenzell_fields_identical()
+    test_zkb_fields_identical()
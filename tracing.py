@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Leichtgewichtiges Span-Tracing für das RAG-System
+=================================================
+
+Misst die Dauer einzelner Pipeline-Stufen (Query Expansion, semantische
+Suche, Keyword-Suche, Re-Ranking, Erklärungen, Groq-Aufruf) über
+Context-Manager. Jede Messung landet in einem aggregierten
+Latenz-Histogramm pro Stufe und - falls gerade eine Anfrage getraced
+wird - in deren Zeit-Aufschlüsselung. Die laufende Anfrage wird in einer
+ContextVar gehalten: asyncio-Tasks haben je einen eigenen Trace, und
+asyncio.to_thread übernimmt ihn in den Worker-Thread. Ist das Tracing
+deaktiviert, liefern span() und trace() einen geteilten No-Op
+Context-Manager.
+"""
+
+import threading
+from contextvars import ContextVar
+from bisect import bisect_left
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Dict, Optional
+
+# Obergrenzen der Histogramm-Buckets in Millisekunden (letzter Bucket: +Inf)
+BUCKET_BOUNDS_MS = (
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+_NOOP = nullcontext()
+
+
+class LatencyHistogram:
+    """Latenz-Histogramm mit festen Buckets (Millisekunden)"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        value_ms = seconds * 1000
+        self.bucket_counts[bisect_left(BUCKET_BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> float:
+        """Geschätztes Perzentil (Obergrenze des Buckets, höchstens das Maximum)"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS_MS, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": {
+                **{
+                    f"le_{bound}": count
+                    for bound, count in zip(BUCKET_BOUNDS_MS, self.bucket_counts)
+                },
+                "le_inf": self.bucket_counts[-1],
+            },
+        }
+
+
+class Trace:
+    """Zeit-Aufschlüsselung einer Anfrage (Stufe -> Sekunden)"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+class _Span:
+    """Misst die Dauer eines with-Blocks"""
+
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder: "SpanRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class _TraceScope:
+    """Macht einen Trace für den aktuellen Kontext zum Ziel aller Spans"""
+
+    __slots__ = ("recorder", "name", "trace", "token", "start")
+
+    def __init__(self, recorder: "SpanRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.trace = Trace()
+
+    def __enter__(self) -> Trace:
+        self.token = self.recorder._current.set(self.trace)
+        self.start = perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.start
+        self.recorder._current.reset(self.token)
+        self.trace.add(self.name, elapsed)
+        self.recorder._observe(self.name, elapsed)
+        return False
+
+
+class SpanRecorder:
+    """Sammelt Span-Dauern als Histogramme und pro Anfrage"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._current: ContextVar[Optional[Trace]] = ContextVar(
+            f"trace_{id(self)}", default=None
+        )
+
+    def span(self, name: str):
+        """Context-Manager, der die Dauer des Blocks unter name erfasst"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def trace(self, name: str = "total"):
+        """Context-Manager für eine Anfrage; liefert deren Trace (None falls aus)"""
+        if not self.enabled:
+            return _NOOP
+        return _TraceScope(self, name)
+
+    def current_trace(self) -> Optional[Trace]:
+        """Trace der laufenden Anfrage im aktuellen Kontext (Thread bzw. Task)"""
+        return self._current.get()
+
+    def record(self, name: str, seconds: float):
+        """Erfasst eine bereits gemessene Dauer (z.B. über Generator-Grenzen)"""
+        if not self.enabled:
+            return
+        trace = self.current_trace()
+        if trace is not None:
+            trace.add(name, seconds)
+        self._observe(name, seconds)
+
+    def _observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def histograms(self) -> Dict[str, Dict]:
+        """Aggregierte Histogramme aller Stufen (für Monitoring und UI)"""
+        with self._lock:
+            return {name: h.to_dict() for name, h in self._histograms.items()}
+
+    def reset(self):
+        """Verwirft alle aggregierten Messungen"""
+        with self._lock:
+            self._histograms.clear()
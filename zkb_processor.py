@@ -7,18 +7,33 @@ Extrahiert Wanderrouten aus ZKB-PDFs und konvertiert sie
 in das gleiche Format wie die Appenzeller Routen.
 """
 
-import pdfplumber
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 
+from near_duplicates import MinHashDeduplicator, print_cluster_report
+from page_cache import PageTextCache, file_sha256
+from route_extraction import (
+    extract_zkb_fields,
+    zkb_difficulty,
+    zkb_distance,
+    zkb_duration,
+    zkb_elevation,
+    zkb_highlights,
+    zkb_restaurants,
+)
+
 
 class ZKBProcessor:
     """Processor für ZKB-Wanderdokumente"""
 
-    def __init__(self):
+    def __init__(self, page_cache: Optional[PageTextCache] = None):
         self.routes = []
+        # Report der zuletzt zusammengeführten Duplikat-Cluster
+        self.duplicate_clusters = []
+        # Seiten-Cache: unveränderte PDFs werden nicht erneut extrahiert
+        self.page_cache = page_cache or PageTextCache()
 
     def extract_zkb_routes(self, pdf_path: str, max_pages: int = 20) -> List[Dict]:
         """Extrahiert Wanderrouten aus ZKB-PDF"""
@@ -26,22 +41,23 @@ class ZKBProcessor:
         routes = []
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                full_text = ""
-                pages_to_read = min(len(pdf.pages), max_pages)
+            # Seitentexte aus dem Cache, nur neue/geänderte PDFs werden gelesen
+            file_hash = file_sha256(pdf_path)
+            page_texts = self.page_cache.extract_pages(
+                pdf_path, list(range(1, max_pages + 1)), "plain", file_hash
+            )
+            pages_to_read = min(self.page_cache.page_count(file_hash), max_pages)
 
-                print(
-                    f"   📄 Lese {pages_to_read} Seiten aus {os.path.basename(pdf_path)}"
-                )
+            print(f"   📄 Lese {pages_to_read} Seiten aus {os.path.basename(pdf_path)}")
 
-                for i in range(pages_to_read):
-                    page = pdf.pages[i]
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n"
+            full_text = ""
+            for page_num in range(1, pages_to_read + 1):
+                page_text = page_texts[page_num]
+                if page_text:
+                    full_text += page_text + "\n"
 
-                # Wanderungen im Text finden
-                routes = self.parse_zkb_text(full_text, pdf_path)
+            # Wanderungen im Text finden
+            routes = self.parse_zkb_text(full_text, pdf_path)
 
         except Exception as e:
             print(f"⚠️ Fehler beim Verarbeiten von {pdf_path}: {e}")
@@ -91,21 +107,19 @@ class ZKBProcessor:
                 end = min(len(text), match.end() + 300)
                 context = text[start:end]
 
-                # Metadaten extrahieren
-                duration = self.extract_duration(context)
-                distance = self.extract_distance(context)
-                elevation = self.extract_elevation(context)
+                # Metadaten extrahieren (vorkompilierte Muster, ein Durchgang)
+                fields = extract_zkb_fields(context)
 
                 # Route-Objekt erstellen
                 route = {
                     "title": self.clean_title(route_text),
                     "description": self.extract_description(context, route_text),
-                    "duration": duration,
-                    "distance": distance,
-                    "elevation_gain": elevation,
-                    "sac_scale": self.estimate_difficulty(context, duration),
-                    "restaurants": self.extract_restaurants(context),
-                    "highlights": self.extract_highlights(context),
+                    "duration": fields["duration"],
+                    "distance": fields["distance"],
+                    "elevation_gain": fields["elevation_gain"],
+                    "sac_scale": fields["sac_scale"],
+                    "restaurants": fields["restaurants"],
+                    "highlights": fields["highlights"],
                     "source": f"ZKB - {os.path.basename(source_pdf)}",
                     "region": self.extract_region(context, route_text),
                 }
@@ -137,122 +151,27 @@ class ZKBProcessor:
 
     def extract_duration(self, context: str) -> str:
         """Extrahiert Zeitangaben"""
-        time_patterns = [
-            r"(\d+[.,]?\d*\s*(?:Std|Stunden?))",
-            r"(\d+[.,]?\d*\s*h\s*\d*)",
-            r"(\d+\s*-\s*\d+\s*(?:Std|Stunden?))",
-        ]
-
-        for pattern in time_patterns:
-            match = re.search(pattern, context, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        return "Nicht angegeben"
+        return zkb_duration(context)
 
     def extract_distance(self, context: str) -> str:
         """Extrahiert Distanzangaben"""
-        distance_patterns = [
-            r"(\d+[.,]?\d*\s*km)",
-            r"(\d+[.,]?\d*\s*Kilometer)",
-        ]
-
-        for pattern in distance_patterns:
-            match = re.search(pattern, context, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        return "Nicht angegeben"
+        return zkb_distance(context)
 
     def extract_elevation(self, context: str) -> str:
         """Extrahiert Höhenmeter"""
-        elevation_patterns = [
-            r"(\d+\s*m\s*ü\.?\s*M\.?)",
-            r"(\d+\s*Höhenmeter)",
-            r"(\d+\s*hm)",
-            r"(\d+\s*m\s*Aufstieg)",
-        ]
-
-        for pattern in elevation_patterns:
-            match = re.search(pattern, context, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        return "Nicht angegeben"
+        return zkb_elevation(context)
 
     def estimate_difficulty(self, context: str, duration: str) -> str:
         """Schätzt SAC-Schwierigkeit basierend auf Kontext"""
-
-        # Direkte SAC-Angaben suchen
-        sac_match = re.search(r"T\s*([1-6])", context, re.IGNORECASE)
-        if sac_match:
-            return f"T{sac_match.group(1)}"
-
-        # Schlüsselwörter für Schwierigkeit
-        if re.search(
-            r"(schwierig|anspruchsvoll|steil|klettern)", context, re.IGNORECASE
-        ):
-            return "T3"
-        elif re.search(r"(mittel|bergwanderung|bergweg)", context, re.IGNORECASE):
-            return "T2"
-        elif re.search(
-            r"(einfach|leicht|spaziergang|familien)", context, re.IGNORECASE
-        ):
-            return "T1"
-
-        # Fallback basierend auf Dauer
-        if "Std" in duration or "h" in duration:
-            try:
-                hours = float(re.search(r"(\d+)", duration).group(1))
-                if hours >= 5:
-                    return "T3"
-                elif hours >= 3:
-                    return "T2"
-                else:
-                    return "T1"
-            except:
-                pass
-
-        return "T1"  # Konservativer Fallback
+        return zkb_difficulty(context, duration)
 
     def extract_restaurants(self, context: str) -> List[str]:
         """Extrahiert Restaurant-/Einkehrmöglichkeiten"""
-        restaurant_patterns = [
-            r"(Restaurant\s+[\w\s\-äöüÄÖÜ]{3,25})",
-            r"(Gasthaus\s+[\w\s\-äöüÄÖÜ]{3,25})",
-            r"(Beizli\s+[\w\s\-äöüÄÖÜ]{3,25})",
-            r"(Hotel\s+[\w\s\-äöüÄÖÜ]{3,25})",
-        ]
-
-        restaurants = []
-        for pattern in restaurant_patterns:
-            matches = re.finditer(pattern, context, re.IGNORECASE)
-            for match in matches:
-                restaurant = match.group(1).strip()
-                if restaurant not in restaurants:
-                    restaurants.append(restaurant)
-
-        return restaurants[:3]  # Max 3 Restaurants
+        return zkb_restaurants(context)
 
     def extract_highlights(self, context: str) -> List[str]:
         """Extrahiert Highlights/Sehenswürdigkeiten"""
-        highlight_patterns = [
-            r"(Aussicht\s+[\w\s\-äöüÄÖÜ]{5,30})",
-            r"(See\s+[\w\s\-äöüÄÖÜ]{3,20})",
-            r"(Gipfel\s+[\w\s\-äöüÄÖÜ]{3,20})",
-            r"(Wasserfall\s+[\w\s\-äöüÄÖÜ]{3,20})",
-            r"(Kapelle\s+[\w\s\-äöüÄÖÜ]{3,20})",
-        ]
-
-        highlights = []
-        for pattern in highlight_patterns:
-            matches = re.finditer(pattern, context, re.IGNORECASE)
-            for match in matches:
-                highlight = match.group(1).strip()
-                if highlight not in highlights:
-                    highlights.append(highlight)
-
-        return highlights[:3]  # Max 3 Highlights
+        return zkb_highlights(context)
 
     def extract_description(self, context: str, title: str) -> str:
         """Extrahiert/generiert Beschreibung"""
@@ -297,8 +216,11 @@ class ZKBProcessor:
 
         return "Schweiz"  # Fallback
 
-    def deduplicate_routes(self, routes: List[Dict]) -> List[Dict]:
-        """Entfernt Duplikate basierend auf Titel-Ähnlichkeit"""
+    def deduplicate_routes(
+        self, routes: List[Dict], similarity_threshold: float = 0.8
+    ) -> List[Dict]:
+        """Entfernt Duplikate basierend auf Titel-Ähnlichkeit und Near-Duplicates
+        (MinHash/LSH über Titel und Beschreibung)"""
         unique_routes = []
         seen_titles = set()
 
@@ -309,7 +231,17 @@ class ZKBProcessor:
                 seen_titles.add(title_key)
                 unique_routes.append(route)
 
-        return unique_routes
+        # Fast identische Fragmente (z.B. Inhaltsverzeichnisse) zusammenführen
+        return self.remove_near_duplicates(unique_routes, similarity_threshold)
+
+    def remove_near_duplicates(
+        self, routes: List[Dict], similarity_threshold: float = 0.8
+    ) -> List[Dict]:
+        """MinHash/LSH Near-Duplicate Entfernung mit Cluster-Report"""
+        deduplicator = MinHashDeduplicator(threshold=similarity_threshold)
+        routes, self.duplicate_clusters = deduplicator.deduplicate(routes)
+        print_cluster_report(self.duplicate_clusters)
+        return routes
 
     def process_all_zkb_pdfs(self, pdf_folder: str = "PDFs") -> List[Dict]:
         """Verarbeitet alle ZKB-PDFs im Ordner"""
@@ -333,6 +265,9 @@ class ZKBProcessor:
             routes = self.extract_zkb_routes(pdf_path)
             all_routes.extend(routes)
 
+        # Near-Duplicates auch über die Jahrgänge hinweg zusammenführen
+        all_routes = self.remove_near_duplicates(all_routes)
+
         print(f"✅ Insgesamt {len(all_routes)} ZKB-Routen extrahiert")
         return all_routes
 